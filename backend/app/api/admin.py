@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+import asyncio
+import datetime
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.database import engine, get_db, replica_engine, SessionLocal
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.project import Project
+from app.services.digest import print_stats, weekly_digest_job
+from app.services.email import email_service
 from app.services.fetcher import fetcher
+from app.services.outbox import outbox_dispatcher
+from app.services.snapshots import snapshot_service, SnapshotError
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
@@ -52,3 +60,131 @@ async def trigger_fetch_all(
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Fetch failed: {str(e)}")
+
+
+def run_snapshot_job():
+    """Background task: write the next incremental snapshot."""
+    db = SessionLocal()
+    try:
+        entry = snapshot_service.run(db)
+        if entry:
+            print(f"[Snapshot] #{entry['id']} written: {entry['rows']}")
+    except SnapshotError as e:
+        print(f"[Snapshot] Skipped: {e}")
+    finally:
+        db.close()
+
+
+@router.post("/snapshots", status_code=202)
+def trigger_snapshot(
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_user)
+):
+    """Start an incremental columnar snapshot of the release catalog."""
+    if snapshot_service.running:
+        raise HTTPException(status_code=409, detail="A snapshot is already running")
+    
+    background_tasks.add_task(run_snapshot_job)
+    
+    return {
+        "message": "Snapshot started",
+        "high_water_mark": snapshot_service.load_manifest()["high_water_mark"],
+    }
+
+
+@router.get("/snapshots")
+def list_snapshots(
+    current_user: User = Depends(get_current_user)
+):
+    """List snapshots written so far."""
+    return snapshot_service.load_manifest()
+
+
+@router.get("/snapshots/{snapshot_id}/{table}")
+def download_snapshot(
+    snapshot_id: int,
+    table: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Download one table of a snapshot as a Parquet file."""
+    path = snapshot_service.file_path(snapshot_id, table)
+    if not path:
+        raise HTTPException(status_code=404, detail="Snapshot file not found")
+    
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"{table}-{snapshot_id:05d}.parquet",
+    )
+
+
+@router.get("/database/pool")
+def database_pool(
+    current_user: User = Depends(get_current_user)
+):
+    """Connection pool metrics of this worker, per engine."""
+    pools = {"primary": engine.pool.metrics.snapshot()}
+    if replica_engine is not None:
+        pools["replica"] = replica_engine.pool.metrics.snapshot()
+    return pools
+
+
+@router.get("/outbox")
+def outbox_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Notification outbox row counts per status."""
+    return outbox_dispatcher.stats(db)
+
+
+@router.get("/outbox/circuits")
+def outbox_circuits(
+    current_user: User = Depends(get_current_user)
+):
+    """Destinations currently backed off by their circuit breaker."""
+    return outbox_dispatcher.breakers.snapshot()
+
+
+@router.post("/outbox/requeue-dead")
+def requeue_dead_notifications(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Retry notifications that exhausted their attempts."""
+    return {"requeued": outbox_dispatcher.requeue_dead(db)}
+
+
+@router.post("/outbox/replay")
+def replay_notifications(
+    since: datetime.datetime,
+    until: Optional[datetime.datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Re-send notifications created in a window that weren't delivered."""
+    return outbox_dispatcher.replay(db, since, until)
+
+
+def run_digest_job(hour: Optional[int]):
+    """Background task: send weekly digests on their own event loop."""
+    stats = asyncio.run(weekly_digest_job.run(hour=hour))
+    print_stats(hour, stats)
+
+
+@router.post("/digests", status_code=202)
+def trigger_digests(
+    background_tasks: BackgroundTasks,
+    hour: Optional[int] = Query(None, ge=0, le=23),
+    current_user: User = Depends(get_current_user)
+):
+    """Send weekly digests now, for one delivery hour or for everyone."""
+    if weekly_digest_job.running:
+        raise HTTPException(status_code=409, detail="A digest run is already in progress")
+    # Configured once at startup; re-initialising would orphan the live SMTP pool
+    if not email_service.is_configured():
+        raise HTTPException(status_code=503, detail="Email is not configured")
+    
+    background_tasks.add_task(run_digest_job, hour)
+    
+    return {"message": "Digest run started", "hour": hour}
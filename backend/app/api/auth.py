@@ -11,7 +11,8 @@ from app.core.security import (
 )
 from app.core.database import get_db
 from app.models.user import User
-from app.schemas.user import UserCreate, UserResponse, Token
+from app.schemas.user import UserCreate, UserResponse, UserUpdate, Token
+from app.services.routing import notify_subscriptions_changed
 
 settings = get_settings()
 
@@ -79,3 +80,19 @@ def login(
 @router.get("/me", response_model=UserResponse)
 def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.patch("/me", response_model=UserResponse)
+def update_current_user(
+    user_data: UserUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Update the current user's profile and digest hour."""
+    for field, value in user_data.model_dump(exclude_unset=True).items():
+        setattr(current_user, field, value)
+    
+    db.commit()
+    db.refresh(current_user)
+    notify_subscriptions_changed(user_id=current_user.id)
+    return current_user
@@ -5,6 +5,7 @@ from app.core.database import get_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.category import Category, ProjectCategory
+from app.services.project_cache import notify_project_changed
 from pydantic import BaseModel
 
 router = APIRouter(prefix="/categories", tags=["categories"])
@@ -98,6 +99,7 @@ def delete_category(
     
     db.delete(category)
     db.commit()
+    notify_project_changed()
 
 
 @router.post("/{category_id}/projects/{project_id}", status_code=201)
@@ -130,6 +132,7 @@ def add_project_to_category(
     link = ProjectCategory(category_id=category_id, project_id=project_id)
     db.add(link)
     db.commit()
+    notify_project_changed(project_id)
     
     return {"message": "Project added to category"}
 
@@ -152,3 +155,4 @@ def remove_project_from_category(
     
     db.delete(link)
     db.commit()
+    notify_project_changed(project_id)
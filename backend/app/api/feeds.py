@@ -2,12 +2,12 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
-from app.core.database import get_db
+from app.core.replicas import get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.project import Project
 from app.models.release import Release
-from app.models.subscription import Subscription
+from app.services.routing import routing_index
 
 router = APIRouter(prefix="/feeds", tags=["feeds"])
 
@@ -94,16 +94,13 @@ def get_rss_feed(
     project_id: Optional[int] = None,
     days: int = Query(7, ge=1, le=365),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get releases as RSS 2.0 feed."""
     # Get user's subscribed project IDs if no project specified
     if project_id is None:
-        subscriptions = db.query(Subscription.project_id).filter(
-            Subscription.user_id == current_user.id
-        ).all()
-        project_ids = [s[0] for s in subscriptions]
+        project_ids = list(routing_index.project_ids(db, current_user.id))
     else:
         project_ids = [project_id]
     
@@ -126,7 +123,7 @@ def get_rss_feed(
     # Build feed items
     items = []
     for release in releases:
-        changelog = release.changelog[:200] if release.changelog else ""
+        changelog = release.excerpt[:200] if release.excerpt else ""
         items.append({
             "title": f"{release.project.name} v{release.version}",
             "link": f"https://example.com/projects/{release.project_id}/releases/{release.id}",
@@ -149,16 +146,13 @@ def get_atom_feed(
     project_id: Optional[int] = None,
     days: int = Query(7, ge=1, le=365),
     limit: int = Query(50, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get releases as Atom 1.0 feed."""
     # Get user's subscribed project IDs if no project specified
     if project_id is None:
-        subscriptions = db.query(Subscription.project_id).filter(
-            Subscription.user_id == current_user.id
-        ).all()
-        project_ids = [s[0] for s in subscriptions]
+        project_ids = list(routing_index.project_ids(db, current_user.id))
     else:
         project_ids = [project_id]
     
@@ -181,7 +175,7 @@ def get_atom_feed(
     # Build feed items
     items = []
     for release in releases:
-        changelog = release.changelog[:200] if release.changelog else ""
+        changelog = release.excerpt[:200] if release.excerpt else ""
         items.append({
             "title": f"{release.project.name} v{release.version}",
             "link": f"https://example.com/projects/{release.project_id}/releases/{release.id}",
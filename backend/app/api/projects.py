@@ -2,12 +2,14 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.core.database import get_db
+from app.core.replicas import get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.project import Project, ReleaseSource
 from app.models.subscription import Subscription
 from app.schemas.project import ProjectCreate, ProjectResponse, ProjectWithReleases
 from app.services import get_source
+from app.services.project_cache import project_cache, notify_project_changed
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
@@ -18,7 +20,7 @@ def list_projects(
     limit: int = Query(20, ge=1, le=100),
     source: Optional[ReleaseSource] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """List all monitored projects with optional filtering."""
@@ -43,7 +45,7 @@ def search_projects(
     q: str = Query(..., min_length=2),
     limit: int = Query(10, ge=1, le=50),
     source: Optional[ReleaseSource] = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Quick search for projects."""
@@ -75,30 +77,13 @@ def get_project(
     current_user: User = Depends(get_current_user)
 ):
     """Get project details with recent releases."""
-    project = db.query(Project).filter(Project.id == project_id).first()
-    if not project:
+    detail = project_cache.get_or_load(db, project_id)
+    if not detail:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    # Check subscription
-    subscription = db.query(Subscription).filter(
-        Subscription.user_id == current_user.id,
-        Subscription.project_id == project_id
-    ).first()
-    
-    # Get recent releases
-    from app.models.release import Release
-    recent_releases = (
-        db.query(Release)
-        .filter(Release.project_id == project_id)
-        .order_by(Release.created_at.desc())
-        .limit(5)
-        .all()
-    )
-    
     return {
-        **project.__dict__,
-        "recent_releases": recent_releases,
-        "is_subscribed": subscription is not None
+        **detail.data,
+        "is_subscribed": current_user.id in detail.subscriber_ids,
     }
 
 
@@ -148,3 +133,4 @@ def delete_project(
     
     db.delete(project)
     db.commit()
+    notify_project_changed(project_id)
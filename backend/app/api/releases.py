@@ -1,16 +1,47 @@
+import csv
+import io
+import json
 from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 from datetime import datetime, timedelta
-from app.core.database import get_db
+from app.core.config import get_settings
+from app.core.database import get_db, SessionLocal
+from app.core.replicas import get_read_db
 from app.core.security import get_current_user
 from app.models.user import User
 from app.models.project import Project, ReleaseSource
 from app.models.release import Release
 from app.schemas.release import ReleaseResponse, ReleaseFeedItem
+from app.services.changelog_html import changelog_renderer
+from app.services.changelog_store import changelog_columns, join_changelog_blobs, with_changelog_text
+from app.services.routing import routing_index
+from app.services.summaries import load_summaries
+from app.services.version_index import latest_release
+
+settings = get_settings()
 
 router = APIRouter(prefix="/releases", tags=["releases"])
 
+EXPORT_COLUMNS = [
+    "id",
+    "project_id",
+    "project_name",
+    "project_source",
+    "version",
+    "tag_name",
+    "release_date",
+    "prerelease",
+    "draft",
+    "changelog_url",
+    "changelog",
+    "created_at",
+]
+
+# Rows per CSV chunk handed to the response; keeps writes large without buffering much
+CSV_CHUNK_ROWS = 100
+
 
 @router.get("/", response_model=List[ReleaseFeedItem])
 def list_releases(
@@ -21,7 +52,7 @@ def list_releases(
     days: int = Query(None, ge=1, le=365),
     search: str = None,
     prerelease: bool = None,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     query = (
@@ -65,7 +96,7 @@ def list_releases(
             project_avatar_url=r.project.avatar_url,
             version=r.version,
             release_date=r.release_date,
-            changelog=r.changelog[:200] if r.changelog else None,
+            changelog=r.excerpt[:200] if r.excerpt else None,
             tag_name=r.tag_name,
             prerelease=r.prerelease
         )
@@ -77,19 +108,14 @@ def list_releases(
 def get_release_feed(
     limit: int = Query(50, ge=1, le=100),
     days: int = Query(7, ge=1, le=365),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get unified release feed for subscribed projects"""
     cutoff = datetime.utcnow() - timedelta(days=days)
     
-    from app.models.subscription import Subscription
-    
     # Get subscribed project IDs
-    subscriptions = db.query(Subscription.project_id).filter(
-        Subscription.user_id == current_user.id
-    ).all()
-    subscribed_ids = [s[0] for s in subscriptions]
+    subscribed_ids = list(routing_index.project_ids(db, current_user.id))
     
     if not subscribed_ids:
         return []
@@ -112,7 +138,7 @@ def get_release_feed(
             project_avatar_url=r.project.avatar_url,
             version=r.version,
             release_date=r.release_date,
-            changelog=r.changelog[:200] if r.changelog else None,
+            changelog=r.excerpt[:200] if r.excerpt else None,
             tag_name=r.tag_name,
             prerelease=r.prerelease
         )
@@ -120,16 +146,158 @@ def get_release_feed(
     ]
 
 
+def build_export_query(
+    db: Session,
+    project_id: Optional[int] = None,
+    source: Optional[ReleaseSource] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    prerelease: Optional[bool] = None,
+):
+    """Column query for the export, ordered by primary key.
+
+    Plain columns (no ORM entities) keep per-row cost low and nothing is
+    tracked by the session, so memory stays flat however many rows stream.
+    Rows carry the changelog as `changelog_columns`; pass them through
+    `with_changelog_text` before rendering.
+    """
+    query = (
+        db.query(
+            Release.id,
+            Release.project_id,
+            Project.name,
+            Project.source,
+            Release.version,
+            Release.tag_name,
+            Release.release_date,
+            Release.prerelease,
+            Release.draft,
+            Release.changelog_url,
+            *changelog_columns(),
+            Release.created_at,
+        )
+        .join(Project, Release.project_id == Project.id)
+    )
+    query = join_changelog_blobs(query)
+    
+    if project_id:
+        query = query.filter(Release.project_id == project_id)
+    
+    if source:
+        query = query.filter(Project.source == source)
+    
+    if since:
+        query = query.filter(Release.created_at >= since)
+    
+    if until:
+        query = query.filter(Release.created_at < until)
+    
+    if prerelease is not None:
+        query = query.filter(Release.prerelease == prerelease)
+    
+    return query.order_by(Release.id)
+
+
+def _export_values(row) -> list:
+    """Convert a result row to JSON/CSV friendly values."""
+    values = list(row)
+    values[3] = values[3].value if values[3] is not None else None
+    for i in (6, 11):
+        if values[i] is not None:
+            values[i] = values[i].isoformat()
+    return values
+
+
+def iter_ndjson(rows: Iterable) -> Iterator[str]:
+    """Render rows as newline-delimited JSON, one release per line."""
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row)))) + "\n"
+
+
+def iter_csv(rows: Iterable) -> Iterator[str]:
+    """Render rows as CSV with a header line, in chunks of CSV_CHUNK_ROWS."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    
+    count = 0
+    for row in rows:
+        writer.writerow(_export_values(row))
+        count += 1
+        if count % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    
+    yield buffer.getvalue()
+
+
+@router.get("/export")
+def export_releases(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    project_id: Optional[int] = None,
+    source: Optional[ReleaseSource] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    prerelease: Optional[bool] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Stream every release matching the filters as NDJSON or CSV."""
+    renderer = iter_csv if format == "csv" else iter_ndjson
+    
+    def generate():
+        # The response outlives request dependencies, so the stream owns its session
+        db = SessionLocal()
+        try:
+            query = build_export_query(db, project_id, source, since, until, prerelease)
+            rows = query.yield_per(settings.EXPORT_BATCH_SIZE)
+            yield from renderer(with_changelog_text(rows, EXPORT_COLUMNS.index("changelog")))
+        finally:
+            db.close()
+    
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"releases.{'csv' if format == 'csv' else 'ndjson'}"
+    
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 @router.get("/{release_id}", response_model=ReleaseResponse)
 def get_release(
     release_id: int,
+    format: str = Query("markdown", pattern="^(markdown|html)$"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
+    """Get a release; format=html adds its changelog rendered to sanitized HTML."""
     release = db.query(Release).filter(Release.id == release_id).first()
     if not release:
         raise HTTPException(status_code=404, detail="Release not found")
-    return release
+    response = with_summaries(db, [release], full_changelog=True)[0]
+    if format == "html":
+        response.changelog_html = changelog_renderer.get_html(db, release)
+    return response
+
+
+def with_summaries(db: Session, releases: List[Release], full_changelog: bool = False) -> List[ReleaseResponse]:
+    """Release responses with their precomputed changelog summaries.
+
+    Only with `full_changelog` is the stored changelog decompressed; lists
+    carry its first CHANGELOG_EXCERPT_LENGTH characters.
+    """
+    summaries = load_summaries(db, (release.changelog_sha256 for release in releases))
+    fields = [name for name in ReleaseResponse.model_fields if name not in ("changelog", "summary", "changelog_html")]
+    return [
+        ReleaseResponse.model_validate({
+            **{name: getattr(release, name) for name in fields},
+            "changelog": release.changelog if full_changelog else release.excerpt,
+            "summary": summaries.get(release.changelog_sha256),
+        }, from_attributes=True)
+        for release in releases
+    ]
 
 
 @router.get("/project/{project_id}", response_model=List[ReleaseResponse])
@@ -137,15 +305,30 @@ def get_project_releases(
     project_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
+    """Releases of a project, highest version first, with changelog excerpts."""
     releases = (
         db.query(Release)
         .filter(Release.project_id == project_id)
-        .order_by(Release.created_at.desc())
+        .order_by(Release.version_key.desc(), Release.id.desc())
         .offset(skip)
         .limit(limit)
         .all()
     )
-    return releases
+    return with_summaries(db, releases)
+
+
+@router.get("/project/{project_id}/latest", response_model=ReleaseResponse)
+def get_latest_release(
+    project_id: int,
+    prerelease: bool = False,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Highest-versioned release of a project; prerelease=true includes pre-releases."""
+    release = latest_release(db, project_id, include_prereleases=prerelease)
+    if not release:
+        raise HTTPException(status_code=404, detail="No releases found")
+    return with_summaries(db, [release])[0]
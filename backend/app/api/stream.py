@@ -0,0 +1,137 @@
+import asyncio
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from typing import List, Optional, Set
+from app.core.config import get_settings
+from app.core.database import get_db, SessionLocal
+from app.core.security import get_current_user
+from app.models.user import User
+from app.services.events import event_hub, StreamEvent, SUBSCRIPTIONS_CHANGED
+from app.services.routing import routing_index
+
+settings = get_settings()
+
+router = APIRouter(prefix="/stream", tags=["stream"])
+
+# EventSource and browser WebSockets can't set headers, so the token may
+# also be passed as a ?token= query parameter.
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login", auto_error=False)
+
+
+def get_subscribed_project_ids(db: Session, user_id: int) -> List[int]:
+    """Project IDs the user is subscribed to."""
+    return list(routing_index.project_ids(db, user_id))
+
+
+def _current_project_ids(user_id: int) -> List[int]:
+    db = SessionLocal()
+    try:
+        return get_subscribed_project_ids(db, user_id)
+    finally:
+        db.close()
+
+
+def resync_streams(event: StreamEvent) -> None:
+    """Point a user's open streams at their projects after a subscription change.
+
+    Runs after the routing index has marked the user stale, so the reload
+    sees the change; the query runs off the event loop.
+    """
+    user_id = json.loads(event.data).get("data", {}).get("user_id")
+    if user_id is None or not event_hub.has_connections(user_id):
+        return
+
+    async def resync():
+        event_hub.resubscribe_user(user_id, await asyncio.to_thread(_current_project_ids, user_id))
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        # Published from a thread before the hub's loop started
+        event_hub.resubscribe_user(user_id, _current_project_ids(user_id))
+        return
+    task = loop.create_task(resync())
+    _resyncs.add(task)
+    task.add_done_callback(_resyncs.discard)
+
+
+# Running resyncs, referenced so they aren't garbage collected mid-flight
+_resyncs: Set[asyncio.Task] = set()
+
+event_hub.add_listener(SUBSCRIPTIONS_CHANGED, resync_streams)
+
+
+async def get_stream_user(
+    token: Optional[str] = Query(None),
+    bearer: Optional[str] = Depends(optional_oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> User:
+    return await get_current_user(token=bearer or token or "", db=db)
+
+
+@router.get("/releases")
+async def stream_releases(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_stream_user),
+):
+    """Server-Sent Events stream of new releases for subscribed projects."""
+    project_ids = get_subscribed_project_ids(db, current_user.id)
+    subscriber = event_hub.subscribe(current_user.id, project_ids)
+    # Don't hold a pooled connection for the lifetime of the stream
+    db.close()
+
+    async def event_source():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = await subscriber.get(settings.STREAM_KEEPALIVE_SECONDS)
+                if subscriber.closed or await request.is_disconnected():
+                    break
+                if event is None:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {event.type}\ndata: {event.data}\n\n"
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def stream_releases_ws(websocket: WebSocket, token: str = Query("")):
+    """WebSocket stream of new releases for subscribed projects."""
+    db = SessionLocal()
+    try:
+        current_user = await get_current_user(token=token, db=db)
+        project_ids = get_subscribed_project_ids(db, current_user.id)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    finally:
+        db.close()
+
+    await websocket.accept()
+    subscriber = event_hub.subscribe(current_user.id, project_ids)
+    try:
+        while True:
+            event = await subscriber.get(settings.STREAM_KEEPALIVE_SECONDS)
+            if subscriber.closed:
+                # Client fell too far behind; it should reconnect and resync
+                await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+                break
+            if event is None:
+                await websocket.send_text('{"type": "keepalive"}')
+                continue
+            await websocket.send_text(event.data)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        event_hub.unsubscribe(subscriber)
@@ -7,6 +7,8 @@ from app.models.user import User
 from app.models.project import Project
 from app.models.subscription import Subscription
 from app.schemas.subscription import SubscriptionCreate, SubscriptionResponse, SubscriptionUpdate
+from app.services.project_cache import notify_project_changed
+from app.services.routing import notify_subscriptions_changed
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
@@ -59,6 +61,8 @@ def create_subscription(
     db.add(subscription)
     db.commit()
     db.refresh(subscription)
+    notify_project_changed(subscription.project_id)
+    notify_subscriptions_changed(subscription.project_id, current_user.id)
     
     return {
         **subscription.__dict__,
@@ -87,6 +91,7 @@ def update_subscription(
     
     db.commit()
     db.refresh(subscription)
+    notify_subscriptions_changed(subscription.project_id, current_user.id)
     
     return {
         **subscription.__dict__,
@@ -109,5 +114,8 @@ def delete_subscription(
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
     
+    project_id = subscription.project_id
     db.delete(subscription)
     db.commit()
+    notify_project_changed(project_id)
+    notify_subscriptions_changed(project_id, current_user.id)
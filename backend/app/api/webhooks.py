@@ -1,3 +1,4 @@
+import datetime
 import secrets
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
@@ -9,6 +10,7 @@ from app.models.user import User
 from app.models.project import Project
 from app.models.webhook import WebhookSubscription
 from app.schemas.webhook import WebhookCreate, WebhookResponse, WebhookUpdate
+from app.services.routing import notify_subscriptions_changed
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
 
@@ -49,17 +51,20 @@ def create_webhook(
     webhook = WebhookSubscription(
         project_id=webhook_data.project_id,
         user_id=current_user.id,
-        webhook_url=webhook_data.webhook_url,
+        webhook_url=str(webhook_data.webhook_url),
         webhook_secret=secret,
         channel=webhook_data.channel,
+        format=webhook_data.format,
         notify_releases=webhook_data.notify_releases,
         notify_prereleases=webhook_data.notify_prereleases,
         notify_security=webhook_data.notify_security,
+        coalesce_seconds=webhook_data.coalesce_seconds,
     )
     
     db.add(webhook)
     db.commit()
     db.refresh(webhook)
+    notify_subscriptions_changed(webhook.project_id)
     
     return webhook
 
@@ -98,12 +103,17 @@ def update_webhook(
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
-    # Update fields
-    for field, value in update_data.model_dump(exclude_unset=True).items():
+    # Update fields (URLs as plain strings)
+    for field, value in update_data.model_dump(mode="json", exclude_unset=True).items():
         setattr(webhook, field, value)
+    if update_data.is_active and webhook.disabled_at:
+        # Re-enabled after being switched off for failures: start over
+        webhook.disabled_at = None
+        webhook.failure_count = 0
     
     db.commit()
     db.refresh(webhook)
+    notify_subscriptions_changed(webhook.project_id)
     
     return webhook
 
@@ -123,8 +133,28 @@ def delete_webhook(
     if not webhook:
         raise HTTPException(status_code=404, detail="Webhook not found")
     
+    project_id = webhook.project_id
     db.delete(webhook)
     db.commit()
+    notify_subscriptions_changed(project_id)
+
+
+async def send_test_payload(webhook: WebhookSubscription) -> bool:
+    """POST a signed ping to a generic JSON webhook."""
+    import httpx
+    from app.services.fanout import canonical_payload, signed_headers, webhook_client
+
+    body = canonical_payload({
+        "event": "ping",
+        "webhook_id": webhook.id,
+        "project_id": webhook.project_id,
+        "message": "This is a test notification from Release Monitor",
+    })
+    try:
+        await webhook_client.post(webhook.webhook_url, body, signed_headers(webhook.webhook_secret, body))
+    except httpx.HTTPError:
+        return False
+    return True
 
 
 @router.post("/{webhook_id}/test")
@@ -134,7 +164,7 @@ async def test_webhook(
     current_user: User = Depends(get_current_user)
 ):
     """Send a test webhook to verify configuration."""
-    from app.services.mattermost import mattermost_service
+    from app.services.mattermost import MattermostService
     
     webhook = db.query(WebhookSubscription).filter(
         WebhookSubscription.id == webhook_id,
@@ -145,23 +175,25 @@ async def test_webhook(
         raise HTTPException(status_code=404, detail="Webhook not found")
     
     # Test the webhook
-    success = await mattermost_service.notify_release(
-        webhook_url=webhook.webhook_url,
-        channel=webhook.channel,
-        project_name="Test Project",
-        version="1.0.0",
-        release_url="https://example.com",
-        changelog="This is a test notification from Release Monitor",
-        prerelease=False,
-    )
+    if webhook.format == "json":
+        success = await send_test_payload(webhook)
+    else:
+        service = MattermostService(webhook_url=webhook.webhook_url, channel=webhook.channel)
+        success = await service.notify_release(
+            project_name="Test Project",
+            version="1.0.0",
+            release_url="https://example.com",
+            changelog="This is a test notification from Release Monitor",
+            prerelease=False,
+        )
     
     if success:
-        webhook.last_delivery_at = datetime.utcnow()
+        webhook.last_delivery_at = datetime.datetime.utcnow()
         webhook.last_status_code = 200
         db.commit()
         return {"message": "Test notification sent successfully"}
     else:
-        webhook.failure_count += 1
+        webhook.failure_count = (webhook.failure_count or 0) + 1
         webhook.last_status_code = 500
         db.commit()
         raise HTTPException(status_code=500, detail="Failed to send test notification")
@@ -187,6 +219,3 @@ def rotate_webhook_secret(
     
     return {"webhook_secret": webhook.webhook_secret}
 
-
-# Import datetime for use in test webhook
-import datetime
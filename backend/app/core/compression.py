@@ -0,0 +1,54 @@
+import hashlib
+import threading
+import zlib
+from typing import Optional, Tuple
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 6
+
+# zstandard objects must not be used from two threads at once, so each thread gets its own
+_zstd = threading.local()
+
+
+def changelog_hash(changelog: Optional[str]) -> Optional[str]:
+    """SHA-256 of a changelog's text, or None when there is no changelog."""
+    if not changelog:
+        return None
+    return hashlib.sha256(changelog.encode("utf-8")).hexdigest()
+
+
+def _zstd_codec(name: str):
+    """This thread's zstd compressor or decompressor; None without the zstandard package."""
+    codecs = getattr(_zstd, "codecs", None)
+    if codecs is None:
+        try:
+            import zstandard
+        except ImportError:
+            return None
+        codecs = _zstd.codecs = {
+            "compress": zstandard.ZstdCompressor(level=ZSTD_LEVEL),
+            "decompress": zstandard.ZstdDecompressor(),
+        }
+    return codecs[name]
+
+
+def compress_text(text: str, codec: str = "zlib") -> Tuple[str, bytes]:
+    """Compress UTF-8 `text`; returns (codec used, data).
+
+    zstd needs the optional zstandard package and falls back to zlib.
+    """
+    data = text.encode("utf-8")
+    if codec == "zstd":
+        compressor = _zstd_codec("compress")
+        if compressor is not None:
+            return "zstd", compressor.compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        decompressor = _zstd_codec("decompress")
+        if decompressor is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed changelogs")
+        return decompressor.decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
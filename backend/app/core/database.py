@@ -1,18 +1,75 @@
-from sqlalchemy import create_engine
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import get_settings
+from app.core.instrumentation import instrument_engine
+from app.core.pool_metrics import InstrumentedQueuePool, PoolMetrics
 
 settings = get_settings()
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=3600,
-)
+
+def statement_timeout_sql(dialect, seconds: float) -> Optional[str]:
+    """Session statement that makes the server abort statements running longer than `seconds`."""
+    if not seconds:
+        return None
+    if dialect.name in ("mysql", "mariadb"):
+        # MariaDB counts seconds for every statement; MySQL milliseconds for SELECTs
+        if dialect.is_mariadb:
+            return f"SET SESSION max_statement_time = {seconds:g}"
+        return f"SET SESSION max_execution_time = {int(seconds * 1000)}"
+    if dialect.name == "postgresql":
+        return f"SET statement_timeout = {int(seconds * 1000)}"
+    return None
+
+
+def set_statement_timeout(engine: Engine, seconds: float) -> None:
+    statement = statement_timeout_sql(engine.dialect, seconds)
+    if statement is None:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_timeout(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute(statement)
+        finally:
+            cursor.close()
+
+
+def _create_engine(url: str, name: str) -> Engine:
+    options = {}
+    parsed = make_url(url)
+    # In-memory SQLite lives in one connection, so it keeps SQLAlchemy's default pool
+    if not (parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")):
+        options = {
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.DATABASE_POOL_SIZE,
+            "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+            "pool_timeout": settings.DATABASE_POOL_TIMEOUT,
+        }
+    engine = create_engine(
+        url,
+        pool_pre_ping=True,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        **options,
+    )
+    set_statement_timeout(engine, settings.DATABASE_STATEMENT_TIMEOUT)
+    PoolMetrics.attach(engine)
+    instrument_engine(engine, name)
+    return engine
+
+
+engine = _create_engine(settings.DATABASE_URL, "primary")
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica, used by read-only endpoints through app.core.replicas
+replica_engine = _create_engine(settings.DATABASE_REPLICA_URL, "replica") if settings.DATABASE_REPLICA_URL else None
+
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) if replica_engine else None
+
 Base = declarative_base()
 
 
@@ -22,3 +79,70 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def insert_ignore_statement(dialect, model, key):
+    """INSERT into `model`'s table that skips rows whose unique `key` exists,
+    or None when the dialect has no such statement."""
+    if dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(model).on_conflict_do_nothing()
+    if dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(model).on_conflict_do_nothing()
+    if dialect.name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model)
+        # A no-op update rather than INSERT IGNORE, which would also hide
+        # truncation and foreign key errors
+        return statement.on_duplicate_key_update({key[0]: statement.inserted[key[0]]})
+    return None
+
+
+def insert_ignore(db, model, rows, key):
+    """Insert `rows` (dicts) into `model`'s table, skipping any whose unique
+    `key` columns match a row that already exists.
+
+    Atomic on PostgreSQL, SQLite and MySQL/MariaDB, so concurrent writers of
+    the same key don't fail; other databases use `_insert_missing`.
+    """
+    if not rows:
+        return
+    statement = insert_ignore_statement(db.get_bind().dialect, model, key)
+    if statement is None:
+        _insert_missing(db, model, rows, key)
+    else:
+        db.execute(statement, rows)
+
+
+def _insert_missing(db, model, rows, key):
+    """Last resort: insert the rows not found by a SELECT.
+
+    A concurrent writer can insert a key between the two statements, so
+    the insert runs in a savepoint; on a conflict each row is retried in
+    its own savepoint and the ones that now exist are skipped.
+    """
+    from sqlalchemy import insert, tuple_
+    from sqlalchemy.exc import IntegrityError
+
+    columns = [getattr(model, name) for name in key]
+    wanted = {tuple(row[name] for name in key) for row in rows}
+    existing = {tuple(found) for found in db.query(*columns).filter(tuple_(*columns).in_(wanted))}
+    rows = [row for row in rows if tuple(row[name] for name in key) not in existing]
+    if not rows:
+        return
+    # Savepoints on the connection: rolling back a Session savepoint would
+    # also expunge the caller's pending objects
+    connection = db.connection()
+    try:
+        with connection.begin_nested():
+            connection.execute(insert(model), rows)
+        return
+    except IntegrityError:
+        pass
+    for row in rows:
+        try:
+            with connection.begin_nested():
+                connection.execute(insert(model), [row])
+        except IntegrityError:
+            pass
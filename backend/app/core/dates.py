@@ -0,0 +1,13 @@
+import datetime
+from typing import Optional
+
+
+def naive_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    """`value` as naive UTC, the way DateTime columns store and return it.
+
+    Sources parse timestamps with their offset; comparing those with
+    values read back from the database raises TypeError.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
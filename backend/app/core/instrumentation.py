@@ -0,0 +1,174 @@
+import time
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.metrics import COUNT_BUCKETS, REGISTRY, Counter, Gauge, HistogramMetric
+
+# Application metrics, served at /metrics. Every API worker keeps its own;
+# Prometheus sums them per instance.
+
+HTTP_REQUEST_SECONDS = HistogramMetric(
+    "http_request_duration_seconds", "API request latency by route", ("method", "route", "status"),
+)
+HTTP_REQUEST_DB_QUERIES = HistogramMetric(
+    "http_request_db_queries", "Database queries per API request", ("route",), buckets=COUNT_BUCKETS,
+)
+HTTP_REQUEST_DB_SECONDS = HistogramMetric(
+    "http_request_db_seconds", "Database time per API request", ("route",),
+)
+DB_QUERY_SECONDS = HistogramMetric(
+    "db_query_duration_seconds", "Database query latency", ("database",),
+)
+DB_QUERY_ERRORS = Counter("db_query_errors_total", "Database queries that raised", ("database",))
+FETCH_SECONDS = HistogramMetric(
+    "release_fetch_duration_seconds", "Time to fetch and store one project's releases", ("source", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+RELEASES_INGESTED = Counter("releases_ingested_total", "New releases stored", ("source",))
+UPSTREAM_RESPONSES = Counter(
+    "upstream_responses_total", "Responses from release sources by status code", ("source", "status"),
+)
+UPSTREAM_RATE_LIMIT_REMAINING = Gauge(
+    "upstream_rate_limit_remaining", "Requests left in the source's rate-limit window, as last reported", ("source",),
+)
+UPSTREAM_RATE_LIMIT = Gauge(
+    "upstream_rate_limit", "Size of the source's rate-limit window, as last reported", ("source",),
+)
+DELIVERY_SECONDS = HistogramMetric(
+    "notification_delivery_duration_seconds", "Notification delivery attempts by outcome", ("channel", "outcome"),
+)
+
+
+class RequestDatabaseStats:
+    __slots__ = ("queries", "seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+# Database work of the API request being served, shared with the threads it runs in
+request_database_stats: ContextVar[Optional[RequestDatabaseStats]] = ContextVar("request_database_stats", default=None)
+
+
+def route_template(scope) -> str:
+    """Path template of the route that served a request, or "unmatched"."""
+    path = getattr(scope.get("route"), "path", None)
+    if path is None:
+        return "unmatched"
+    # Depending on the FastAPI version, routes of included routers know only
+    # their own part of the path; the rest is the router prefix
+    prefix = "/".join(scope["path"].split("/")[:-path.count("/")])
+    return prefix + path
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing requests per route, with their database work.
+
+    The route is the matched path template ("/api/releases/{release_id}"),
+    so label values stay bounded; unmatched paths are counted together.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+        stats = RequestDatabaseStats()
+        token = request_database_stats.set(stats)
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            request_database_stats.reset(token)
+            route = route_template(scope)
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route, status[0]).observe(time.perf_counter() - started)
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats.queries)
+            HTTP_REQUEST_DB_SECONDS.labels(route).observe(stats.seconds)
+
+
+def record_upstream_response(source: str, response) -> None:
+    """Count a release source's response and keep its reported rate-limit budget."""
+    UPSTREAM_RESPONSES.labels(source, response.status_code).inc()
+    remaining = response.headers.get("x-ratelimit-remaining")
+    limit = response.headers.get("x-ratelimit-limit")
+    try:
+        if remaining is not None:
+            UPSTREAM_RATE_LIMIT_REMAINING.labels(source).set(float(remaining))
+        if limit is not None:
+            UPSTREAM_RATE_LIMIT.labels(source).set(float(limit))
+    except ValueError:
+        pass
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every query run through `engine` and export its pool metrics."""
+    histogram = DB_QUERY_SECONDS.labels(name)
+    errors = DB_QUERY_ERRORS.labels(name)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _started(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        histogram.observe(elapsed)
+        stats = request_database_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        errors.inc()
+
+    _engines.append((name, engine))
+
+
+_engines: List[tuple] = []
+
+POOL_VALUES = [
+    ("db_pool_size", "gauge", "Connections the pool keeps open", "pool_size"),
+    ("db_pool_max_overflow", "gauge", "Extra connections the pool may open", "max_overflow"),
+    ("db_pool_checked_out", "gauge", "Connections in use", "checked_out"),
+    ("db_pool_checked_out_peak", "gauge", "Most connections in use at once", "peak_checked_out"),
+    ("db_pool_checkouts_total", "counter", "Connections handed out", "checkouts"),
+    ("db_pool_connects_total", "counter", "Connections opened", "connects"),
+    ("db_pool_overflow_connects_total", "counter", "Connections opened beyond the pool size", "overflow_connects"),
+    ("db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection", "timeouts"),
+    ("db_pool_invalidations_total", "counter", "Connections discarded after errors", "invalidations"),
+]
+POOL_HISTOGRAMS = [
+    ("db_pool_wait_seconds", "Time waiting for a connection", "wait_seconds"),
+    ("db_pool_held_seconds", "Time a connection was checked out", "held_seconds"),
+    ("db_pool_connection_lifetime_seconds", "Age of connections when closed", "lifetime_seconds"),
+]
+
+
+def _pool_samples() -> Iterator[tuple]:
+    pools = [(name, getattr(engine.pool, "metrics", None)) for name, engine in _engines]
+    pools = [(name, metrics) for name, metrics in pools if metrics is not None]
+    for metric, type_, documentation, attribute in POOL_VALUES:
+        yield metric, type_, documentation, [("", {"database": name}, getattr(metrics, attribute)) for name, metrics in pools]
+    for metric, documentation, attribute in POOL_HISTOGRAMS:
+        yield metric, "histogram", documentation, [
+            sample for name, metrics in pools for sample in getattr(metrics, attribute).samples({"database": name})
+        ]
+
+
+REGISTRY.add_collector(_pool_samples)
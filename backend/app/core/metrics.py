@@ -0,0 +1,181 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+# Bucket bounds, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LIFETIME_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 7200, 14400)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+# One exposition sample: name suffix, labels, value
+Sample = Tuple[str, Dict[str, str], float]
+
+
+class Histogram:
+    """Counts of observed values per bucket, plus their count and sum.
+
+    Buckets are cumulative upper bounds, as in Prometheus: a value is
+    counted in every bucket whose bound it does not exceed.
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # Last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def cumulative(self) -> Dict[str, int]:
+        """Observations at or below each bound, keyed like Prometheus' `le` label."""
+        counts = {}
+        total = 0
+        with self._lock:
+            for bound, count in zip(self.buckets, self._counts):
+                total += count
+                counts[f"{bound:g}"] = total
+            counts["+Inf"] = self.count
+        return counts
+
+    def snapshot(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "buckets": self.cumulative()}
+
+    def samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        for bound, count in self.cumulative().items():
+            yield "_bucket", {**labels, "le": bound}, count
+        yield "_sum", labels, self.sum
+        yield "_count", labels, self.count
+
+
+class Value:
+    """A number that is incremented or set, for counters and gauges."""
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self.value += amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def samples(self, labels: Dict[str, str]) -> Iterator[Sample]:
+        yield "", labels, self.value
+
+
+class Metric:
+    """A named metric with one child (Value or Histogram) per label set.
+
+    `labels(...)` is a dict lookup once a label set has been seen, so hot
+    paths can call it per event; keep label values to a bounded set.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[tuple, object] = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        return Value()
+
+    def labels(self, *values) -> object:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterator[Sample]:
+        for values, child in list(self._children.items()):
+            yield from child.samples(dict(zip(self.labelnames, (str(value) for value in values))))
+
+
+class Counter(Metric):
+    type = "counter"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+
+class HistogramMetric(Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        self.buckets = buckets
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self):
+        return Histogram(self.buckets)
+
+
+class Registry:
+    """Metrics of this process, rendered in the Prometheus text format.
+
+    Besides registered metrics, collectors are called at render time for
+    numbers kept elsewhere (pool metrics, counters on services); each
+    returns (name, type, documentation, samples).
+    """
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+
+    def register(self, metric: Metric) -> None:
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], Iterable[tuple]]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> Iterator[tuple]:
+        for metric in self._metrics:
+            yield metric.name, metric.type, metric.documentation, list(metric.samples())
+        for collector in self._collectors:
+            yield from collector()
+
+    def render(self) -> str:
+        lines = []
+        seen = set()
+        for name, type_, documentation, samples in self.collect():
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {type_}")
+            for suffix, labels, value in samples:
+                lines.append(f"{name}{suffix}{format_labels(labels)} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{key}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Default registry, served at /metrics
+REGISTRY = Registry()
@@ -0,0 +1,150 @@
+import datetime
+from typing import Callable, List, Tuple
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateColumn
+
+# Schema migrations
+#
+# Each migration runs once per database, in order, and is recorded in
+# schema_migrations. Steps are written to be safe to rerun: MariaDB commits
+# DDL as it goes, so a migration that fails halfway is simply run again
+# after the cause is fixed. Schema changes to the models add a migration at
+# the end of MIGRATIONS instead of relying on create_all.
+schema_migrations = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("version", String(100), primary_key=True),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class MigrationError(Exception):
+    """A migration cannot run against the data as it is."""
+
+
+def _metadata() -> MetaData:
+    from app.core.database import Base
+    import app.models  # noqa: F401 - register all tables on Base.metadata
+    return Base.metadata
+
+
+def create_tables(connection: Connection) -> None:
+    """Create tables that don't exist yet; existing ones are left as they are."""
+    _metadata().create_all(connection)
+
+
+def add_missing_columns(connection: Connection) -> None:
+    """Add model columns missing from existing tables.
+
+    NOT NULL columns without a server default are added nullable, since
+    existing rows have no value for them.
+    """
+    inspector = inspect(connection)
+    preparer = connection.dialect.identifier_preparer
+    for table in _metadata().sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable and column.server_default is None:
+                column = column._copy()
+                column.nullable = True
+            spec = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}"))
+            print(f"[Migrations] Added {table.name}.{column.name}")
+
+
+def create_missing_indexes(connection: Connection) -> None:
+    for table in _metadata().sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            index.create(connection, checkfirst=True)
+
+
+def merge_duplicate_subscriptions(connection: Connection) -> None:
+    """Keep the oldest of a user's subscriptions to the same project."""
+    groups = connection.execute(text(
+        "SELECT user_id, project_id, MIN(id) FROM subscriptions "
+        "GROUP BY user_id, project_id HAVING COUNT(*) > 1"
+    )).all()
+    for user_id, project_id, keep in groups:
+        params = {"user_id": user_id, "project_id": project_id, "keep": keep}
+        duplicates = "SELECT id FROM subscriptions WHERE user_id = :user_id AND project_id = :project_id AND id != :keep"
+        connection.execute(text(
+            f"UPDATE notification_outbox SET subscription_id = :keep WHERE subscription_id IN ({duplicates})"
+        ), params)
+        connection.execute(text(
+            "DELETE FROM subscriptions WHERE user_id = :user_id AND project_id = :project_id AND id != :keep"
+        ), params)
+    if groups:
+        print(f"[Migrations] Merged duplicate subscriptions of {len(groups)} user/project pairs")
+
+
+def check_duplicate_releases(connection: Connection) -> None:
+    """Refuse to add the release unique key over versions stored twice.
+
+    Duplicates carry their own assets, summaries and notifications, so
+    which one to keep is left to whoever runs the migration.
+    """
+    duplicates = connection.execute(text(
+        "SELECT project_id, version, COUNT(*) FROM releases "
+        "GROUP BY project_id, version HAVING COUNT(*) > 1 LIMIT 10"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"project {project_id} {version} ({count}x)" for project_id, version, count in duplicates)
+        raise MigrationError(f"Releases stored more than once; remove the extra rows and rerun: {listed}")
+
+
+def hot_query_indexes(connection: Connection) -> None:
+    """Composite indexes and unique keys for feeds, ingest dedupe and
+    subscription lookups, plus indexes added to the models since."""
+    merge_duplicate_subscriptions(connection)
+    check_duplicate_releases(connection)
+    create_missing_indexes(connection)
+
+
+MIGRATIONS: List[Tuple[str, Callable[[Connection], None]]] = [
+    ("0001_create_tables", create_tables),
+    # Columns added to the models while tables were only created with create_all
+    ("0002_add_columns", add_missing_columns),
+    ("0003_hot_query_indexes", hot_query_indexes),
+    ("0004_replica_heartbeat", create_tables),
+]
+
+
+def applied_migrations(engine: Engine) -> List[str]:
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as connection:
+        return [row[0] for row in connection.execute(select(schema_migrations.c.version))]
+
+
+def pending_migrations(engine: Engine) -> List[str]:
+    applied = set(applied_migrations(engine))
+    return [version for version, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(engine: Engine) -> List[str]:
+    """Apply pending migrations in order; returns the versions applied."""
+    applied = []
+    pending = set(pending_migrations(engine))
+    for version, step in MIGRATIONS:
+        if version not in pending:
+            continue
+        with engine.begin() as connection:
+            step(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=version,
+                applied_at=datetime.datetime.utcnow(),
+            ))
+        print(f"[Migrations] Applied {version}")
+        applied.append(version)
+    return applied
+
+
+if __name__ == "__main__":
+    from app.core.database import engine
+
+    applied = migrate(engine)
+    print(f"[Migrations] {len(applied)} applied, schema is at {MIGRATIONS[-1][0]}")
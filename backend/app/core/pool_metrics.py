@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Callable, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from app.core.metrics import LATENCY_BUCKETS, LIFETIME_BUCKETS, Histogram
+
+
+class PoolMetrics:
+    """Live connection pool metrics of one engine in this worker.
+
+    Fed by SQLAlchemy pool events, except the checkout wait, which
+    InstrumentedQueuePool times since no event fires before a checkout
+    starts waiting.
+    """
+
+    def __init__(self, pool_size: int, max_overflow: int, clock: Callable[[], float] = time.perf_counter):
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.overflow_connects = 0  # Connections opened beyond pool_size
+        self.timeouts = 0  # Checkouts that gave up after pool_timeout
+        self.invalidations = 0
+        self.wait_seconds = Histogram(LATENCY_BUCKETS)  # Until a connection was handed out
+        self.held_seconds = Histogram(LATENCY_BUCKETS)  # From checkout to checkin
+        self.lifetime_seconds = Histogram(LIFETIME_BUCKETS)  # From connect to close
+
+    @classmethod
+    def attach(cls, engine: Engine) -> "PoolMetrics":
+        """Start collecting metrics for `engine`'s pool; also kept on `engine.pool.metrics`."""
+        pool = engine.pool
+        size = pool.size() if isinstance(pool, QueuePool) else 1
+        max_overflow = pool._max_overflow if isinstance(pool, QueuePool) else 0
+        metrics = cls(size, max_overflow)
+        pool.metrics = metrics
+        # Listeners on the engine carry over when the pool is recreated
+        event.listen(engine, "connect", metrics._on_connect)
+        event.listen(engine, "checkout", metrics._on_checkout)
+        event.listen(engine, "checkin", metrics._on_checkin)
+        event.listen(engine, "close", metrics._on_close)
+        event.listen(engine, "invalidate", metrics._on_invalidate)
+        return metrics
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        connection_record.info["connected_at"] = self.clock()
+        with self._lock:
+            self.connects += 1
+            # Opened for a checkout while every pooled connection is in use
+            if self.checked_out >= self.pool_size:
+                self.overflow_connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        connection_record.info["checked_out_at"] = self.clock()
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        self.held_seconds.observe(self.clock() - checked_out_at)
+        with self._lock:
+            self.checked_out -= 1
+
+    def _on_close(self, dbapi_connection, connection_record) -> None:
+        connected_at = connection_record.info.pop("connected_at", None)
+        if connected_at is not None:
+            self.lifetime_seconds.observe(self.clock() - connected_at)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "overflow_connects": self.overflow_connects,
+            "timeouts": self.timeouts,
+            "invalidations": self.invalidations,
+            "wait_seconds": self.wait_seconds.snapshot(),
+            "held_seconds": self.held_seconds.snapshot(),
+            "lifetime_seconds": self.lifetime_seconds.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits for a connection."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super()._do_get()
+        started = metrics.clock()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with metrics._lock:
+                metrics.timeouts += 1
+            raise
+        finally:
+            metrics.wait_seconds.observe(metrics.clock() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
@@ -0,0 +1,200 @@
+import asyncio
+import datetime
+import math
+import time
+from typing import Callable, Dict, Optional
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.database import get_db, insert_ignore
+from app.models.heartbeat import ReplicaHeartbeat
+
+# Set on responses to a client's writes; holds the time until which its reads go to the primary
+STICKY_COOKIE = "rm_read_primary_until"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+HEARTBEAT_ID = 1
+
+
+def _timestamp(value: datetime.datetime) -> float:
+    return value.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+def write_heartbeat(db: Session, now: float) -> None:
+    """Touch the heartbeat row on the primary."""
+    beat_at = datetime.datetime.fromtimestamp(now, datetime.timezone.utc).replace(tzinfo=None)
+    if not db.query(ReplicaHeartbeat).filter(ReplicaHeartbeat.id == HEARTBEAT_ID).update({"beat_at": beat_at}):
+        insert_ignore(db, ReplicaHeartbeat, [{"id": HEARTBEAT_ID, "beat_at": beat_at}], key=("id",))
+    db.commit()
+
+
+class ReplicaRouter:
+    """Chooses the database a read-only request handler reads from.
+
+    Reads go to the replica unless it is more than `max_lag_seconds` behind
+    the primary, measured by the age of the heartbeat row the primary keeps
+    writing, or the client wrote something in the last `sticky_seconds`
+    (read-your-writes). Writes always go to the primary through get_db.
+
+    A client is recognised by a cookie set on its write responses, which
+    holds across API workers, and by its bearer token within this worker
+    for clients that don't keep cookies.
+    """
+
+    def __init__(
+        self,
+        primary: sessionmaker,
+        replica: Optional[sessionmaker] = None,
+        max_lag_seconds: float = 5.0,
+        sticky_seconds: float = 10.0,
+        heartbeat_interval: float = 1.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.clock = clock
+        self._lag = math.inf
+        self._lag_checked_at = -math.inf
+        self._lagging = False
+        self._writers: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        # Counters
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    def replica_lag(self) -> float:
+        """Seconds the replica is behind, checked at most once per heartbeat interval."""
+        now = self.clock()
+        if now - self._lag_checked_at < self.heartbeat_interval:
+            return self._lag
+        self._lag_checked_at = now
+
+        db = self.replica()
+        try:
+            beat_at = db.query(ReplicaHeartbeat.beat_at).filter(ReplicaHeartbeat.id == HEARTBEAT_ID).scalar()
+        except Exception as e:
+            print(f"[Replicas] Lag check failed: {e}")
+            beat_at = None
+        finally:
+            db.close()
+        self._lag = math.inf if beat_at is None else max(0.0, now - _timestamp(beat_at))
+
+        lagging = self._lag > self.max_lag_seconds
+        if lagging != self._lagging:
+            self._lagging = lagging
+            if lagging:
+                print(f"[Replicas] Replica {self._lag:.1f}s behind, reading from the primary")
+            else:
+                print("[Replicas] Replica caught up, reading from it again")
+        return self._lag
+
+    def _client_key(self, request: Request) -> Optional[str]:
+        return request.headers.get("authorization")
+
+    def is_sticky(self, request: Request) -> bool:
+        """Whether the client wrote recently enough that the replica may not have it yet."""
+        now = self.clock()
+        try:
+            if float(request.cookies.get(STICKY_COOKIE, 0)) > now:
+                return True
+        except ValueError:
+            pass
+        key = self._client_key(request)
+        return key is not None and self._writers.get(key, 0) > now
+
+    def use_replica(self, request: Optional[Request] = None) -> bool:
+        """Whether this request may read from the replica."""
+        if (
+            self.replica is not None
+            and not (request is not None and self.is_sticky(request))
+            and self.replica_lag() <= self.max_lag_seconds
+        ):
+            self.replica_reads += 1
+            return True
+        self.primary_reads += 1
+        return False
+
+    def record_write(self, request: Request, response) -> None:
+        """Keep the client's reads on the primary after it changed something."""
+        if self.replica is None or request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        now = self.clock()
+        until = now + self.sticky_seconds
+        key = self._client_key(request)
+        if key is not None:
+            if len(self._writers) > 10_000:
+                self._writers = {client: expires for client, expires in self._writers.items() if expires > now}
+            self._writers[key] = until
+        response.set_cookie(
+            STICKY_COOKIE,
+            f"{until:.3f}",
+            max_age=math.ceil(self.sticky_seconds),
+            httponly=True,
+            samesite="lax",
+        )
+
+    async def _beat(self) -> None:
+        while True:
+            db = self.primary()
+            try:
+                await asyncio.to_thread(write_heartbeat, db, self.clock())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Replicas] Heartbeat failed: {e}")
+            finally:
+                db.close()
+            await asyncio.sleep(self.heartbeat_interval)
+
+    async def start(self) -> None:
+        """Start writing the heartbeat on the primary."""
+        if self._task is None and self.replica is not None:
+            self._task = asyncio.create_task(self._beat())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+
+def _create_replica_router() -> ReplicaRouter:
+    from app.core.config import get_settings
+    from app.core.database import ReplicaSessionLocal, SessionLocal
+    settings = get_settings()
+
+    return ReplicaRouter(
+        primary=SessionLocal,
+        replica=ReplicaSessionLocal,
+        max_lag_seconds=settings.DATABASE_REPLICA_MAX_LAG_SECONDS,
+        sticky_seconds=settings.DATABASE_STICKY_SECONDS,
+        heartbeat_interval=settings.DATABASE_HEARTBEAT_INTERVAL,
+    )
+
+
+# Global router; without DATABASE_REPLICA_URL every read goes to the primary
+replica_router = _create_replica_router()
+
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Session for read-only handlers: the replica when ReplicaRouter allows,
+    otherwise the request's primary session."""
+    if not replica_router.use_replica(request):
+        yield db
+        return
+    replica = replica_router.replica()
+    try:
+        yield replica
+    finally:
+        replica.close()
+
+
+async def read_your_writes(request: Request, call_next):
+    """HTTP middleware marking clients that wrote as sticky to the primary."""
+    response = await call_next(request)
+    replica_router.record_write(request, response)
+    return response
@@ -0,0 +1,118 @@
+import re
+from typing import NamedTuple
+
+# Sortable version keys
+#
+# A key is a string whose plain byte order is the version order, so the
+# database can sort and range-scan it through an ordinary index. Release
+# numbers are written as a length digit followed by the digits ("12" ->
+# "212"), so 2 < 10 holds; trailing zeros are dropped, so 1.0 == 1.0.0.
+# Pre-, post- and dev-release segments follow as one marker character plus
+# their numbers, and a final-release marker ends keys that don't finish
+# in a dev segment:
+#
+#   1.0.dev1 < 1.0a1.dev1 < 1.0a1 < 1.0a1.post1 < 1.0b1 < 1.0rc1 < 1.0 < 1.0.post1 < 1.0.1
+#
+# Keys only use digits, "(" through "." and uppercase letters (length
+# digits past 9), so they sort the same under case-insensitive collations.
+DEV = "("
+ALPHA = ")"
+BETA = "*"
+RC = "+"
+FINAL = "-"
+POST = "."
+
+PRERELEASE_MARKERS = {DEV, ALPHA, BETA, RC}
+
+LABELS = {
+    "dev": DEV, "snapshot": DEV, "nightly": DEV, "canary": DEV, "next": DEV, "insiders": DEV,
+    "a": ALPHA, "alpha": ALPHA,
+    "b": BETA, "beta": BETA,
+    "c": RC, "rc": RC, "pre": RC, "preview": RC,
+    "post": POST, "rev": POST, "r": POST, "patch": POST,
+    # Markers of a final release, as in Maven's 1.0.0.Final
+    "final": FINAL, "ga": FINAL, "release": FINAL, "stable": FINAL,
+}
+
+MAX_RELEASE_PARTS = 8
+MAX_NUMBER_DIGITS = 18
+KEY_LENGTH = 120
+
+RELEASE = re.compile(r"\d+(?:\.\d+)*")
+TOKENS = re.compile(r"[a-z]+|\d+")
+
+
+class ParsedVersion(NamedTuple):
+    prerelease: bool
+    key: str  # Sortable key; "" for strings without a version number, which sort first
+
+
+def _number(digits: str) -> str:
+    digits = digits.lstrip("0")[:MAX_NUMBER_DIGITS] or "0"
+    return chr(48 + len(digits)) + digits
+
+
+# Most version numbers are small: look them up instead of encoding them
+NUMBERS = {str(i): _number(str(i)) for i in range(1000)}
+
+
+def _release_key(parts: list) -> str:
+    if len(parts) > MAX_RELEASE_PARTS:
+        del parts[MAX_RELEASE_PARTS:]
+    while len(parts) > 1 and not parts[-1].strip("0"):
+        parts.pop()
+    return "".join([NUMBERS.get(part) or _number(part) for part in parts])
+
+
+def parse_version(version: str) -> ParsedVersion:
+    """Parse a semver, PEP 440 or calendar version, or a tag holding one.
+
+    Tag prefixes ("v1.2.0", "release-1.2.0", "pkg@1.2.0") and build
+    metadata ("+build.5") are ignored. Unknown labels after the release
+    number ("1.2.0-hotfix") are treated as pre-releases, as in semver.
+    """
+    text = version.strip().lower()
+    # Fast path for plain "1.2.3" and "v1.2.3"
+    plain = text[1:] if text[:1] == "v" else text
+    digits = plain.replace(".", "")
+    if digits.isdigit() and digits.isascii():
+        parts = plain.split(".")
+        if "" not in parts:
+            return ParsedVersion(False, _release_key(parts) + FINAL)
+
+    text = text.partition("+")[0]
+    text = text.rpartition("@")[2]
+    release = RELEASE.search(text)
+    if not release:
+        return ParsedVersion(any(LABELS.get(token) in PRERELEASE_MARKERS for token in TOKENS.findall(text)), "")
+
+    parts = release.group().split(".")
+    key = [_release_key(parts)]
+    marker = None
+    prerelease = False
+    for token in TOKENS.findall(text[release.end():]):
+        if token.isdigit():
+            if marker is None:
+                # "1.0.0-1": a numeric semver pre-release
+                marker = DEV
+                key.append(DEV)
+                prerelease = True
+            key.append(NUMBERS.get(token) or _number(token))
+            continue
+        marker = LABELS.get(token, DEV)
+        if marker == FINAL:
+            marker = None
+            continue
+        key.append(marker)
+        prerelease = prerelease or marker in PRERELEASE_MARKERS
+    if marker != DEV:
+        key.append(FINAL)
+    return ParsedVersion(prerelease, "".join(key)[:KEY_LENGTH])
+
+
+def version_key(version: str) -> str:
+    return parse_version(version).key
+
+
+def is_prerelease(version: str) -> bool:
+    return parse_version(version).prerelease
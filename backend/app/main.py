@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import get_settings
 from app.api import auth_router, projects_router, releases_router, subscriptions_router
@@ -7,7 +8,11 @@ from app.api.webhooks import router as webhooks_router
 from app.api.feeds import router as feeds_router
 from app.api.categories import router as categories_router
 from app.api.teams import router as teams_router
+from app.api.stream import router as stream_router
 from app.core.database import engine
+from app.core.instrumentation import MetricsMiddleware
+from app.core.metrics import REGISTRY
+from app.core.replicas import read_your_writes
 
 settings = get_settings()
 
@@ -28,6 +33,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Keeps a client's reads on the primary right after its own writes
+app.middleware("http")(read_your_writes)
+
+# Request latency and database work per route, served at /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth_router, prefix="/api")
 app.include_router(projects_router, prefix="/api")
@@ -38,18 +49,77 @@ app.include_router(webhooks_router, prefix="/api")
 app.include_router(feeds_router, prefix="/api")
 app.include_router(categories_router, prefix="/api")
 app.include_router(teams_router, prefix="/api")
+app.include_router(stream_router, prefix="/api")
 
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup."""
-    from app.core.database import Base
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
+    if settings.DATABASE_MIGRATE_ON_STARTUP:
+        from app.core.migrations import migrate
+        migrate(engine)
     
     from app.services.email import init_email_service, email_service
     init_email_service()
     print(f"[Startup] Email service: {'Enabled' if email_service.is_configured() else 'Disabled (no SMTP config)'}")
+    
+    from app.core.replicas import replica_router
+    await replica_router.start()
+    
+    from app.services.events import event_hub
+    await event_hub.start()
+    
+    from app.core.database import SessionLocal
+    from app.services.routing import routing_index
+    db = SessionLocal()
+    try:
+        routing_index.load(db)
+    finally:
+        db.close()
+    
+    if settings.OUTBOX_ENABLED:
+        from app.services.outbox import outbox_dispatcher
+        await outbox_dispatcher.start()
+    
+    if settings.SUMMARIES_ENABLED:
+        from app.services.summaries import summary_stage
+        await summary_stage.start()
+    
+    if settings.CHANGELOG_HTML_ENABLED:
+        from app.services.changelog_html import changelog_renderer
+        await changelog_renderer.start()
+    
+    if settings.PROJECT_STATS_RECONCILE_ENABLED:
+        from app.services.project_stats import project_stats_reconciler
+        await project_stats_reconciler.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release long-lived connections on shutdown."""
+    from app.services.outbox import outbox_dispatcher
+    await outbox_dispatcher.stop()
+    
+    from app.services.summaries import summary_stage
+    await summary_stage.stop()
+    
+    from app.services.changelog_html import changelog_renderer
+    await changelog_renderer.stop()
+    
+    from app.services.project_stats import project_stats_reconciler
+    await project_stats_reconciler.stop()
+    
+    from app.services.fanout import webhook_client
+    await webhook_client.close()
+    
+    from app.services.email import email_service
+    await email_service.close()
+    
+    from app.services.events import event_hub
+    await event_hub.stop()
+    
+    from app.core.replicas import replica_router
+    await replica_router.stop()
 
 
 @app.get("/health")
@@ -57,6 +127,12 @@ def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """This worker's metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 @app.get("/")
 def root():
     return {
@@ -1,9 +1,11 @@
 from app.core.database import Base
 from app.models.user import User
 from app.models.project import Project
-from app.models.release import Release, ReleaseAsset
+from app.models.release import Release, ReleaseAsset, ChangelogBlob, ChangelogSummary, ChangelogHtml
 from app.models.subscription import Subscription
 from app.models.webhook import WebhookSubscription
 from app.models.category import Category, ProjectCategory
 from app.models.team import Team, TeamMember, TeamProject
 from app.models.dependency import Dependency, SecurityAdvisory, DependencySecurityCheck
+from app.models.notification import NotificationOutbox, DeliveryRecord
+from app.models.heartbeat import ReplicaHeartbeat
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, DateTime
+from app.core.database import Base
+
+
+class ReplicaHeartbeat(Base):
+    """A single row the primary keeps touching.
+
+    Replicas receive it through replication like any other write, so how
+    old it is on a replica is how far the replica is behind.
+    """
+    __tablename__ = "replica_heartbeat"
+    
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(DateTime, nullable=False)
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, String, Boolean, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+import datetime
+
+
+class NotificationOutbox(Base):
+    """A notification waiting to be delivered to one destination.
+
+    Rows are written in the same transaction as the release that caused
+    them and drained asynchronously by the outbox dispatcher.
+    """
+
+    __tablename__ = "notification_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    release_id = Column(Integer, ForeignKey("releases.id"), nullable=False)
+
+    # Where to deliver
+    channel = Column(String(20), nullable=False)  # mattermost, webhook (generic JSON), email
+    destination = Column(String(500), nullable=False)  # Webhook URL or email address
+    variant = Column(String(100), nullable=True)  # Mattermost channel override, or recipient name for email
+    webhook_subscription_id = Column(Integer, ForeignKey("webhook_subscriptions.id"), nullable=True)
+    subscription_id = Column(Integer, ForeignKey("subscriptions.id"), nullable=True)
+    coalesce = Column(Boolean, default=False, nullable=False)  # Held for the subscriber's window, sent as a digest
+
+    # Delivery state
+    status = Column(String(20), default="pending", nullable=False)  # pending, sending, delivered, dead
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+    last_error = Column(Text, nullable=True)
+    delivered_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    # Relationships
+    release = relationship("Release", back_populates="notifications")
+
+    __table_args__ = (
+        # Claim query: due rows by status
+        Index("ix_notification_outbox_due", "status", "next_attempt_at"),
+        # Digest query: everything still held for one destination
+        Index("ix_notification_outbox_destination", "destination", "status"),
+    )
+
+
+class DeliveryRecord(Base):
+    """A notification that reached its destination.
+
+    One row per (release, channel, destination), written in the same
+    transaction that marks the outbox rows delivered, so a retry or replay
+    can tell what already went out.
+    """
+
+    __tablename__ = "delivery_ledger"
+
+    id = Column(Integer, primary_key=True, index=True)
+    release_id = Column(Integer, ForeignKey("releases.id"), nullable=False)
+    channel = Column(String(20), nullable=False)
+    destination = Column(String(600), nullable=False)  # Includes the Mattermost channel override
+    delivered_at = Column(DateTime, default=datetime.datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("release_id", "channel", "destination", name="uq_delivery_ledger_key"),
+    )
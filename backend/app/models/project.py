@@ -1,5 +1,7 @@
 from sqlalchemy import Column, Integer, String, Text, Enum, DateTime
+from sqlalchemy.orm import relationship
 from app.core.database import Base
+from app.core.versions import KEY_LENGTH
 import datetime
 import enum
 
@@ -25,5 +27,21 @@ class Project(Base):
     description = Column(Text, nullable=True)
     avatar_url = Column(String(500), nullable=True)
     last_checked_at = Column(DateTime, nullable=True)
+    
+    # Release stats, kept current by the fetcher and repaired by app.services.project_stats
+    latest_release_id = Column(Integer, nullable=True)  # Highest stable version
+    latest_version = Column(String(100), nullable=True)
+    latest_version_key = Column(String(KEY_LENGTH), nullable=True)
+    release_count = Column(Integer, nullable=False, default=0, server_default="0")
+    last_release_at = Column(DateTime, nullable=True)  # Newest release (or insert) date
+    
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    
+    # Relationships
+    releases = relationship("Release", back_populates="project", cascade="all, delete-orphan")
+    subscriptions = relationship("Subscription", back_populates="project", cascade="all, delete-orphan")
+    webhook_subscriptions = relationship("WebhookSubscription", back_populates="project", cascade="all, delete-orphan")
+    project_categories = relationship("ProjectCategory", back_populates="project", cascade="all, delete-orphan")
+    team_projects = relationship("TeamProject", back_populates="project", cascade="all, delete-orphan")
+    dependencies = relationship("Dependency", back_populates="project", cascade="all, delete-orphan")
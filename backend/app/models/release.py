@@ -1,8 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
-from app.core.database import Base
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, JSON, LargeBinary, Index, event
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, relationship, validates
+from app.core.compression import changelog_hash, compress_text, decompress_text
+from app.core.versions import KEY_LENGTH, version_key
+from app.core.database import Base, insert_ignore
+from typing import Optional
 import datetime
 
+CHANGELOG_EXCERPT_LENGTH = 500
+
 
 class Release(Base):
     __tablename__ = "releases"
@@ -10,17 +16,70 @@ class Release(Base):
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     version = Column(String(100), nullable=False)
+    version_key = Column(String(KEY_LENGTH), nullable=True)  # Sorts in version order; set from version
     release_date = Column(DateTime, nullable=True)
-    changelog = Column(Text, nullable=True)
+    # Changelog text is kept once per distinct text, compressed, in
+    # ChangelogBlob; `changelog` reads and writes it. The inline column only
+    # holds changelogs stored before that, until migrated.
+    changelog_inline = Column("changelog", Text, nullable=True)
+    changelog_excerpt = Column(String(CHANGELOG_EXCERPT_LENGTH), nullable=True)  # For lists and feeds
+    changelog_sha256 = Column(String(64), nullable=True, index=True)  # Key of its ChangelogBlob and ChangelogSummary
     changelog_url = Column(String(500), nullable=True)
     tag_name = Column(String(255), nullable=True)
     draft = Column(Boolean, default=False)
     prerelease = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)  # Insert time, not release order
+    
+    __table_args__ = (
+        # Latest (stable) release of a project: one index seek
+        Index("ix_releases_project_latest", "project_id", "prerelease", "version_key"),
+        # Ingest dedupe; also stops concurrent fetches storing a version twice
+        Index("uq_releases_project_version", "project_id", "version", unique=True),
+        # Feeds: a project's (or subscribed projects') releases since a cutoff, newest first
+        Index("ix_releases_project_created", "project_id", "created_at"),
+        # Unfiltered release list, newest first
+        Index("ix_releases_created", "created_at"),
+    )
     
     # Relationship
     project = relationship("Project", back_populates="releases")
-    assets = relationship("ReleaseAsset", back_populates="release")
+    assets = relationship("ReleaseAsset", back_populates="release", cascade="all, delete-orphan")
+    notifications = relationship("NotificationOutbox", back_populates="release", cascade="all, delete-orphan")
+    changelog_blob = relationship(
+        "ChangelogBlob",
+        primaryjoin="foreign(Release.changelog_sha256) == ChangelogBlob.content_hash",
+        viewonly=True,
+    )
+    
+    @validates("version")
+    def _set_version_key(self, key, version):
+        self.version_key = version_key(version) if version is not None else None
+        return version
+    
+    @property
+    def changelog(self) -> Optional[str]:
+        """Full changelog text, decompressed on first access."""
+        if "_changelog" not in self.__dict__:
+            blob = self.changelog_blob if self.changelog_sha256 else None
+            self.__dict__["_changelog"] = blob.text if blob is not None else self.changelog_inline
+        return self.__dict__["_changelog"]
+    
+    @changelog.setter
+    def changelog(self, text: Optional[str]) -> None:
+        text = text or None
+        self.__dict__["_changelog"] = text
+        # Written to ChangelogBlob when the release is flushed
+        self.__dict__["_changelog_unsaved"] = text
+        self.changelog_sha256 = changelog_hash(text)
+        self.changelog_excerpt = text[:CHANGELOG_EXCERPT_LENGTH] if text else None
+        self.changelog_inline = None
+    
+    @property
+    def excerpt(self) -> Optional[str]:
+        """Start of the changelog, without reading the full text."""
+        if self.changelog_excerpt is not None or not self.changelog_inline:
+            return self.changelog_excerpt
+        return self.changelog_inline[:CHANGELOG_EXCERPT_LENGTH]
 
 
 class ReleaseAsset(Base):
@@ -36,3 +95,86 @@ class ReleaseAsset(Base):
     
     # Relationship
     release = relationship("Release", back_populates="assets")
+
+
+class ChangelogBlob(Base):
+    """Compressed changelog text, stored once however many releases share it."""
+    __tablename__ = "changelog_blobs"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uncompressed text
+    codec = Column(String(10), nullable=False)  # zlib or zstd
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # Uncompressed bytes
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    
+    @property
+    def text(self) -> str:
+        return decompress_text(self.codec, self.data)
+
+
+def changelog_blob_row(text: str, codec: str) -> dict:
+    """Values for a ChangelogBlob holding `text`."""
+    used, data = compress_text(text, codec)
+    return {
+        "content_hash": changelog_hash(text),
+        "codec": used,
+        "data": data,
+        "size": len(text.encode("utf-8")),
+    }
+
+
+@event.listens_for(Session, "before_flush")
+def _store_changelog_blobs(session, flush_context, instances):
+    """Write blobs for changelogs set on releases in this flush."""
+    texts = {}
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Release):
+            text = obj.__dict__.pop("_changelog_unsaved", None)
+            if text:
+                texts.setdefault(obj.changelog_sha256, text)
+    if texts:
+        from app.core.config import get_settings
+        codec = get_settings().CHANGELOG_COMPRESSION
+        # Identical text may already be stored for another release. The
+        # savepoint keeps a conflict with another writer's copy from
+        # failing the releases; they point at that copy instead. It is on
+        # the connection, as rolling back a Session savepoint mid-flush
+        # would expunge the releases being inserted.
+        try:
+            with session.connection().begin_nested():
+                insert_ignore(session, ChangelogBlob, [changelog_blob_row(text, codec) for text in texts.values()], key=("content_hash",))
+        except IntegrityError:
+            pass
+
+
+class ChangelogSummary(Base):
+    """Summary of a changelog text, shared by every release with that text.
+
+    Changelogs don't change after ingest, and forks and monorepo packages
+    often publish identical ones, so summaries are keyed by the SHA-256 of
+    the text rather than by release.
+    """
+    __tablename__ = "changelog_summaries"
+    
+    content_hash = Column(String(64), primary_key=True)
+    summary = Column(Text, nullable=True)
+    breaking = Column(JSON, nullable=False, default=list)
+    features = Column(JSON, nullable=False, default=list)
+    fixes = Column(JSON, nullable=False, default=list)
+    security = Column(JSON, nullable=False, default=list)
+    source = Column(String(20), nullable=False)  # ai, or extract for the local fallback
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+
+class ChangelogHtml(Base):
+    """Sanitized HTML rendering of a changelog text, keyed like ChangelogSummary.
+
+    `renderer_version` records the renderer that produced it; rows from an
+    older one are re-rendered in the background.
+    """
+    __tablename__ = "changelog_html"
+    
+    content_hash = Column(String(64), primary_key=True)
+    html = Column(Text, nullable=False)
+    renderer_version = Column(Integer, nullable=False, index=True)
+    rendered_at = Column(DateTime, default=datetime.datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import datetime
@@ -12,9 +12,18 @@ class Subscription(Base):
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     notify_email = Column(Boolean, default=True)
     notify_webhook = Column(Boolean, default=False)
+    notify_digest = Column(Boolean, default=False)  # Include in the weekly digest email
     webhook_url = Column(String(500), nullable=True)
+    coalesce_seconds = Column(Integer, default=0)  # Merge releases arriving within this window into one digest
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     
+    __table_args__ = (
+        # A user's subscriptions, and the already-subscribed check
+        Index("uq_subscriptions_user_project", "user_id", "project_id", unique=True),
+        # Subscribers of a project
+        Index("ix_subscriptions_project", "project_id"),
+    )
+    
     # Relationships
     user = relationship("User", back_populates="subscriptions")
     project = relationship("Project", back_populates="subscriptions")
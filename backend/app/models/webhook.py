@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 import datetime
@@ -17,21 +17,33 @@ class WebhookSubscription(Base):
     webhook_url = Column(String(500), nullable=False)
     webhook_secret = Column(String(255), nullable=True)
     channel = Column(String(100), nullable=True)
+    format = Column(String(20), default="mattermost")  # mattermost, or json for signed generic JSON
     
     # Notification settings
     notify_releases = Column(Boolean, default=True)
     notify_prereleases = Column(Boolean, default=False)
     notify_security = Column(Boolean, default=True)
+    coalesce_seconds = Column(Integer, default=0)  # Merge releases arriving within this window into one digest
     
     # Delivery tracking
     is_active = Column(Boolean, default=True)
     last_delivery_at = Column(DateTime, nullable=True)
     last_status_code = Column(Integer, nullable=True)
-    failure_count = Column(Integer, default=0)
+    failure_count = Column(Integer, default=0)  # Consecutive failed deliveries
+    success_count = Column(Integer, default=0)
+    latency_ms = Column(Float, nullable=True)  # Moving average of successful deliveries
+    disabled_at = Column(DateTime, nullable=True)  # Set when disabled for failing too often
     
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
     
+    __table_args__ = (
+        # Active webhooks of a project, when routing a release
+        Index("ix_webhook_subscriptions_project_active", "project_id", "is_active"),
+        # A user's webhooks
+        Index("ix_webhook_subscriptions_user", "user_id", "project_id"),
+    )
+    
     # Relationships
     project = relationship("Project", back_populates="webhook_subscriptions")
     user = relationship("User", back_populates="webhook_subscriptions")
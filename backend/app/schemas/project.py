@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from app.models.project import ReleaseSource
 
@@ -21,11 +21,34 @@ class ProjectResponse(ProjectBase):
     external_id: Optional[str] = None
     last_checked_at: Optional[datetime] = None
     created_at: datetime
+    latest_release_id: Optional[int] = None
+    latest_version: Optional[str] = None
+    release_count: int = 0
+    last_release_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
 
+class ProjectReleaseSummary(BaseModel):
+    id: int
+    version: str
+    tag_name: Optional[str] = None
+    release_date: Optional[datetime] = None
+    prerelease: bool = False
+    changelog: Optional[str] = None  # Excerpt
+
+
+class ProjectCategorySummary(BaseModel):
+    id: int
+    name: str
+    slug: str
+    color: Optional[str] = None
+    icon: Optional[str] = None
+
+
 class ProjectWithReleases(ProjectResponse):
-    recent_releases: list = []
+    recent_releases: List[ProjectReleaseSummary] = []
     is_subscribed: bool = False
+    subscriber_count: int = 0
+    categories: List[ProjectCategorySummary] = []
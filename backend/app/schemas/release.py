@@ -14,6 +14,15 @@ class ReleaseAssetResponse(BaseModel):
         from_attributes = True
 
 
+class ChangelogSummaryResponse(BaseModel):
+    summary: Optional[str] = None
+    breaking: list[str] = []
+    features: list[str] = []
+    fixes: list[str] = []
+    security: list[str] = []
+    source: str
+
+
 class ReleaseResponse(BaseModel):
     id: int
     project_id: int
@@ -26,6 +35,8 @@ class ReleaseResponse(BaseModel):
     prerelease: bool = False
     created_at: datetime
     assets: list[ReleaseAssetResponse] = []
+    summary: Optional[ChangelogSummaryResponse] = None  # Until it has been computed, None
+    changelog_html: Optional[str] = None  # Sanitized HTML, only with format=html
     
     class Config:
         from_attributes = True
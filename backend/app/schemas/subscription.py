@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
 
@@ -7,7 +7,9 @@ class SubscriptionBase(BaseModel):
     project_id: int
     notify_email: bool = True
     notify_webhook: bool = False
+    notify_digest: bool = False
     webhook_url: Optional[str] = None
+    coalesce_seconds: int = Field(0, ge=0, le=86400)
 
 
 class SubscriptionCreate(SubscriptionBase):
@@ -28,4 +30,6 @@ class SubscriptionResponse(SubscriptionBase):
 class SubscriptionUpdate(BaseModel):
     notify_email: Optional[bool] = None
     notify_webhook: Optional[bool] = None
+    notify_digest: Optional[bool] = None
     webhook_url: Optional[str] = None
+    coalesce_seconds: Optional[int] = Field(None, ge=0, le=86400)
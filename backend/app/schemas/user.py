@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
@@ -14,9 +14,17 @@ class UserCreate(UserBase):
     password: str
 
 
+class UserUpdate(BaseModel):
+    # None only means "not sent"; names cannot be cleared
+    first_name: str = Field(None, min_length=1)
+    last_name: str = Field(None, min_length=1)
+    digest_hour: Optional[int] = Field(None, ge=0, le=23)
+
+
 class UserResponse(UserBase):
     id: int
     is_active: bool
+    digest_hour: Optional[int] = None
     created_at: datetime
     
     class Config:
@@ -1,26 +1,33 @@
-from pydantic import BaseModel, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Literal, Optional
 from datetime import datetime
 
 
+WebhookFormat = Literal["mattermost", "json"]
+
+
 class WebhookBase(BaseModel):
     project_id: int
     webhook_url: HttpUrl
     channel: Optional[str] = None
+    format: WebhookFormat = "mattermost"
 
 
 class WebhookCreate(WebhookBase):
     notify_releases: bool = True
     notify_prereleases: bool = False
     notify_security: bool = True
+    coalesce_seconds: int = Field(0, ge=0, le=86400)
 
 
 class WebhookUpdate(BaseModel):
     webhook_url: Optional[HttpUrl] = None
     channel: Optional[str] = None
+    format: Optional[WebhookFormat] = None
     notify_releases: Optional[bool] = None
     notify_prereleases: Optional[bool] = None
     notify_security: Optional[bool] = None
+    coalesce_seconds: Optional[int] = Field(None, ge=0, le=86400)
     is_active: Optional[bool] = None
 
 
@@ -28,13 +35,18 @@ class WebhookResponse(WebhookBase):
     id: int
     user_id: int
     webhook_secret: Optional[str] = None
+    format: Optional[WebhookFormat] = "mattermost"
     notify_releases: bool
     notify_prereleases: bool
     notify_security: bool
+    coalesce_seconds: int = 0
     is_active: bool
     last_delivery_at: Optional[datetime] = None
     last_status_code: Optional[int] = None
     failure_count: int
+    success_count: int = 0
+    latency_ms: Optional[float] = None
+    disabled_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
     
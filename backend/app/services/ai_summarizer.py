@@ -1,5 +1,13 @@
-from typing import Optional
+from typing import Awaitable, Callable, List, Optional
 from dataclasses import dataclass
+from app.services.changelog_classifier import classify_changelog
+from app.services.summary_queue import (
+    ChangelogItem,
+    ChatProvider,
+    RateBudget,
+    SummaryQueue,
+    SummaryResult,
+)
 
 
 @dataclass
@@ -11,6 +19,13 @@ class SummarizationConfig:
     model: str = "gpt-3.5-turbo"
     max_length: int = 200  # Max summary length in words
     include_breaking: bool = True  # Highlight breaking changes
+    base_url: Optional[str] = None  # Compatible gateway instead of the provider's API
+    max_concurrency: int = 4  # Provider calls in flight at once
+    requests_per_minute: int = 60  # Provider rate limits
+    tokens_per_minute: int = 90_000
+    batch_tokens: int = 3000  # Small changelogs share a prompt up to this size
+    max_batch_items: int = 8
+    max_wait_seconds: float = 30  # Longer waits for budget use the local extractor
 
 
 class AISummarizer:
@@ -23,6 +38,7 @@ class AISummarizer:
     def __init__(self, config: Optional[SummarizationConfig] = None):
         self.config = config or SummarizationConfig()
         self._client = None
+        self._queue: Optional[SummaryQueue] = None
     
     def is_available(self) -> bool:
         """Check if AI summarization is available."""
@@ -32,6 +48,43 @@ class AISummarizer:
             return False
         return True
     
+    def queue(self) -> SummaryQueue:
+        """Batching provider queue, created on first use."""
+        if self._queue is None:
+            self._client = ChatProvider(
+                provider=self.config.provider,
+                api_key=self.config.api_key,
+                model=self.config.model,
+                base_url=self.config.base_url,
+            )
+            self._queue = SummaryQueue(
+                provider=self._client,
+                fallback=self._extract_summary,
+                budget=RateBudget(self.config.requests_per_minute, self.config.tokens_per_minute),
+                max_concurrency=self.config.max_concurrency,
+                batch_tokens=self.config.batch_tokens,
+                max_batch_items=self.config.max_batch_items,
+                max_wait_seconds=self.config.max_wait_seconds,
+                max_length=self.config.max_length,
+            )
+        return self._queue
+    
+    async def summarize_many(
+        self,
+        items: List[ChangelogItem],
+        on_batch: Optional[Callable[[List[SummaryResult]], Awaitable[None]]] = None,
+    ) -> List[SummaryResult]:
+        """Summarize many changelogs, batched into few provider calls.
+        
+        Without AI every item is summarized by the local extractor.
+        """
+        if not self.is_available():
+            results = [(item.key, self._extract_summary(item.changelog), "extract") for item in items]
+            if on_batch is not None and results:
+                await on_batch(results)
+            return results
+        return await self.queue().run(items, on_batch)
+    
     async def summarize_changelog(
         self,
         changelog: str,
@@ -57,32 +110,16 @@ class AISummarizer:
                 "error": "AI summarization is not enabled"
             }
         
-        # Import httpx only when needed (AI is optional)
-        import httpx
-        
-        # For now, return a simple extraction-based summary
-        # In production, this would call OpenAI/Anthropic API
-        return self._extract_summary(changelog)
+        [(_, data, _)] = await self.summarize_many([ChangelogItem(None, changelog, project_name, version)])
+        return {**data, "error": None}
     
     def _extract_summary(self, changelog: str) -> dict:
         """Extract summary from changelog without AI (fallback)."""
-        lines = changelog.split('\n') if changelog else []
-        
-        breaking = []
-        features = []
-        fixes = []
-        security = []
-        
-        for line in lines:
-            line_lower = line.lower()
-            if 'breaking' in line_lower or '### breaking':
-                breaking.append(line.strip('#- '))
-            elif 'feature' in line_lower or 'feat' in line_lower:
-                features.append(line.strip('#- '))
-            elif 'fix' in line_lower or 'bug' in line_lower or '### fix':
-                fixes.append(line.strip('#- '))
-            elif 'security' in line_lower or 'cve' in line_lower or 'vulnerability' in line_lower:
-                security.append(line.strip('#- '))
+        classified = classify_changelog(changelog)
+        breaking = classified.breaking
+        features = classified.features
+        fixes = classified.fixes
+        security = classified.security
         
         # Create a brief summary
         summary_parts = []
@@ -141,8 +178,27 @@ class AISummarizer:
         return "\n".join(lines)
 
 
+def _create_ai_summarizer() -> AISummarizer:
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return AISummarizer(SummarizationConfig(
+        enabled=settings.AI_ENABLED,
+        provider=settings.AI_PROVIDER,
+        api_key=settings.AI_API_KEY,
+        model=settings.AI_MODEL,
+        base_url=settings.AI_BASE_URL,
+        max_concurrency=settings.AI_MAX_CONCURRENCY,
+        requests_per_minute=settings.AI_REQUESTS_PER_MINUTE,
+        tokens_per_minute=settings.AI_TOKENS_PER_MINUTE,
+        batch_tokens=settings.AI_BATCH_TOKENS,
+        max_batch_items=settings.AI_MAX_BATCH_ITEMS,
+        max_wait_seconds=settings.AI_MAX_WAIT_SECONDS,
+    ))
+
+
 # Global instance
-ai_summarizer = AISummarizer()
+ai_summarizer = _create_ai_summarizer()
 
 
 async def summarize_release(
@@ -0,0 +1,102 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+@dataclass
+class Circuit:
+    """Breaker state of one destination."""
+    state: str = CLOSED
+    failures: int = 0  # Consecutive
+    open_until: float = 0.0
+    probing: bool = False
+
+
+class CircuitBreakers:
+    """Per-destination circuit breakers for outbound deliveries.
+
+    After `failure_threshold` consecutive failures a destination's circuit
+    opens: deliveries to it are held back for an exponentially growing,
+    jittered interval instead of occupying workers. Once the interval is
+    over the circuit is half-open and a single probe delivery is let
+    through. Its success closes the circuit; its failure opens it again
+    for longer.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 3,
+        base_seconds: float = 30,
+        max_seconds: float = 3600,
+        probe_interval: float = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self._circuits: Dict[str, Circuit] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> Optional[float]:
+        """Ask to deliver to `key`.
+
+        Returns None when the delivery may go ahead, otherwise the number of
+        seconds to hold it back.
+        """
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == CLOSED:
+                return None
+            now = self.clock()
+            if circuit.state == OPEN:
+                if now < circuit.open_until:
+                    return circuit.open_until - now
+                circuit.state = HALF_OPEN
+            if circuit.probing:
+                # Everything else waits for the probe's verdict
+                return self.probe_interval
+            circuit.probing = True
+            return None
+
+    def record(self, key: str, ok: bool) -> None:
+        """Report the outcome of a delivery started after `acquire`."""
+        with self._lock:
+            if ok:
+                self._circuits.pop(key, None)
+                return
+            circuit = self._circuits.setdefault(key, Circuit())
+            circuit.failures += 1
+            circuit.probing = False
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                trips = circuit.failures - self.failure_threshold
+                delay = min(self.max_seconds, self.base_seconds * (2 ** max(trips, 0)))
+                circuit.state = OPEN
+                circuit.open_until = self.clock() + delay / 2 + random.uniform(0, delay / 2)
+
+    def state(self, key: str) -> str:
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit.state if circuit else CLOSED
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Destinations whose circuit isn't closed, for the admin API."""
+        with self._lock:
+            now = self.clock()
+            return {
+                key: {
+                    "state": circuit.state,
+                    "failures": circuit.failures,
+                    "retry_in": max(0.0, round(circuit.open_until - now, 1)) if circuit.state == OPEN else 0.0,
+                }
+                for key, circuit in self._circuits.items()
+                if circuit.state != CLOSED
+            }
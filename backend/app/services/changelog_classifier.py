@@ -0,0 +1,134 @@
+import io
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+BREAKING = "breaking"
+FEATURES = "features"
+FIXES = "fixes"
+SECURITY = "security"
+
+# All patterns run on lowercased text: case-sensitive matching is several
+# times faster than re.IGNORECASE. The keyword patterns are only tried on
+# lines containing one of their words, which plain substring checks rule
+# out far faster than a regex scan.
+
+# "## Fixed", "### ⚠ BREAKING CHANGES", or a "Bug fixes:" line on its own
+HEADING = re.compile(r"#{1,6}\s*(?P<hashed>.*?)\s*#*$|(?P<colon>[a-z][a-z /&'-]{2,40}):$")
+# Keep-a-Changelog and release-note section names; the first match wins
+SECTIONS = [
+    (re.compile(r"contributor|thank|acknowledg|documentation|dependenc|chore"), None),
+    (re.compile(r"breaking|incompatib|removed|migration"), BREAKING),
+    (re.compile(r"security|vulnerab"), SECURITY),
+    (re.compile(r"feature|added|new\b|enhancement|improvement"), FEATURES),
+    (re.compile(r"fix|bug|patch|resolved"), FIXES),
+]
+# "## [1.2.0] - 2024-01-01", "## v1.2.0": a new release, no section yet
+VERSION_HEADING = re.compile(r"\[?v?\d+(?:\.\d+)+")
+ITEM = re.compile(r"(?:[-*+]|\d+[.)])\s+")
+# Conventional commits: "feat(api)!: ...", "**fix:** ..."
+CONVENTIONAL = re.compile(r"(?:\*\*)?(?P<type>[a-z]+)(?:\([^)]*\))?(?P<bang>!)?(?:\*\*)?:\s")
+CONVENTIONAL_TYPES = {"feat": FEATURES, "feature": FEATURES, "fix": FIXES, "bugfix": FIXES, "security": SECURITY}
+# Marks that override the section an entry is in
+NOTE_WORDS = ("breaking", "cve-", "ghsa-", "security", "vulnerab", "xss", "csrf")
+NOTES = re.compile(
+    r"(?P<breaking>breaking[ -]changes?\b|^breaking\b)"
+    r"|(?P<security>cve-\d{4}-\d|ghsa-|\bsecurity\b|vulnerab|\bxss\b|\bcsrf\b)"
+)
+# Last resort for entries outside a known section
+KEYWORD_WORDS = ("feat", "add", "new", "support", "fix", "bug", "resolve", "crash")
+KEYWORDS = re.compile(
+    r"(?P<features>\bfeat(?:ure)?s?\b|\badd(?:s|ed)?\b|\bnew\b|\bsupport(?:s|ed)? for\b)"
+    r"|(?P<fixes>\bfix(?:e[sd])?\b|\bbug\b|\bresolve[sd]?\b|\bcrash)"
+)
+
+
+@dataclass
+class ChangelogClassification:
+    """Changelog lines sorted into the summary categories."""
+    breaking: List[str] = field(default_factory=list)
+    features: List[str] = field(default_factory=list)
+    fixes: List[str] = field(default_factory=list)
+    security: List[str] = field(default_factory=list)
+    truncated: bool = False  # Stopped at the size cap
+
+
+def _search(pattern: re.Pattern, words: tuple, text: str) -> Optional[re.Match]:
+    for word in words:
+        if word in text:
+            return pattern.search(text)
+    return None
+
+
+def _section(title: str) -> Optional[str]:
+    if VERSION_HEADING.match(title):
+        return None
+    for pattern, category in SECTIONS:
+        if pattern.search(title):
+            return category
+    return None
+
+
+def classify_entry(text: str, section: Optional[str]) -> Optional[str]:
+    """Category of one lowercased entry, given the section it appears in."""
+    conventional = CONVENTIONAL.match(text)
+    if conventional and conventional.group("bang"):
+        return BREAKING
+    note = _search(NOTES, NOTE_WORDS, text)
+    if note:
+        return note.lastgroup
+    if section:
+        return section
+    if conventional:
+        return CONVENTIONAL_TYPES.get(conventional.group("type"))
+    keyword = _search(KEYWORDS, KEYWORD_WORDS, text)
+    return keyword.lastgroup if keyword else None
+
+
+def classify_changelog(changelog: Optional[str], max_chars: int = 256 * 1024) -> ChangelogClassification:
+    """Sort a changelog's entries into breaking changes, features, fixes and security.
+
+    One streaming pass over the lines, tracking the Keep-a-Changelog style
+    section they are under; list entries outside a known section are
+    classified by conventional-commit prefix or keywords, and prose only
+    when it is explicitly marked. Only the first `max_chars` characters are
+    read, so huge changelogs cost a bounded amount of work.
+    """
+    result = ChangelogClassification()
+    if not changelog:
+        return result
+    if len(changelog) > max_chars:
+        changelog = changelog[:max_chars]
+        result.truncated = True
+
+    section: Optional[str] = None
+    # Lowercasing never adds or removes newlines, so the lines stay paired
+    for line, lowered in zip(io.StringIO(changelog), io.StringIO(changelog.lower())):
+        stripped = lowered.strip()
+        if not stripped:
+            continue
+
+        first = stripped[0]
+        if first == "#" or stripped[-1] == ":":
+            heading = HEADING.match(stripped)
+            if heading:
+                title = heading.group("hashed")
+                section = _section(title if title is not None else heading.group("colon"))
+                continue
+
+        item = ITEM.match(stripped) if first in "-*+" or first.isdigit() else None
+        if item:
+            text = stripped[item.end():]
+        elif CONVENTIONAL.match(stripped) or _search(NOTES, NOTE_WORDS, stripped):
+            text = stripped
+        else:
+            continue
+
+        category = classify_entry(text, section)
+        if category is not None:
+            original = line.strip()
+            if item:
+                original = original[ITEM.match(original).end():]
+            getattr(result, category).append(original.strip("#- "))
+    return result
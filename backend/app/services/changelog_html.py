@@ -0,0 +1,324 @@
+import asyncio
+import datetime
+import html
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import bindparam, func, or_, update
+from sqlalchemy.orm import Session, sessionmaker
+import markdown
+from app.core.database import insert_ignore
+from app.models.release import ChangelogHtml, Release
+from app.core.compression import changelog_hash
+from app.services.changelog_store import load_changelogs
+
+# Bump whenever the markdown extensions or the sanitizer change what is
+# produced; stored renderings from older versions are then redone.
+RENDERER_VERSION = 1
+
+MARKDOWN_EXTENSIONS = ["fenced_code", "tables", "sane_lists"]
+
+ALLOWED_TAGS = {
+    "a", "abbr", "b", "blockquote", "br", "code", "dd", "del", "details", "dl", "dt",
+    "em", "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "img", "kbd", "li", "ol",
+    "p", "pre", "s", "strong", "sub", "summary", "sup", "table", "tbody", "td",
+    "th", "thead", "tr", "ul",
+}
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "abbr": {"title"},
+    "code": {"class"},
+    "img": {"src", "alt", "title"},
+    "ol": {"start"},
+}
+URL_ATTRIBUTES = {"href", "src"}
+URL_SCHEMES = {"http", "https", "mailto"}
+VOID_TAGS = {"br", "hr", "img"}
+# Removed together with everything inside them
+DROPPED_TAGS = {"script", "style", "iframe", "object", "embed", "noscript", "template", "textarea", "title"}
+
+# Control characters and whitespace browsers ignore inside a URL scheme
+URL_IGNORED = re.compile(r"[\x00-\x20\x7f]+")
+LANGUAGE_CLASS = re.compile(r"language-[\w+-]+")
+
+
+def _safe_url(url: str) -> bool:
+    url = URL_IGNORED.sub("", html.unescape(url)).lower()
+    scheme, colon, _ = url.partition(":")
+    # No colon, or one after the path starts: a relative URL
+    if not colon or any(char in scheme for char in "/?#"):
+        return True
+    return scheme in URL_SCHEMES
+
+
+class _Sanitizer(HTMLParser):
+    """Re-emits HTML keeping only allowlisted tags, attributes and URL schemes.
+
+    Everything else is dropped, and text is always re-escaped, so the output
+    is well-formed and safe to insert into a page.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out: List[str] = []
+        self.open: List[str] = []
+        self.dropping = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        kept = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            if name in URL_ATTRIBUTES and not _safe_url(value):
+                continue
+            if name == "class" and not LANGUAGE_CLASS.fullmatch(value):
+                continue
+            kept.append(f' {name}="{html.escape(value)}"')
+        if tag == "a":
+            kept.append(' rel="nofollow noopener noreferrer"')
+        self.out.append(f"<{tag}{''.join(kept)}>")
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag in DROPPED_TAGS:
+            self.dropping -= 1
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(0, self.dropping - 1)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        # Close anything left open inside it, too
+        while self.open:
+            closed = self.open.pop()
+            self.out.append(f"</{closed}>")
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.dropping:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self) -> str:
+        self.close()
+        self.out.extend(f"</{tag}>" for tag in reversed(self.open))
+        self.open = []
+        return "".join(self.out)
+
+
+def sanitize_html(markup: str) -> str:
+    """Strip everything but basic formatting, links and images from `markup`."""
+    sanitizer = _Sanitizer()
+    sanitizer.feed(markup)
+    return sanitizer.result()
+
+
+def render_html(changelog: str) -> str:
+    """Render changelog markdown to sanitized HTML."""
+    return sanitize_html(markdown.markdown(changelog, extensions=MARKDOWN_EXTENSIONS))
+
+
+def store_html(db: Session, rendered: Dict[str, str]) -> None:
+    """Save renderings by changelog hash, replacing ones from older renderers.
+
+    The caller commits.
+    """
+    if not rendered:
+        return
+    stale = {
+        content_hash
+        for content_hash, in db.query(ChangelogHtml.content_hash)
+        .filter(ChangelogHtml.content_hash.in_(rendered), ChangelogHtml.renderer_version < RENDERER_VERSION)
+    }
+    if stale:
+        table = ChangelogHtml.__table__
+        db.execute(
+            update(table)
+            .where(table.c.content_hash == bindparam("key"), table.c.renderer_version < RENDERER_VERSION)
+            .values(html=bindparam("html"), renderer_version=RENDERER_VERSION, rendered_at=datetime.datetime.utcnow()),
+            [{"key": content_hash, "html": rendered[content_hash]} for content_hash in stale],
+        )
+    # Another worker may have rendered the same text meanwhile
+    insert_ignore(db, ChangelogHtml, [
+        {"content_hash": content_hash, "html": markup, "renderer_version": RENDERER_VERSION}
+        for content_hash, markup in rendered.items()
+        if content_hash not in stale
+    ], key=("content_hash",))
+
+
+class ChangelogRenderer:
+    """Renders changelogs to sanitized HTML once and keeps the result.
+
+    Renderings are stored by changelog hash, like summaries. The API renders
+    on first view; a background stage, woken after ingest, renders new
+    changelogs ahead of time and redoes ones from an older RENDERER_VERSION.
+    Changelogs over `inline_chars` characters are rendered in a process pool
+    of `workers` processes, so they never hold up the event loop or the GIL.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        workers: int = 2,
+        inline_chars: int = 16 * 1024,
+        batch_size: int = 100,
+        poll_interval: float = 300,
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.inline_chars = inline_chars
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._pool: Optional[Executor] = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def pool(self) -> Optional[Executor]:
+        if self._pool is None and self.workers > 0:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def render(self, changelog: str) -> str:
+        """Render one changelog, in the pool if it is large."""
+        if len(changelog) <= self.inline_chars or self.pool() is None:
+            return render_html(changelog)
+        return self.pool().submit(render_html, changelog).result()
+
+    def get_html(self, db: Session, release: Release) -> Optional[str]:
+        """Sanitized HTML of a release's changelog, rendering and storing it if needed."""
+        if not release.changelog:
+            return None
+        content_hash = release.changelog_sha256 or changelog_hash(release.changelog)
+        row = db.query(ChangelogHtml).filter(ChangelogHtml.content_hash == content_hash).first()
+        if row is not None and row.renderer_version >= RENDERER_VERSION:
+            return row.html
+
+        markup = self.render(release.changelog)
+        store_html(db, {content_hash: markup})
+        db.commit()
+        return markup
+
+    def _pending(self) -> List[Tuple[str, str]]:
+        """(hash, changelog) of texts not rendered by the current renderer."""
+        db: Session = self.session_factory()
+        try:
+            first = (
+                db.query(func.min(Release.id))
+                .outerjoin(ChangelogHtml, ChangelogHtml.content_hash == Release.changelog_sha256)
+                .filter(
+                    Release.changelog_sha256.isnot(None),
+                    or_(ChangelogHtml.content_hash.is_(None), ChangelogHtml.renderer_version < RENDERER_VERSION),
+                )
+                .group_by(Release.changelog_sha256)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not first:
+                return []
+            hashes = [
+                content_hash
+                for content_hash, in db.query(Release.changelog_sha256)
+                .filter(Release.id.in_([release_id for release_id, in first]))
+            ]
+            return list(load_changelogs(db, hashes).items())
+        finally:
+            db.close()
+
+    def _store(self, rendered: Dict[str, str]) -> None:
+        db: Session = self.session_factory()
+        try:
+            store_html(db, rendered)
+            db.commit()
+        finally:
+            db.close()
+
+    async def _render_async(self, changelog: str) -> str:
+        if len(changelog) <= self.inline_chars or self.pool() is None:
+            return await asyncio.to_thread(render_html, changelog)
+        return await asyncio.get_running_loop().run_in_executor(self.pool(), render_html, changelog)
+
+    async def run(self) -> int:
+        """Render every changelog without a current rendering; returns how many.
+
+        Releases still lacking a changelog hash are left to the summary
+        stage's backfill, and rendered on view until then.
+        """
+        count = 0
+        while True:
+            pending = await asyncio.to_thread(self._pending)
+            if not pending:
+                return count
+            rendered = await asyncio.gather(*(self._render_async(changelog) for _, changelog in pending))
+            await asyncio.to_thread(
+                self._store,
+                {content_hash: markup for (content_hash, _), markup in zip(pending, rendered)},
+            )
+            count += len(pending)
+
+    def wake(self) -> None:
+        """Run soon; called after new releases are committed."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _poll(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                count = await self.run()
+                if count:
+                    print(f"[ChangelogHtml] Rendered {count} changelogs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ChangelogHtml] Run failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """Start the background stage."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self._wake = None
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+
+def _create_changelog_renderer() -> ChangelogRenderer:
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    settings = get_settings()
+
+    return ChangelogRenderer(
+        session_factory=SessionLocal,
+        workers=settings.CHANGELOG_HTML_WORKERS,
+        inline_chars=settings.CHANGELOG_HTML_INLINE_CHARS,
+        batch_size=settings.CHANGELOG_HTML_BATCH_SIZE,
+        poll_interval=settings.CHANGELOG_HTML_POLL_INTERVAL,
+    )
+
+
+# Global renderer; its background stage is started with the app
+changelog_renderer = _create_changelog_renderer()
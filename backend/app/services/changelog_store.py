@@ -0,0 +1,161 @@
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Query, Session, sessionmaker
+from app.core.compression import changelog_hash, decompress_text
+from app.core.database import insert_ignore
+from app.models.release import CHANGELOG_EXCERPT_LENGTH, ChangelogBlob, Release, changelog_blob_row
+
+
+def load_changelogs(db: Session, hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """Changelog texts by hash, from blobs or not yet migrated inline rows."""
+    hashes = {content_hash for content_hash in hashes if content_hash}
+    if not hashes:
+        return {}
+    texts = {
+        content_hash: decompress_text(codec, data)
+        for content_hash, codec, data in db.query(ChangelogBlob.content_hash, ChangelogBlob.codec, ChangelogBlob.data)
+        .filter(ChangelogBlob.content_hash.in_(hashes))
+    }
+    missing = hashes - texts.keys()
+    if missing:
+        for content_hash, text in (
+            db.query(Release.changelog_sha256, Release.changelog_inline)
+            .filter(Release.changelog_sha256.in_(missing), Release.changelog_inline.isnot(None))
+        ):
+            texts.setdefault(content_hash, text)
+    return texts
+
+
+def changelog_columns() -> tuple:
+    """Columns to select, on a query passed through `join_changelog_blobs`,
+    in place of the changelog; `with_changelog_text` turns them back into it."""
+    return (ChangelogBlob.codec, ChangelogBlob.data, Release.changelog_inline)
+
+
+def join_changelog_blobs(query: Query) -> Query:
+    return query.outerjoin(ChangelogBlob, ChangelogBlob.content_hash == Release.changelog_sha256)
+
+
+def with_changelog_text(rows: Iterable, index: int) -> Iterator[tuple]:
+    """Rows with the `changelog_columns` at `index` replaced by the changelog text."""
+    for row in rows:
+        codec, data, inline = row[index:index + 3]
+        text = decompress_text(codec, data) if data is not None else inline
+        yield (*row[:index], text, *row[index + 3:])
+
+
+def excerpt_column():
+    """The stored excerpt, or the start of a not yet migrated inline changelog."""
+    return func.coalesce(
+        Release.changelog_excerpt,
+        func.substr(Release.changelog_inline, 1, CHANGELOG_EXCERPT_LENGTH),
+    )
+
+
+@dataclass
+class MigrationStats:
+    releases: int = 0
+    blobs: int = 0  # Distinct texts newly stored
+    inline_bytes: int = 0  # Changelog text moved out of releases
+    stored_bytes: int = 0  # Compressed blobs plus excerpts written
+    seconds: float = 0.0
+
+    @property
+    def reduction(self) -> float:
+        """Fraction of the inline bytes saved."""
+        if not self.inline_bytes:
+            return 0.0
+        return 1 - self.stored_bytes / self.inline_bytes
+
+
+def migrate_inline_changelogs(
+    session_factory: sessionmaker,
+    batch_size: int = 1000,
+    codec: str = "zlib",
+) -> MigrationStats:
+    """Move changelogs stored inline on releases into ChangelogBlob.
+
+    Walks releases by primary key, one transaction per `batch_size` rows,
+    so memory stays flat and the migration can be stopped and rerun at
+    any point; migrated rows no longer match. Texts already stored as a
+    blob, by an earlier batch or by ingest, are not stored again.
+    """
+    stats = MigrationStats()
+    started = time.monotonic()
+    releases = Release.__table__
+    last_id = 0
+    while True:
+        db: Session = session_factory()
+        try:
+            rows = (
+                db.query(Release.id, Release.changelog_inline)
+                .filter(Release.id > last_id, Release.changelog_inline.isnot(None))
+                .order_by(Release.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                break
+
+            texts = {changelog_hash(text): text for _, text in rows if text}
+            existing = {
+                content_hash
+                for content_hash, in db.query(ChangelogBlob.content_hash)
+                .filter(ChangelogBlob.content_hash.in_(texts))
+            }
+            blobs = [changelog_blob_row(text, codec) for content_hash, text in texts.items() if content_hash not in existing]
+            insert_ignore(db, ChangelogBlob, blobs, key=("content_hash",))
+
+            values = [
+                {
+                    "release_id": release_id,
+                    "content_hash": changelog_hash(text),
+                    "excerpt": text[:CHANGELOG_EXCERPT_LENGTH] if text else None,
+                }
+                for release_id, text in rows
+            ]
+            db.execute(
+                update(releases)
+                .where(releases.c.id == bindparam("release_id"))
+                .values(
+                    changelog_sha256=bindparam("content_hash"),
+                    changelog_excerpt=bindparam("excerpt"),
+                    changelog=None,
+                ),
+                values,
+            )
+            db.commit()
+
+            stats.releases += len(rows)
+            stats.blobs += len(blobs)
+            stats.inline_bytes += sum(len(text.encode("utf-8")) for _, text in rows)
+            stats.stored_bytes += sum(len(blob["data"]) for blob in blobs) + sum(
+                len(value["excerpt"].encode("utf-8")) for value in values if value["excerpt"]
+            )
+            last_id = rows[-1][0]
+        finally:
+            db.close()
+    stats.seconds = time.monotonic() - started
+    return stats
+
+
+def format_stats(stats: MigrationStats) -> str:
+    return (
+        f"[Changelogs] Migrated {stats.releases} releases into {stats.blobs} blobs: "
+        f"{stats.inline_bytes / 1e6:.1f} MB inline -> {stats.stored_bytes / 1e6:.1f} MB stored "
+        f"({stats.reduction:.0%} smaller) in {stats.seconds:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    settings = get_settings()
+
+    print(format_stats(migrate_inline_changelogs(
+        SessionLocal,
+        batch_size=settings.CHANGELOG_MIGRATION_BATCH_SIZE,
+        codec=settings.CHANGELOG_COMPRESSION,
+    )))
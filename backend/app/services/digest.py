@@ -0,0 +1,282 @@
+import asyncio
+import datetime
+import time
+from dataclasses import dataclass
+from itertools import groupby
+from typing import List, Optional
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session, sessionmaker
+from app.models.project import Project
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+
+
+# Users are skipped while their last digest is younger than this; shorter
+# than a week so runs starting at slightly different times don't skip anyone
+RESEND_AFTER = datetime.timedelta(days=6)
+
+
+@dataclass
+class DigestStats:
+    """Outcome of one digest run."""
+    users: int = 0
+    releases: int = 0
+    sent: int = 0
+    failed: int = 0
+    complete: bool = True
+    seconds: float = 0.0
+
+
+def delivery_hour():
+    """Each user's digest hour (UTC): their preference, else spread by ID."""
+    return func.coalesce(User.digest_hour, User.id % 24)
+
+
+class WeeklyDigestJob:
+    """Computes and sends weekly digests, a page of users at a time.
+
+    Subscriptions that opted into the digest are joined with the week's
+    releases and read for `batch_size` users at once, ordered by user.
+    The page is read and its session closed before any mail goes out, so
+    slow SMTP never holds a connection or an open cursor. Rows are grouped
+    per user in memory, rendered (users following the same releases share
+    one render) and sent over the SMTP pool as one batch; the next page
+    continues after the last user ID.
+
+    A run covers one delivery-hour bucket, so an hourly schedule spreads the
+    week's mail over the day. Users are marked with `last_digest_at` once
+    their mail went out, which makes re-running a bucket safe; a run that
+    exceeds its time budget stops early and the next run picks up the rest.
+
+    Runs happen on their own event loop, so they can't use the shared SMTP
+    pool, which is bound to the app's. They open a pool of their own of
+    `smtp_pool_size` sessions and `smtp_rate_limit` messages per second,
+    which count against the relay's limits along with the shared pool's.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        email,
+        batch_size: int = 500,
+        time_budget_seconds: float = 600,
+        render_cache_size: int = 10000,
+        smtp_pool_size: int = 1,
+        smtp_rate_limit: float = 0,
+    ):
+        self.session_factory = session_factory
+        self.email = email
+        self.batch_size = batch_size
+        self.time_budget_seconds = time_budget_seconds
+        self.render_cache_size = render_cache_size
+        self.smtp_pool_size = smtp_pool_size
+        self.smtp_rate_limit = smtp_rate_limit
+        self.running = False
+
+    def due_users(self, db: Session, since: datetime.datetime, until: datetime.datetime, hour: Optional[int]):
+        """Users owed a digest: active, opted in for a project with releases in the window."""
+        has_releases = (
+            db.query(Subscription.id)
+            .join(Release, Release.project_id == Subscription.project_id)
+            .filter(
+                Subscription.user_id == User.id,
+                Subscription.notify_digest == True,
+                Release.created_at >= since,
+                Release.created_at < until,
+            )
+            .exists()
+        )
+        query = db.query(User.id).filter(
+            User.is_active == True,
+            # Already sent this week, by an earlier run for this bucket
+            or_(User.last_digest_at.is_(None), User.last_digest_at < until - RESEND_AFTER),
+            has_releases,
+        )
+        if hour is not None:
+            query = query.filter(delivery_hour() == hour)
+        return query
+
+    def page(
+        self,
+        db: Session,
+        since: datetime.datetime,
+        until: datetime.datetime,
+        hour: Optional[int],
+        after_user_id: int,
+    ) -> list:
+        """Digest rows of the next `batch_size` due users after `after_user_id`.
+
+        Users are walked by primary key, so each page costs the same however
+        far into the run it is.
+        """
+        user_ids = [
+            user_id for user_id, in self.due_users(db, since, until, hour)
+            .filter(User.id > after_user_id)
+            .order_by(User.id)
+            .limit(self.batch_size)
+        ]
+        if not user_ids:
+            return []
+        return (
+            db.query(
+                User.id,
+                User.email,
+                User.first_name,
+                Project.id,
+                Project.name,
+                Release.id,
+                Release.version,
+                Release.prerelease,
+                Release.release_date,
+            )
+            .select_from(Subscription)
+            .join(User, Subscription.user_id == User.id)
+            .join(Project, Subscription.project_id == Project.id)
+            .join(Release, Release.project_id == Subscription.project_id)
+            .filter(
+                Subscription.user_id.in_(user_ids),
+                Subscription.notify_digest == True,
+                Release.created_at >= since,
+                Release.created_at < until,
+            )
+            .order_by(User.id, Project.name, Release.created_at)
+            .all()
+        )
+
+    async def run(self, hour: Optional[int] = None, now: Optional[datetime.datetime] = None) -> DigestStats:
+        """Send digests for one delivery hour (all users when `hour` is None)."""
+        self.running = True
+        try:
+            return await self._run(hour, now or datetime.datetime.utcnow())
+        finally:
+            self.running = False
+
+    async def _run(self, hour: Optional[int], now: datetime.datetime) -> DigestStats:
+        from app.core.config import get_settings
+        settings = get_settings()
+
+        since = now - datetime.timedelta(days=7)
+        digest_url = f"{settings.FRONTEND_URL}/"
+        manage_url = f"{settings.FRONTEND_URL}/settings"
+        stats = DigestStats()
+        started = time.monotonic()
+        last_user_id = 0
+        # Release sets recur across users in no useful order, which defeats the
+        # small shared template cache; keep this run's renders instead
+        renders = {}
+        pool = self.email.create_pool(max_connections=self.smtp_pool_size, rate_limit=self.smtp_rate_limit)
+
+        try:
+            while stats.complete:
+                db: Session = self.session_factory()
+                try:
+                    rows = self.page(db, since, now, hour, last_user_id)
+                finally:
+                    db.close()
+                if not rows:
+                    break
+                last_user_id = rows[-1][0]
+
+                batch = []
+                for user_id, user_rows in groupby(rows, key=lambda row: row[0]):
+                    if time.monotonic() - started > self.time_budget_seconds:
+                        stats.complete = False
+                        break
+
+                    user_rows = list(user_rows)
+                    _, email, first_name = user_rows[0][:3]
+                    key = tuple(row[5] for row in user_rows)
+                    rendered = renders.get(key)
+                    if rendered is None:
+                        releases = [
+                            {
+                                "project_name": project_name,
+                                "version": version,
+                                "prerelease": prerelease,
+                                "release_url": f"{settings.FRONTEND_URL}/projects/{project_id}/releases/{release_id}",
+                                "date": release_date.strftime("%Y-%m-%d") if release_date else None,
+                            }
+                            for _, _, _, project_id, project_name, release_id, version, prerelease, release_date in user_rows
+                        ]
+                        rendered = self.email.render_weekly_digest(releases, digest_url)
+                        if len(renders) >= self.render_cache_size:
+                            renders.clear()
+                        renders[key] = rendered
+                    html = rendered.personalize(greeting=f"Hi {first_name}," if first_name else None, manage_url=manage_url)
+                    batch.append((user_id, self.email.build_message(email, rendered.subject, html)))
+                    stats.users += 1
+                    stats.releases += len(user_rows)
+
+                if not batch:
+                    continue
+                errors = await pool.send_many([message for _, message in batch])
+                sent_ids = [user_id for (user_id, _), error in zip(batch, errors) if error is None]
+                stats.sent += len(sent_ids)
+                stats.failed += len(batch) - len(sent_ids)
+                self._mark_sent(sent_ids, now)
+        finally:
+            await pool.close()
+
+        stats.seconds = time.monotonic() - started
+        return stats
+
+    def _mark_sent(self, user_ids: List[int], now: datetime.datetime) -> None:
+        # Per page, so users already mailed stay marked if a later page fails
+        db: Session = self.session_factory()
+        try:
+            for i in range(0, len(user_ids), 1000):
+                db.query(User).filter(User.id.in_(user_ids[i:i + 1000])).update(
+                    {User.last_digest_at: now}, synchronize_session=False
+                )
+            db.commit()
+        finally:
+            db.close()
+
+
+def _create_weekly_digest_job() -> WeeklyDigestJob:
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    from app.services.email import email_service
+    settings = get_settings()
+
+    return WeeklyDigestJob(
+        session_factory=SessionLocal,
+        email=email_service,
+        batch_size=settings.DIGEST_BATCH_SIZE,
+        time_budget_seconds=settings.DIGEST_TIME_BUDGET_SECONDS,
+        smtp_pool_size=settings.DIGEST_SMTP_POOL_SIZE,
+        smtp_rate_limit=settings.DIGEST_SMTP_RATE_LIMIT,
+    )
+
+
+# Global job instance
+weekly_digest_job = _create_weekly_digest_job()
+
+
+async def schedule_weekly_digest():
+    """Scheduled task, run hourly: send the current hour's digests on digest day."""
+    from app.core.config import get_settings
+    from app.services.email import init_email_service
+    settings = get_settings()
+
+    now = datetime.datetime.utcnow()
+    if now.weekday() != settings.DIGEST_WEEKDAY:
+        return
+    if not init_email_service():
+        print("[Digest] Email is not configured")
+        return
+
+    stats = await weekly_digest_job.run(hour=now.hour, now=now)
+    print_stats(now.hour, stats)
+
+
+def print_stats(hour: Optional[int], stats: DigestStats) -> None:
+    print(
+        f"[Digest] Hour {'all' if hour is None else hour}: {stats.sent} sent, {stats.failed} failed, "
+        f"{stats.users} users in {stats.seconds:.1f}s{'' if stats.complete else ' (time budget exceeded)'}"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(schedule_weekly_digest())
@@ -2,8 +2,16 @@ import asyncio
 from datetime import datetime
 from typing import Optional
 from dataclasses import dataclass
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
 from sqlalchemy.orm import Session
-from jinja2 import Template
+from markupsafe import Markup
+from app.services.email_templates import RenderedEmail, email_templates
+from app.services.smtp import SMTPPool
+
+
+CHANGELOG_PREVIEW_LENGTH = 500
 
 
 @dataclass
@@ -19,15 +27,67 @@ class EmailConfig:
 
 
 class EmailService:
-    """Email notification service with system-wide SMTP config."""
+    """Email notification service with system-wide SMTP config.
     
-    def __init__(self, config: Optional[EmailConfig] = None):
+    Messages go out over a pool of long-lived SMTP sessions instead of a
+    new connection and login per message.
+    """
+    
+    def __init__(self, config: Optional[EmailConfig] = None, pool: Optional[SMTPPool] = None):
         self.config = config
+        self.pool = pool
     
     def is_configured(self) -> bool:
         """Check if email is configured."""
         return self.config is not None and bool(self.config.host)
     
+    def create_pool(self, max_connections: Optional[int] = None, rate_limit: Optional[float] = None) -> SMTPPool:
+        """Create a new SMTP pool from the config, optionally smaller or slower than the shared one."""
+        from app.core.config import get_settings
+        settings = get_settings()
+        return SMTPPool(
+            hostname=self.config.host,
+            port=self.config.port,
+            username=self.config.username,
+            password=self.config.password,
+            use_tls=self.config.use_tls,
+            max_connections=settings.SMTP_POOL_SIZE if max_connections is None else max_connections,
+            max_messages_per_connection=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+            idle_timeout=settings.SMTP_IDLE_TIMEOUT,
+            rate_limit=settings.SMTP_RATE_LIMIT if rate_limit is None else rate_limit,
+        )
+    
+    def get_pool(self) -> SMTPPool:
+        """Return the shared SMTP pool, creating it on first use."""
+        if self.pool is None:
+            self.pool = self.create_pool()
+        return self.pool
+    
+    async def close(self) -> None:
+        """Close pooled SMTP sessions."""
+        if self.pool is not None:
+            await self.pool.close()
+    
+    def build_message(
+        self,
+        to_email: str,
+        subject: str,
+        html_body: str,
+        text_body: Optional[str] = None,
+    ) -> Message:
+        """Build the MIME message for an email."""
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = f"{self.config.from_name} <{self.config.from_email}>"
+        msg['To'] = to_email
+        
+        # Add HTML and text parts
+        if html_body:
+            msg.attach(MIMEText(html_body, 'html'))
+        if text_body:
+            msg.attach(MIMEText(text_body, 'plain'))
+        return msg
+    
     async def send_email(
         self,
         to_email: str,
@@ -40,31 +100,11 @@ class EmailService:
             print(f"[EMAIL DISABLED] Would send to {to_email}: {subject}")
             return False
         
-        import aiosmtplib
-        from email.mime.text import MIMEText
-        from email.mime.multipart import MIMEMultipart
-        
         try:
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = f"{self.config.from_name} <{self.config.from_email}>"
-            msg['To'] = to_email
+            msg = self.build_message(to_email, subject, html_body, text_body)
             
-            # Add HTML and text parts
-            if html_body:
-                msg.attach(MIMEText(html_body, 'html'))
-            if text_body:
-                msg.attach(MIMEText(text_body, 'plain'))
-            
-            # Send via SMTP
-            await aiosmtplib.send(
-                msg,
-                hostname=self.config.host,
-                port=self.config.port,
-                use_tls=self.config.use_tls,
-                username=self.config.username,
-                password=self.config.password,
-            )
+            # Send over a pooled SMTP session
+            await self.get_pool().send(msg)
             
             return True
             
@@ -72,6 +112,52 @@ class EmailService:
             print(f"[EMAIL ERROR] Failed to send email: {e}")
             return False
     
+    def _manage_url(self) -> str:
+        from app.core.config import get_settings
+        return f"{get_settings().FRONTEND_URL}/settings"
+    
+    async def send_rendered(
+        self,
+        to_email: str,
+        rendered: RenderedEmail,
+        recipient_name: Optional[str] = None,
+        manage_url: Optional[str] = None,
+    ) -> bool:
+        """Personalize a pre-rendered email for one recipient and send it."""
+        html = rendered.personalize(
+            greeting=f"Hi {recipient_name}," if recipient_name else None,
+            manage_url=manage_url or self._manage_url(),
+        )
+        return await self.send_email(
+            to_email=to_email,
+            subject=rendered.subject,
+            html_body=html,
+        )
+    
+    def render_release_notification(
+        self,
+        project_name: str,
+        version: str,
+        release_url: str,
+        changelog: Optional[str] = None,
+        prerelease: bool = False,
+    ) -> RenderedEmail:
+        """Render the release email body shared by all its recipients."""
+        if changelog and len(changelog) > CHANGELOG_PREVIEW_LENGTH:
+            changelog = changelog[:CHANGELOG_PREVIEW_LENGTH] + "..."
+        return email_templates.render(
+            "release.html",
+            subject=f"📦 New release: {project_name} v{version}",
+            context={
+                "project_name": project_name,
+                "version": version,
+                "release_url": release_url,
+                "changelog": changelog,
+                "prerelease": prerelease,
+            },
+            cache_key=("release", release_url, project_name, version, prerelease, changelog),
+        )
+    
     async def send_release_notification(
         self,
         to_email: str,
@@ -80,50 +166,18 @@ class EmailService:
         release_url: str,
         changelog: Optional[str] = None,
         prerelease: bool = False,
+        recipient_name: Optional[str] = None,
+        manage_url: Optional[str] = None,
     ) -> bool:
         """Send a release notification email."""
-        subject = f"📦 New release: {project_name} v{version}"
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #6366f1 0%, #8b5cf6 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0; font-size: 24px;">📦 New Release Published</h1>
-            </div>
-            
-            <div style="background: #f9fafb; padding: 30px; border-radius: 0 0 12px 12px; border: 1px solid #e5e7eb; border-top: none;">
-                <p style="font-size: 18px; margin-top: 0;">
-                    <strong>{project_name}</strong> v{version} has been released!
-                </p>
-                
-                {"<p style='background: #fef3c7; color: #92400e; padding: 8px 12px; border-radius: 6px; display: inline-block;'>🚧 Pre-release</p>" if prerelease else ""}
-                
-                <p style="margin: 20px 0;">
-                    <a href="{release_url}" style="display: inline-block; background: #6366f1; color: white; text-decoration: none; padding: 12px 24px; border-radius: 8px; font-weight: 600;">View Release</a>
-                </p>
-                
-                {"<div style='margin-top: 20px; padding: 15px; background: white; border-radius: 8px; border: 1px solid #e5e7eb;'><h3 style='margin-top: 0;'>📝 Changelog Preview</h3><pre style='white-space: pre-wrap; font-size: 14px; color: #4b5563;'>" + (changelog[:500] + "..." if changelog and len(changelog) > 500 else changelog or "No changelog provided") + "</pre></div>" if changelog else ""}
-                
-                <hr style="border: none; border-top: 1px solid #e5e7eb; margin: 30px 0;">
-                <p style="color: #6b7280; font-size: 14px; text-align: center;">
-                    You're receiving this because you subscribed to releases from {project_name}.<br>
-                    <a href="{release_url.replace('/releases/', '/settings/')}" style="color: #6366f1;">Manage notification settings</a>
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return await self.send_email(
-            to_email=to_email,
-            subject=subject,
-            html_body=html,
+        rendered = self.render_release_notification(
+            project_name=project_name,
+            version=version,
+            release_url=release_url,
+            changelog=changelog,
+            prerelease=prerelease,
         )
+        return await self.send_rendered(to_email, rendered, recipient_name, manage_url)
     
     async def send_weekly_digest(
         self,
@@ -132,53 +186,81 @@ class EmailService:
         release_count: int,
         releases: list,
         digest_url: str,
+        recipient_name: Optional[str] = None,
     ) -> bool:
         """Send a weekly digest email."""
-        subject = f"Weekly Digest: {release_count} releases from {project_name}"
-        
-        releases_html = ""
-        for release in releases:
-            releases_html += f"""
-            <div style="padding: 12px 0; border-bottom: 1px solid #e5e7eb;">
-                <strong>{release.get('version', 'Unknown')}</strong>
-                {"<span style='background: #fef3c7; color: #92400e; padding: 2px 8px; border-radius: 4px; font-size: 12px;'>Pre-release</span>" if release.get('prerelease') else ""}
-                <br><small style="color: #6b7280;">{release.get('date', 'No date')}</small>
-            </div>
-            """
-        
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="utf-8">
-        </head>
-        <body style="font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; line-height: 1.6; color: #1f2937; max-width: 600px; margin: 0 auto; padding: 20px;">
-            <div style="background: linear-gradient(135deg, #10b981 0%, #059669 100%); padding: 30px; border-radius: 12px 12px 0 0; text-align: center;">
-                <h1 style="color: white; margin: 0;">📊 Weekly Release Digest</h1>
-            </div>
-            
-            <div style="background: #f9fafb; padding: 30px; border-radius: 0 0 12px 12px; border: 1px solid #e5e7eb;">
-                <p style="font-size: 18px;">
-                    <strong>{project_name}</strong> had <strong>{release_count}</strong> releases this week.
-                </p>
-                
-                <div style="margin: 20px 0;">
-                    {releases_html}
-                </div>
-                
-                <p style="margin: 20px 0; text-align: center;">
-                    <a href="{digest_url}" style="display: inline-block; background: #6366f1; color: white; text-decoration: none; padding: 12px 24px; border-radius: 8px; font-weight: 600;">View All Releases</a>
-                </p>
-            </div>
-        </body>
-        </html>
-        """
-        
-        return await self.send_email(
-            to_email=to_email,
+        rendered = email_templates.render(
+            "digest.html",
+            subject=f"Weekly Digest: {release_count} releases from {project_name}",
+            context={
+                "title": "📊 Weekly Release Digest",
+                "gradient": "#10b981 0%, #059669 100%",
+                "summary": Markup("<strong>{}</strong> had <strong>{}</strong> releases this week.").format(
+                    project_name, release_count
+                ),
+                "releases": releases,
+                "digest_url": digest_url,
+            },
+        )
+        return await self.send_rendered(to_email, rendered, recipient_name)
+    
+    def render_weekly_digest(self, releases: list, digest_url: str) -> RenderedEmail:
+        """Render a user's weekly digest across all the projects they follow."""
+        projects = {release['project_name'] for release in releases}
+        if len(projects) == 1:
+            subject = f"Weekly Digest: {len(releases)} releases from {releases[0]['project_name']}"
+        else:
+            subject = f"Weekly Digest: {len(releases)} releases from {len(projects)} projects"
+        return email_templates.render(
+            "digest.html",
             subject=subject,
-            html_body=html,
+            context={
+                "title": "📊 Weekly Release Digest",
+                "gradient": "#10b981 0%, #059669 100%",
+                "summary": Markup("<strong>{}</strong> releases from <strong>{}</strong> projects you follow this week.").format(
+                    len(releases), len(projects)
+                ),
+                "releases": releases,
+                "digest_url": digest_url,
+            },
+            # Users following the same projects share one rendered digest
+            cache_key=("weekly", digest_url, tuple(release['release_url'] for release in releases)),
+        )
+    
+    async def send_release_digest(
+        self,
+        to_email: str,
+        releases: list,
+        digest_url: str,
+        recipient_name: Optional[str] = None,
+        manage_url: Optional[str] = None,
+    ) -> bool:
+        """Send one email for several releases published close together."""
+        projects = sorted({release['project_name'] for release in releases})
+        if len(projects) == 1:
+            subject = f"📦 {len(releases)} new releases from {projects[0]}"
+            summary = Markup("<strong>{}</strong> published <strong>{}</strong> new releases.").format(
+                projects[0], len(releases)
+            )
+        else:
+            subject = f"📦 {len(releases)} new releases from {len(projects)} projects"
+            summary = Markup("<strong>{}</strong> new releases from <strong>{}</strong> projects.").format(
+                len(releases), len(projects)
+            )
+        rendered = email_templates.render(
+            "digest.html",
+            subject=subject,
+            context={
+                "title": "📦 New Releases",
+                "gradient": "#6366f1 0%, #8b5cf6 100%",
+                "summary": summary,
+                "releases": releases,
+                "digest_url": digest_url,
+            },
+            # Subscribers of the same projects share one rendered digest
+            cache_key=("digest", tuple((r['project_name'], r['version'], r.get('release_url')) for r in releases)),
         )
+        return await self.send_rendered(to_email, rendered, recipient_name, manage_url)
 
 
 # Global service instance
@@ -192,13 +274,20 @@ def init_email_service():
     settings = get_settings()
     
     if settings.SMTP_HOST and settings.SMTP_USER:
-        email_service.config = EmailConfig(
+        config = EmailConfig(
             host=settings.SMTP_HOST,
             port=settings.SMTP_PORT,
             username=settings.SMTP_USER,
             password=settings.SMTP_PASSWORD,
             from_email=settings.SMTP_FROM or "releases@example.com",
+            # Implicit TLS on 465; on 587 the session is upgraded with STARTTLS
+            use_tls=settings.SMTP_PORT == 465,
         )
+        # Calling this again keeps the pool: replacing it would drop its open
+        # sessions and any sends in flight on them
+        if config != email_service.config:
+            email_service.config = config
+            email_service.pool = None
         return True
     return False
 
@@ -210,6 +299,7 @@ async def send_notification_email(
     release_url: str,
     changelog: str = None,
     prerelease: bool = False,
+    recipient_name: str = None,
 ) -> bool:
     """Convenience function to send release notification."""
     return await email_service.send_release_notification(
@@ -219,4 +309,5 @@ async def send_notification_email(
         release_url=release_url,
         changelog=changelog,
         prerelease=prerelease,
+        recipient_name=recipient_name,
     )
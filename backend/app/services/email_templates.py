@@ -0,0 +1,92 @@
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional
+from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup, escape
+
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+# Filled in per recipient after the shared body has been rendered
+RECIPIENT_SLOTS = ("greeting", "manage_url")
+
+_SLOT_PATTERN = re.compile("\x00(" + "|".join(RECIPIENT_SLOTS) + ")\x00")
+
+
+@dataclass
+class RenderedEmail:
+    """An email body rendered once and personalized per recipient.
+
+    `chunks` alternates static HTML and recipient slot names:
+    [html, slot, html, slot, html, ...].
+    """
+    subject: str
+    chunks: List[str]
+
+    def personalize(self, **values: Optional[str]) -> str:
+        """Splice escaped recipient values into the shared body."""
+        parts = list(self.chunks)
+        for i in range(1, len(parts), 2):
+            parts[i] = escape(values.get(parts[i]) or "")
+        return "".join(parts)
+
+
+class EmailTemplates:
+    """Email templates compiled once, with rendered bodies cached per release.
+
+    Recipient-specific values (greeting, settings link) are rendered as
+    placeholders, so a release body is built once and each recipient only
+    costs a join of precomputed chunks.
+    """
+
+    def __init__(self, directory: Path = TEMPLATE_DIR, cache_size: int = 256):
+        self.env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=True,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        # Compile everything up front; `_`-prefixed templates are layouts
+        self.templates = {
+            name: self.env.get_template(name)
+            for name in self.env.list_templates(extensions=["html"])
+            if not name.startswith("_")
+        }
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[Hashable, RenderedEmail]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def render(
+        self,
+        name: str,
+        subject: str,
+        context: Dict,
+        cache_key: Optional[Hashable] = None,
+    ) -> RenderedEmail:
+        """Render a template, reusing the cached body for `cache_key`."""
+        if cache_key is not None:
+            with self._lock:
+                rendered = self._cache.get(cache_key)
+                if rendered is not None:
+                    self._cache.move_to_end(cache_key)
+                    return rendered
+
+        slots = {slot: Markup(f"\x00{slot}\x00") for slot in RECIPIENT_SLOTS}
+        html = self.templates[name].render(**context, **slots)
+        rendered = RenderedEmail(subject=subject, chunks=_SLOT_PATTERN.split(html))
+
+        with self._lock:
+            self.renders += 1
+            if cache_key is not None:
+                self._cache[cache_key] = rendered
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return rendered
+
+
+# Compiled once at import, i.e. at startup
+email_templates = EmailTemplates()
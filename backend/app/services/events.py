@@ -0,0 +1,274 @@
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+RELEASE_CREATED = "release.created"
+PROJECT_CHANGED = "project.changed"
+SUBSCRIPTIONS_CHANGED = "subscriptions.changed"
+
+# Event types forwarded to client connections; the rest only reach listeners
+STREAM_EVENT_TYPES = {RELEASE_CREATED}
+
+
+@dataclass
+class StreamEvent:
+    """An event as delivered to stream clients.
+
+    `data` is the JSON-serialized message, built once per event and shared
+    by every connection it is routed to.
+    """
+    type: str
+    project_id: Optional[int]
+    data: str
+
+
+class StreamSubscriber:
+    """A single client connection's view of the event stream.
+
+    Events are buffered in a bounded queue. When the client can't keep up,
+    the oldest buffered event is dropped to make room. A subscriber that has
+    dropped too many events is closed so the client can reconnect and resync
+    from the feed endpoint.
+    """
+
+    def __init__(self, user_id: int, project_ids: Iterable[int], maxsize: int, max_dropped: int):
+        self.user_id = user_id
+        self.project_ids: Set[int] = set(project_ids)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.max_dropped = max_dropped
+        self.dropped = 0
+        self.closed = False
+
+    def offer(self, event: StreamEvent) -> None:
+        """Enqueue an event without ever blocking the publisher."""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()
+            self.queue.put_nowait(event)
+            self.dropped += 1
+            if self.dropped > self.max_dropped:
+                self.close()
+
+    def close(self) -> None:
+        """Mark the subscriber closed and wake up any pending reader."""
+        if self.closed:
+            return
+        self.closed = True
+        # Discard the backlog; the reader only needs to be woken up
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(None)
+
+    async def get(self, timeout: float) -> Optional[StreamEvent]:
+        """Wait for the next event.
+
+        Returns None on timeout (time to send a keepalive) or once the
+        subscriber has been closed; check `closed` to tell them apart.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventHub:
+    """Fan-out of release events to live stream connections.
+
+    With Redis configured, published events go through a pub/sub channel so
+    that every API worker receives them and dispatches to its own
+    connections and listeners. Without Redis (or if it is unreachable at
+    startup) events are dispatched in-process only.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str] = None,
+        channel: str = "releasemonitor:events",
+        queue_size: int = 100,
+        max_dropped: int = 500,
+    ):
+        self.redis_url = redis_url
+        self.channel = channel
+        self.queue_size = queue_size
+        self.max_dropped = max_dropped
+        self._subscribers: Dict[int, Set[StreamSubscriber]] = {}
+        self._connections: Dict[int, Set[StreamSubscriber]] = {}  # By user
+        self._listeners: Dict[str, List[Callable[[StreamEvent], None]]] = {}
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def connection_count(self) -> int:
+        """Number of open stream connections on this worker."""
+        return sum(len(subs) for subs in self._connections.values())
+
+    def add_listener(self, event_type: str, callback: Callable[[StreamEvent], None]) -> None:
+        """Call `callback` on every worker for each event of the given type."""
+        self._listeners.setdefault(event_type, []).append(callback)
+
+    def subscribe(self, user_id: int, project_ids: Iterable[int]) -> StreamSubscriber:
+        """Register a connection for events of the given projects."""
+        subscriber = StreamSubscriber(user_id, project_ids, self.queue_size, self.max_dropped)
+        self._connections.setdefault(user_id, set()).add(subscriber)
+        self._route(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber) -> None:
+        """Remove a connection from all routing sets."""
+        self._unroute(subscriber)
+        subs = self._connections.get(subscriber.user_id)
+        if subs is not None:
+            subs.discard(subscriber)
+            if not subs:
+                del self._connections[subscriber.user_id]
+        subscriber.close()
+
+    def has_connections(self, user_id: int) -> bool:
+        return user_id in self._connections
+
+    def resubscribe_user(self, user_id: int, project_ids: Iterable[int]) -> None:
+        """Route a user's open connections to a new set of projects."""
+        project_ids = set(project_ids)
+        for subscriber in list(self._connections.get(user_id, ())):
+            self._unroute(subscriber)
+            subscriber.project_ids = set(project_ids)
+            self._route(subscriber)
+
+    def _route(self, subscriber: StreamSubscriber) -> None:
+        for project_id in subscriber.project_ids:
+            self._subscribers.setdefault(project_id, set()).add(subscriber)
+
+    def _unroute(self, subscriber: StreamSubscriber) -> None:
+        for project_id in subscriber.project_ids:
+            subs = self._subscribers.get(project_id)
+            if subs is None:
+                continue
+            subs.discard(subscriber)
+            if not subs:
+                del self._subscribers[project_id]
+
+    async def publish(self, event_type: str, data: dict, project_id: Optional[int] = None) -> None:
+        """Publish an event to all workers (or locally without Redis)."""
+        message = json.dumps(
+            {"type": event_type, "project_id": project_id, "data": data},
+            default=str,
+        )
+
+        if self._redis is not None:
+            try:
+                await self._redis.publish(self.channel, message)
+                return
+            except Exception as e:
+                print(f"[Events] Redis publish failed, dispatching locally: {e}")
+
+        self._dispatch(StreamEvent(type=event_type, project_id=project_id, data=message))
+
+    def publish_nowait(self, event_type: str, data: dict, project_id: Optional[int] = None) -> None:
+        """Publish from synchronous code such as threadpool request handlers.
+
+        The publish is scheduled on the hub's event loop. Before `start()`
+        has run there is no loop, and the event is dispatched to listeners
+        right away.
+        """
+        if self._loop is not None and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self.publish(event_type, data, project_id), self._loop)
+            return
+
+        message = json.dumps({"type": event_type, "project_id": project_id, "data": data}, default=str)
+        self._notify_listeners(StreamEvent(type=event_type, project_id=project_id, data=message))
+
+    def _notify_listeners(self, event: StreamEvent) -> None:
+        for callback in self._listeners.get(event.type, ()):
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"[Events] Listener for {event.type} failed: {e}")
+
+    def _dispatch(self, event: StreamEvent) -> None:
+        """Hand an event to local listeners and subscribed connections."""
+        self._notify_listeners(event)
+        if event.type not in STREAM_EVENT_TYPES:
+            return
+        for subscriber in list(self._subscribers.get(event.project_id, ())):
+            subscriber.offer(event)
+            if subscriber.closed:
+                self.unsubscribe(subscriber)
+
+    async def start(self) -> None:
+        """Connect to Redis and start relaying channel messages."""
+        self._loop = asyncio.get_running_loop()
+        if not self.redis_url or self._listener is not None:
+            return
+
+        try:
+            from redis import asyncio as aioredis
+
+            self._redis = aioredis.from_url(self.redis_url)
+            pubsub = self._redis.pubsub()
+            await pubsub.subscribe(self.channel)
+        except Exception as e:
+            print(f"[Events] Redis unavailable, using in-process fan-out: {e}")
+            self._redis = None
+            return
+
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub) -> None:
+        """Relay Redis pub/sub messages to local connections."""
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                raw = message["data"]
+                if isinstance(raw, bytes):
+                    raw = raw.decode()
+                try:
+                    parsed = json.loads(raw)
+                except ValueError:
+                    continue
+                self._dispatch(StreamEvent(
+                    type=parsed.get("type"),
+                    project_id=parsed.get("project_id"),
+                    data=raw,
+                ))
+        finally:
+            await pubsub.close()
+
+    async def stop(self) -> None:
+        """Stop the Redis relay and close all local connections."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        self._loop = None
+        for subs in list(self._subscribers.values()):
+            for subscriber in list(subs):
+                self.unsubscribe(subscriber)
+
+
+def _create_event_hub() -> EventHub:
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return EventHub(
+        redis_url=settings.REDIS_URL or None,
+        channel=settings.REDIS_EVENTS_CHANNEL,
+        queue_size=settings.STREAM_QUEUE_SIZE,
+        max_dropped=settings.STREAM_MAX_DROPPED,
+    )
+
+
+# Global hub instance
+event_hub = _create_event_hub()
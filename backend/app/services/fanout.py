@@ -0,0 +1,136 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+import httpx
+
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+SIGNATURE_HEADER = "X-ReleaseMonitor-Signature-256"
+
+
+def serialize_payload(payload: dict) -> bytes:
+    """Serialize a webhook payload the way every delivery sends it."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def canonical_payload(payload: dict) -> bytes:
+    """Serialize with sorted keys, so equal payloads are equal bytes to sign."""
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode("utf-8")
+
+
+def sign_payload(secret: str, body: bytes) -> str:
+    """HMAC-SHA256 of the exact request body, as sent in SIGNATURE_HEADER."""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+
+def signed_headers(secret: Optional[str], body: bytes) -> Dict[str, str]:
+    """Request headers for a JSON body, signed when there is a secret."""
+    if not secret:
+        return JSON_HEADERS
+    return {**JSON_HEADERS, SIGNATURE_HEADER: sign_payload(secret, body)}
+
+
+class PayloadCache:
+    """LRU cache of serialized webhook payloads.
+
+    A release goes out to many subscriptions that differ only in a few
+    fields (e.g. the Mattermost channel), so the body is rendered once per
+    key and the same bytes are posted to every destination sharing it.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def get_or_render(
+        self,
+        key: Hashable,
+        render: Callable[[], dict],
+        serialize: Callable[[dict], bytes] = serialize_payload,
+    ) -> bytes:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+                return body
+
+        body = serialize(render())
+        with self._lock:
+            self.renders += 1
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class WebhookClient:
+    """Pooled HTTP client shared by all webhook deliveries.
+
+    Keep-alive connections are reused across deliveries instead of opening
+    a client (and TLS handshake) per message. Requests beyond the pool size
+    wait on a semaphore rather than in httpcore's pool, whose bookkeeping
+    scans every queued request and gets slow under a large fan-out. The
+    underlying client is bound to the event loop that created it and
+    recreated if used from another one.
+    """
+
+    def __init__(self, max_connections: int = 100, timeout: float = 10.0):
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_connections)
+        return self._client
+
+    async def post(self, url: str, body: bytes, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """POST pre-serialized JSON; raises for non-2xx responses."""
+        client = self.client()
+        async with self._slots:
+            response = await client.post(url, content=body, headers=headers or JSON_HEADERS)
+        response.raise_for_status()
+        return response
+
+    async def close(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+
+def _create_fanout():
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return (
+        PayloadCache(max_entries=settings.PAYLOAD_CACHE_MAX_ENTRIES),
+        WebhookClient(max_connections=settings.WEBHOOK_MAX_CONNECTIONS, timeout=settings.WEBHOOK_TIMEOUT_SECONDS),
+    )
+
+
+# Global instances shared by the outbox senders
+payload_cache, webhook_client = _create_fanout()
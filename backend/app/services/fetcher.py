@@ -1,11 +1,20 @@
 import asyncio
+import time
 from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.dates import naive_utc
+from app.core.instrumentation import FETCH_SECONDS, RELEASES_INGESTED
+from app.core.versions import is_prerelease
 from app.models.project import Project, ReleaseSource as ProjectSource
 from app.models.release import Release, ReleaseAsset
 from app.services.sources import get_source, Release as SourceRelease
+from app.services.events import event_hub, RELEASE_CREATED
+from app.services.notifications import notification_service
+from app.services.summaries import summary_stage
+from app.services.changelog_html import changelog_renderer
+from app.services.project_stats import record_new_releases
 
 
 class ReleaseFetcher:
@@ -20,18 +29,39 @@ class ReleaseFetcher:
         total_fetched = 0
         
         for project in projects:
+            name = project.name
+            # One savepoint per project, so a failure discards only that
+            # project's releases, outbox rows and stream events
+            savepoint = db.begin_nested()
+            queued_events = len(db.info.get("new_releases", []))
             try:
                 fetched = await self.fetch_project(db, project)
+                savepoint.commit()
                 total_fetched += fetched
             except Exception as e:
-                print(f"Error fetching releases for {project.name}: {e}")
+                savepoint.rollback()
+                del db.info.get("new_releases", [])[queued_events:]
+                print(f"Error fetching releases for {name}: {e}")
                 continue
         
         db.commit()
+        await self.publish_new_releases(db)
+        summary_stage.wake()
+        changelog_renderer.wake()
         return total_fetched
     
     async def fetch_project(self, db: Session, project: Project) -> int:
         """Fetch releases for a single project."""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            fetched = await self._fetch_project(db, project)
+            outcome = "success"
+            return fetched
+        finally:
+            FETCH_SECONDS.labels(project.source.value, outcome).observe(time.perf_counter() - started)
+    
+    async def _fetch_project(self, db: Session, project: Project) -> int:
         source = get_source(project.source.value)
         
         # Get external ID
@@ -43,10 +73,7 @@ class ReleaseFetcher:
         releases = await source.fetch_releases(external_id)
         
         # Filter to only new releases
-        new_count = 0
-        last_release = db.query(Release).filter(
-            Release.project_id == project.id
-        ).order_by(Release.created_at.desc()).first()
+        new_releases = []
         
         for source_release in releases:
             # Check if release already exists
@@ -63,11 +90,12 @@ class ReleaseFetcher:
                 project_id=project.id,
                 version=source_release.version,
                 tag_name=source_release.tag_name,
-                release_date=source_release.release_date,
+                release_date=naive_utc(source_release.release_date),
                 changelog=source_release.changelog,
                 changelog_url=source_release.changelog_url,
                 draft=source_release.draft,
-                prerelease=source_release.prerelease,
+                # Sources flag some (GitHub), the version string tells for the rest
+                prerelease=source_release.prerelease or is_prerelease(source_release.version),
             )
             db.add(release)
             db.flush()
@@ -83,12 +111,45 @@ class ReleaseFetcher:
                 )
                 db.add(asset)
             
-            new_count += 1
+            # Published to live stream clients once the transaction commits
+            db.info.setdefault("new_releases", []).append(
+                self._release_event(project, release)
+            )
+            new_releases.append(release)
+        
+        # Notifications are queued in the same transaction as the releases
+        notification_service.enqueue_releases(db, project, new_releases)
+        
+        # Latest version and release count, read by project lists without a join
+        record_new_releases(project, new_releases)
         
         # Update last checked time
         project.last_checked_at = datetime.utcnow()
         
-        return new_count
+        RELEASES_INGESTED.labels(project.source.value).inc(len(new_releases))
+        return len(new_releases)
+    
+    def _release_event(self, project: Project, release: Release) -> dict:
+        """Build the stream payload for a new release (same shape as the feed)."""
+        return {
+            "id": release.id,
+            "project_id": project.id,
+            "project_name": project.name,
+            "project_source": project.source.value,
+            "project_avatar_url": project.avatar_url,
+            "version": release.version,
+            "release_date": release.release_date.isoformat() if release.release_date else None,
+            "changelog": release.excerpt[:200] if release.excerpt else None,
+            "tag_name": release.tag_name,
+            "prerelease": release.prerelease,
+        }
+    
+    async def publish_new_releases(self, db: Session) -> int:
+        """Publish releases committed through this session to stream clients."""
+        events = db.info.pop("new_releases", [])
+        for data in events:
+            await event_hub.publish(RELEASE_CREATED, data, project_id=data["project_id"])
+        return len(events)
     
     async def fetch_single(self, project_id: int) -> int:
         """Fetch releases for a single project by ID."""
@@ -98,7 +159,12 @@ class ReleaseFetcher:
             if not project:
                 return 0
             
-            return await self.fetch_project(db, project)
+            new_count = await self.fetch_project(db, project)
+            db.commit()
+            await self.publish_new_releases(db)
+            summary_stage.wake()
+            changelog_renderer.wake()
+            return new_count
         finally:
             db.close()
 
@@ -113,6 +179,11 @@ async def schedule_fetch_all():
     try:
         count = await fetcher.fetch_all(db)
         print(f"Fetched {count} new releases")
+        # No app running here to summarize them in the background
+        summarized = await summary_stage.run()
+        print(f"Summarized {summarized} changelogs")
+        rendered = await changelog_renderer.run()
+        print(f"Rendered {rendered} changelogs")
     finally:
         db.close()
 
@@ -0,0 +1,198 @@
+import datetime
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import or_, tuple_
+from sqlalchemy.orm import Session
+from app.core.database import insert_ignore
+from app.models.notification import DeliveryRecord
+
+
+# (release_id, channel, destination)
+LedgerKey = Tuple[int, str, str]
+
+
+def ledger_key(release_id: int, channel: str, destination: str, variant: Optional[str] = None) -> LedgerKey:
+    """Identity of a notification for deduplication.
+
+    A Mattermost channel override makes a different message to the same
+    URL, so it is part of the destination. For email the variant is just
+    the greeting.
+    """
+    if channel == "mattermost" and variant:
+        destination = f"{destination}#{variant}"
+    return (release_id, channel, destination)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over string keys.
+
+    Answers "definitely not added" or "maybe added"; the false positive
+    rate stays near `error_rate` until more than `capacity` keys are added.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+def _bloom_key(key: LedgerKey) -> str:
+    release_id, channel, destination = key
+    return f"{release_id}\x1f{channel}\x1f{destination}"
+
+
+class DeliveryLedger:
+    """Which notifications have already been delivered.
+
+    The delivery_ledger table is the source of truth. In front of it sit a
+    Bloom filter of every recorded key and an LRU of recently delivered
+    ones, so checking a delivery is O(1) and touches the database only for
+    the rare Bloom hit that isn't in the LRU: a key the filter has never
+    seen was never delivered. The filter is filled from the table on first
+    use and then follows it incrementally by id, which also picks up what
+    other workers recorded since. Ids are handed out at insert but become
+    visible at commit, so ids a refresh skips within `refresh_overlap` of
+    the newest are re-read by later ones, catching rows that committed
+    after higher ids, until `gap_seconds` have passed and the id counts
+    as rolled back.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1_000_000,
+        recent_size: int = 100_000,
+        error_rate: float = 0.001,
+        refresh_overlap: int = 10_000,
+        gap_seconds: float = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.recent_size = recent_size
+        self.error_rate = error_rate
+        self.refresh_overlap = refresh_overlap
+        self.gap_seconds = gap_seconds
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self._bloom = BloomFilter(self.capacity, self.error_rate)
+            self._recent: "OrderedDict[LedgerKey, None]" = OrderedDict()
+            self._last_id = 0
+            self._gaps: Dict[int, float] = {}  # Skipped id -> when it was first skipped
+        self.lookups = 0  # Bloom hits confirmed against the database
+        self.refreshed = 0  # Rows read by refresh
+
+    def _remember(self, key: LedgerKey) -> None:
+        self._bloom.add(_bloom_key(key))
+        self._recent[key] = None
+        self._recent.move_to_end(key)
+        if len(self._recent) > self.recent_size:
+            self._recent.popitem(last=False)
+
+    def remember(self, keys: Iterable[LedgerKey]) -> None:
+        """Note deliveries that just succeeded, before they are stored."""
+        with self._lock:
+            for key in keys:
+                self._remember(key)
+
+    def refresh(self, db: Session) -> None:
+        """Add keys recorded since the last refresh to the filter."""
+        now = self.clock()
+        with self._lock:
+            last_id = self._last_id
+            self._gaps = {row_id: skipped for row_id, skipped in self._gaps.items() if now - skipped < self.gap_seconds}
+            gaps = list(self._gaps)
+        condition = DeliveryRecord.id > last_id
+        if gaps:
+            condition = or_(condition, DeliveryRecord.id.in_(gaps))
+        rows = (
+            db.query(DeliveryRecord.id, DeliveryRecord.release_id, DeliveryRecord.channel, DeliveryRecord.destination)
+            .filter(condition)
+            .order_by(DeliveryRecord.id)
+            .execution_options(yield_per=10000)
+        )
+        with self._lock:
+            expected = last_id + 1
+            for row_id, release_id, channel, destination in rows:
+                self._bloom.add(_bloom_key((release_id, channel, destination)))
+                self.refreshed += 1
+                if row_id < expected:
+                    self._gaps.pop(row_id, None)
+                    continue
+                for skipped in range(max(expected, row_id - self.refresh_overlap), row_id):
+                    self._gaps.setdefault(skipped, now)
+                expected = row_id + 1
+            self._last_id = max(self._last_id, expected - 1)
+            oldest = self._last_id - self.refresh_overlap
+            self._gaps = {row_id: skipped for row_id, skipped in self._gaps.items() if row_id >= oldest}
+
+    def delivered(self, db: Session, keys: Iterable[LedgerKey]) -> Set[LedgerKey]:
+        """The subset of `keys` that has already been delivered."""
+        found, maybe = set(), set()
+        with self._lock:
+            for key in set(keys):
+                if key in self._recent:
+                    self._recent.move_to_end(key)
+                    found.add(key)
+                elif _bloom_key(key) in self._bloom:
+                    maybe.add(key)
+        if not maybe:
+            return found
+
+        self.lookups += len(maybe)
+        columns = (DeliveryRecord.release_id, DeliveryRecord.channel, DeliveryRecord.destination)
+        rows = db.query(*columns).filter(tuple_(*columns).in_(list(maybe)))
+        confirmed = {tuple(row) for row in rows} & maybe
+        with self._lock:
+            for key in confirmed:
+                self._remember(key)
+        return found | confirmed
+
+    def record(self, db: Session, keys: Iterable[LedgerKey], now: Optional[datetime.datetime] = None) -> None:
+        """Store delivered keys in the caller's transaction; keys already stored,
+        even by another worker mid-insert, are skipped."""
+        keys = set(keys)
+        if not keys:
+            return
+        now = now or datetime.datetime.utcnow()
+        rows: List[dict] = [
+            {"release_id": release_id, "channel": channel, "destination": destination, "delivered_at": now}
+            for release_id, channel, destination in keys
+        ]
+        insert_ignore(db, DeliveryRecord, rows, key=("release_id", "channel", "destination"))
+        self.remember(keys)
+
+
+def _create_delivery_ledger() -> DeliveryLedger:
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return DeliveryLedger(
+        capacity=settings.DELIVERY_LEDGER_CAPACITY,
+        recent_size=settings.DELIVERY_LEDGER_RECENT,
+        refresh_overlap=settings.DELIVERY_LEDGER_REFRESH_OVERLAP,
+        gap_seconds=settings.DELIVERY_LEDGER_GAP_SECONDS,
+    )
+
+
+# Global ledger shared by the outbox dispatcher
+delivery_ledger = _create_delivery_ledger()
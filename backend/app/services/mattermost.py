@@ -1,8 +1,12 @@
-import httpx
-from typing import Optional, Dict, Any
+from typing import Optional
 from datetime import datetime
 from pydantic import BaseModel
 from enum import Enum
+from app.services.fanout import serialize_payload, webhook_client
+
+
+# Releases listed in a digest message before it is cut off
+DIGEST_MAX_RELEASES = 25
 
 
 class MattermostEventType(str, Enum):
@@ -43,14 +47,12 @@ class MattermostService:
         
         payload = message.model_dump(exclude_none=True)
         
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.post(self.webhook_url, json=payload)
-                response.raise_for_status()
-                return True
-            except Exception as e:
-                print(f"Failed to send Mattermost message: {e}")
-                return False
+        try:
+            await webhook_client.post(self.webhook_url, serialize_payload(payload))
+            return True
+        except Exception as e:
+            print(f"Failed to send Mattermost message: {e}")
+            return False
     
     def create_release_message(
         self,
@@ -150,6 +152,48 @@ class MattermostService:
             attachments=attachments,
         )
     
+    def create_release_digest(self, releases: list) -> MattermostMessage:
+        """Create one message for several releases published close together.
+        
+        Follows the weekly digest layout, listing each release instead of a
+        single top version.
+        """
+        projects = sorted({release["project_name"] for release in releases})
+        if len(projects) == 1:
+            text = f"📦 **{projects[0]}** has published {len(releases)} new releases"
+        else:
+            text = f"📦 {len(releases)} new releases from {len(projects)} projects"
+        
+        lines = []
+        for release in releases[:DIGEST_MAX_RELEASES]:
+            line = f"[{release['project_name']} v{release['version']}]({release['release_url']})"
+            if release.get("prerelease"):
+                line += " 🚧"
+            lines.append(f"• {line}")
+        if len(releases) > DIGEST_MAX_RELEASES:
+            lines.append(f"…and {len(releases) - DIGEST_MAX_RELEASES} more")
+        
+        attachments = [{
+            "color": "#6366f1",
+            "title": f"{len(releases)} new releases",
+            "text": "\n".join(lines),
+            "fields": [
+                {
+                    "short": True,
+                    "title": "Projects",
+                    "value": ", ".join(projects[:5]) + ("…" if len(projects) > 5 else ""),
+                },
+            ],
+            "footer": "Release Monitor",
+        }]
+        
+        return MattermostMessage(
+            text=text,
+            channel=self.default_channel,
+            username=self.default_username,
+            attachments=attachments,
+        )
+    
     async def notify_release(
         self,
         project_name: str,
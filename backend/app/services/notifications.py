@@ -1,77 +1,109 @@
 import asyncio
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.models.project import Project
 from app.models.release import Release
-from app.models.subscription import Subscription
-from app.services.email import email_service
-from app.services.mattermost import mattermost_service
+from app.models.notification import NotificationOutbox
+from app.services.email import init_email_service
+from app.services.routing import routing_index
 
 
 class NotificationService:
-    """Service for sending notifications via email and webhooks."""
-    
+    """Service for queueing release notifications via email and webhooks.
+
+    Notifications are written to the outbox in the caller's transaction,
+    so they exist if and only if the release does. Delivery happens later
+    in the outbox dispatcher and never blocks ingestion. Subscribers come
+    from the in-memory routing index, so fan-out needs no queries.
+
+    Subscribers with a coalescing window get their rows held until the
+    window closes; the dispatcher then sends everything held for that
+    destination as a single digest.
+    """
+
+    def enqueue_releases(
+        self,
+        db: Session,
+        project: Project,
+        releases: List[Release],
+    ) -> int:
+        """Queue notifications for new releases to all subscribers."""
+        if not releases:
+            return 0
+
+        routes = routing_index.routes(db, project.id)
+        webhook_subs = [sub for sub in routes.webhooks if sub.notify_releases and sub.url]
+
+        # Queued even while SMTP is unconfigured; the email sender decides at delivery
+        email_subs = []
+        for route in routes.emails:
+            recipient = routing_index.recipient(db, route.user_id)
+            if recipient is not None:
+                email_subs.append((route.subscription_id, recipient.email, recipient.first_name, route.coalesce_seconds))
+
+        now = datetime.utcnow()
+
+        def hold(window: Optional[int]) -> dict:
+            if not window:
+                return {"next_attempt_at": now}
+            return {"next_attempt_at": now + timedelta(seconds=window), "coalesce": True}
+
+        rows = []
+        for release in releases:
+            for sub in webhook_subs:
+                if release.prerelease and not sub.notify_prereleases:
+                    continue
+                json_format = sub.format == "json"
+                rows.append(NotificationOutbox(
+                    release_id=release.id,
+                    channel="webhook" if json_format else "mattermost",
+                    destination=sub.url,
+                    variant=None if json_format else sub.channel,
+                    webhook_subscription_id=sub.id,
+                    **hold(sub.coalesce_seconds),
+                ))
+
+            for hook in routes.subscription_webhooks:
+                rows.append(NotificationOutbox(
+                    release_id=release.id,
+                    channel="webhook",
+                    destination=hook.url,
+                    subscription_id=hook.subscription_id,
+                    **hold(hook.coalesce_seconds),
+                ))
+
+            for subscription_id, email, first_name, window in email_subs:
+                rows.append(NotificationOutbox(
+                    release_id=release.id,
+                    channel="email",
+                    destination=email,
+                    variant=first_name,
+                    subscription_id=subscription_id,
+                    **hold(window),
+                ))
+
+        db.add_all(rows)
+        return len(rows)
+
     async def notify_new_release(
         self,
         db: Session,
         project: Project,
         release: Release,
     ) -> int:
-        """Send notifications for a new release to all subscribers."""
-        # Get all active email subscriptions for this project
-        # Note: In a real app, you'd query the user's email preferences
-        # For now, we send to configured email if enabled
-        
-        notifications_sent = 0
-        
-        # Send email notification if configured
-        if email_service.is_configured():
-            # In production, you'd fetch subscriber emails from DB
-            # For now, we just log that emails would be sent
-            print(f"[EMAIL] Would notify subscribers of {project.name} about v{release.version}")
-        
-        # Send Mattermost webhooks
-        webhook_subs = db.query(WebhookSubscription).filter(
-            WebhookSubscription.project_id == project.id,
-            WebhookSubscription.notify_releases == True,
-            WebhookSubscription.is_active == True,
-        ).all()
-        
-        for sub in webhook_subs:
-            if sub.webhook_url:
-                success = await mattermost_service.notify_release(
-                    webhook_url=sub.webhook_url,
-                    channel=sub.channel,
-                    project_name=project.name,
-                    version=release.version,
-                    release_url=f"https://example.com/projects/{project.id}/releases/{release.id}",
-                    changelog=release.changelog,
-                    prerelease=release.prerelease,
-                )
-                if success:
-                    notifications_sent += 1
-        
-        return notifications_sent
-    
+        """Queue notifications for a new release to all subscribers."""
+        return self.enqueue_releases(db, project, [release])
+
     async def notify_release_batch(
         self,
         db: Session,
         project: Project,
         releases: List[Release],
     ) -> int:
-        """Send notifications for multiple releases."""
-        notifications_sent = 0
-        
-        for release in releases:
-            sent = await self.notify_new_release(db, project, release)
-            notifications_sent += sent
-        
-        return notifications_sent
-
+        """Queue notifications for multiple releases."""
+        return self.enqueue_releases(db, project, releases)
 
-# Import webhook subscription for notification service
-from app.models.webhook import WebhookSubscription
 
 # Global service instance
 notification_service = NotificationService()
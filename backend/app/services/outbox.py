@@ -0,0 +1,795 @@
+import asyncio
+import datetime
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+import httpx
+from sqlalchemy import and_, bindparam, case, func, or_, update
+from sqlalchemy.orm import Session, selectinload, sessionmaker
+from app.core.instrumentation import DELIVERY_SECONDS
+from app.models.notification import NotificationOutbox
+from app.models.project import Project
+from app.models.release import ChangelogSummary, Release
+from app.models.webhook import WebhookSubscription
+from app.services.breaker import CircuitBreakers
+from app.services.ledger import DeliveryLedger, LedgerKey, ledger_key
+
+
+PENDING = "pending"
+SENDING = "sending"
+DELIVERED = "delivered"
+DEAD = "dead"
+
+# Channels whose due rows for one endpoint go out together in a single request
+BATCHED_CHANNELS = {"webhook"}
+
+
+class DeliveryError(Exception):
+    """Raised by a sender when a delivery attempt failed and may be retried."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class Outcome:
+    """Result of one delivery attempt."""
+    delivery: "Delivery"
+    error: Optional[str]
+    status_code: Optional[int] = None
+    latency_ms: float = 0.0
+
+
+@dataclass
+class Delivery:
+    """A claimed outbox row with everything needed to send it.
+
+    A digest carries all coalesced rows in `items` (oldest first) and takes
+    its own fields from the first of them.
+    """
+    id: int
+    channel: str
+    destination: str
+    variant: Optional[str]
+    attempts: int
+    release_id: int
+    version: str
+    changelog: Optional[str]
+    prerelease: bool
+    project_id: int
+    project_name: str
+    project_icon: Optional[str]
+    release_date: Optional[datetime.datetime] = None
+    summary: Optional[str] = None  # Precomputed changelog summary, if ready
+    subscription_id: Optional[int] = None
+    webhook_subscription_id: Optional[int] = None
+    secret: Optional[str] = None  # Signs generic JSON webhooks
+    items: List["Delivery"] = field(default_factory=list)
+
+    @property
+    def row_ids(self) -> List[int]:
+        return [item.id for item in self.items] or [self.id]
+
+    @property
+    def ledger_keys(self) -> List[LedgerKey]:
+        return [
+            ledger_key(item.release_id, item.channel, item.destination, item.variant)
+            for item in self.items or [self]
+        ]
+
+    @property
+    def webhook_ids(self) -> Set[int]:
+        return {item.webhook_subscription_id for item in self.items or [self] if item.webhook_subscription_id}
+
+
+# Senders may return the HTTP status of a successful delivery
+Sender = Callable[[Delivery], Awaitable[Optional[int]]]
+
+
+def destination_key(delivery: Delivery) -> str:
+    """Key for per-destination concurrency limits."""
+    return f"{delivery.channel}:{delivery.destination}"
+
+
+def group_key(row: NotificationOutbox) -> tuple:
+    """Rows with equal keys may be sent as one digest or batch.
+
+    Batched channels are signed per subscription, so their rows are only
+    grouped with those of the same subscription.
+    """
+    if row.channel in BATCHED_CHANNELS:
+        return (row.channel, row.destination, row.webhook_subscription_id, row.subscription_id)
+    return (row.channel, row.destination, row.variant)
+
+
+def retry_delay(attempts: int, base: float, cap: float) -> float:
+    """Exponential backoff with jitter: half fixed, half random."""
+    delay = min(cap, base * (2 ** max(attempts - 1, 0)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class OutboxDispatcher:
+    """Drains the notification outbox with a pool of async delivery workers.
+
+    A poller claims due rows (leasing them by pushing `next_attempt_at`
+    forward, so rows of a crashed worker are picked up again) and runs up
+    to `workers` deliveries at once. A destination never has more than
+    `per_destination_limit` deliveries in flight: extra rows for it are
+    handed back for a later poll rather than parked on a worker, so one
+    slow endpoint can't starve the others. Failures are retried with
+    jittered exponential backoff, and rows that keep failing end up in the
+    dead state.
+
+    Generic JSON webhooks are batched: all of an endpoint's due rows are
+    sent in one request of up to `max_batch_releases` releases.
+
+    Every delivery is recorded in the delivery ledger, and claimed rows
+    whose (release, channel, destination) already went out are marked
+    delivered without being sent again, so retries after a lost outcome
+    and replays of a window of rows can't notify anyone twice.
+
+    Each destination also has a circuit breaker: after repeated failures
+    its rows are held back without using a worker until a single probe
+    gets through. Webhook subscriptions record their latency and success,
+    and a webhook failing `disable_after` times in a row is switched off.
+
+    Database work runs in threads so a slow database never stalls the
+    event loop serving API requests, and outcomes are written in batches:
+    while one batch is being stored the next one accumulates.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        senders: Dict[str, Sender],
+        workers: int = 8,
+        batch_size: int = 100,
+        poll_interval: float = 2.0,
+        per_destination_limit: int = 2,
+        max_attempts: int = 8,
+        retry_base_seconds: float = 30,
+        retry_max_seconds: float = 3600,
+        lease_seconds: float = 300,
+        record_interval: float = 0.05,
+        breakers: Optional[CircuitBreakers] = None,
+        disable_after: int = 25,
+        max_batch_releases: int = 100,
+        ledger: Optional[DeliveryLedger] = None,
+    ):
+        self.session_factory = session_factory
+        self.senders = senders
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.per_destination_limit = per_destination_limit
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.lease_seconds = lease_seconds
+        self.record_interval = record_interval
+        self.breakers = breakers or CircuitBreakers()
+        self.disable_after = disable_after
+        self.max_batch_releases = max_batch_releases
+        self.ledger = ledger or DeliveryLedger()
+        self.duplicates = 0
+        self._active: Dict[str, int] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self._tasks: List[asyncio.Task] = []
+        self._results: List[Outcome] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _claim(self, limit: int) -> List[Delivery]:
+        """Claim up to `limit` due deliveries for this worker."""
+        db: Session = self.session_factory()
+        try:
+            now = datetime.datetime.utcnow()
+            due = or_(
+                and_(NotificationOutbox.status == PENDING, NotificationOutbox.next_attempt_at <= now),
+                # Lease expired: the worker that claimed it is gone
+                and_(NotificationOutbox.status == SENDING, NotificationOutbox.next_attempt_at <= now),
+            )
+            # Lock only outbox rows; SKIP LOCKED lets several workers claim side by side
+            rows = (
+                db.query(NotificationOutbox)
+                .filter(due)
+                .order_by(NotificationOutbox.next_attempt_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not rows:
+                db.commit()
+                return []
+
+            # The first row of a coalescing window to fall due takes along
+            # everything else still held for the same destination
+            claimed_ids = {row.id for row in rows}
+            for key in {group_key(row) for row in rows if row.coalesce}:
+                channel, destination = key[:2]
+                if channel in BATCHED_CHANNELS:
+                    same_group = and_(
+                        NotificationOutbox.webhook_subscription_id.is_not_distinct_from(key[2]),
+                        NotificationOutbox.subscription_id.is_not_distinct_from(key[3]),
+                    )
+                else:
+                    same_group = NotificationOutbox.variant.is_not_distinct_from(key[2])
+                held = (
+                    db.query(NotificationOutbox)
+                    .filter(
+                        NotificationOutbox.destination == destination,
+                        NotificationOutbox.status == PENDING,
+                        NotificationOutbox.channel == channel,
+                        same_group,
+                        NotificationOutbox.coalesce == True,
+                        NotificationOutbox.id.notin_(claimed_ids),
+                    )
+                    .with_for_update(skip_locked=True)
+                    .all()
+                )
+                rows.extend(held)
+                claimed_ids.update(row.id for row in held)
+
+            # Drop anything the ledger knows went out already
+            self.ledger.refresh(db)
+            keys = {row.id: ledger_key(row.release_id, row.channel, row.destination, row.variant) for row in rows}
+            delivered = self.ledger.delivered(db, keys.values())
+            if delivered:
+                duplicates = [row for row in rows if keys[row.id] in delivered]
+                for row in duplicates:
+                    row.status = DELIVERED
+                    row.delivered_at = now
+                    row.last_error = None
+                self.duplicates += len(duplicates)
+                rows = [row for row in rows if keys[row.id] not in delivered]
+                if not rows:
+                    db.commit()
+                    return []
+
+            release_ids = {row.release_id for row in rows}
+            releases = {
+                release.id: (release, project, summary)
+                for release, project, summary in (
+                    db.query(Release, Project, ChangelogSummary.summary)
+                    .join(Project, Release.project_id == Project.id)
+                    .outerjoin(ChangelogSummary, ChangelogSummary.content_hash == Release.changelog_sha256)
+                    .filter(Release.id.in_(release_ids))
+                    .options(selectinload(Release.changelog_blob))
+                )
+            }
+
+            secrets: Dict[int, Optional[str]] = {}
+            webhook_ids = {
+                row.webhook_subscription_id
+                for row in rows
+                if row.channel in BATCHED_CHANNELS and row.webhook_subscription_id
+            }
+            if webhook_ids:
+                secrets = dict(
+                    db.query(WebhookSubscription.id, WebhookSubscription.webhook_secret)
+                    .filter(WebhookSubscription.id.in_(webhook_ids))
+                    .all()
+                )
+
+            lease_until = now + datetime.timedelta(seconds=self.lease_seconds)
+            deliveries = []
+            digests: Dict[tuple, List[Delivery]] = {}
+            for row in rows:
+                row.status = SENDING
+                row.attempts += 1
+                row.next_attempt_at = lease_until
+                release, project, summary = releases[row.release_id]
+                delivery = Delivery(
+                    id=row.id,
+                    channel=row.channel,
+                    destination=row.destination,
+                    variant=row.variant,
+                    attempts=row.attempts,
+                    release_id=release.id,
+                    version=release.version,
+                    changelog=release.changelog,
+                    prerelease=release.prerelease,
+                    project_id=project.id,
+                    project_name=project.name,
+                    project_icon=project.avatar_url,
+                    release_date=release.release_date,
+                    summary=summary,
+                    subscription_id=row.subscription_id,
+                    webhook_subscription_id=row.webhook_subscription_id,
+                    secret=secrets.get(row.webhook_subscription_id),
+                )
+                if row.coalesce or row.channel in BATCHED_CHANNELS:
+                    digests.setdefault(group_key(row), []).append(delivery)
+                else:
+                    deliveries.append(delivery)
+
+            for group in digests.values():
+                group.sort(key=lambda item: item.release_id)
+                for start in range(0, len(group), self.max_batch_releases):
+                    items = group[start:start + self.max_batch_releases]
+                    if len(items) == 1:
+                        deliveries.append(items[0])
+                        continue
+                    deliveries.append(Delivery(**{
+                        **items[0].__dict__,
+                        "attempts": max(item.attempts for item in items),
+                        "items": items,
+                    }))
+            db.commit()
+            return deliveries
+        finally:
+            db.close()
+
+    def _record(self, results: List[Outcome]) -> None:
+        """Store the outcome of a batch of attempts in one transaction."""
+        db: Session = self.session_factory()
+        try:
+            now = datetime.datetime.utcnow()
+            succeeded = [outcome.delivery for outcome in results if outcome.error is None]
+            delivered = [row_id for delivery in succeeded for row_id in delivery.row_ids]
+            if delivered:
+                # Successes are the common case: one statement for all of them
+                db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(delivered)).update({
+                    NotificationOutbox.status: DELIVERED,
+                    NotificationOutbox.delivered_at: now,
+                    NotificationOutbox.last_error: None,
+                }, synchronize_session=False)
+                self.ledger.record(db, [key for delivery in succeeded for key in delivery.ledger_keys], now)
+
+            for outcome in results:
+                delivery, error = outcome.delivery, outcome.error
+                if error is None:
+                    continue
+                if delivery.attempts >= self.max_attempts:
+                    values = {NotificationOutbox.status: DEAD}
+                else:
+                    values = {
+                        NotificationOutbox.status: PENDING,
+                        NotificationOutbox.next_attempt_at: now + datetime.timedelta(
+                            seconds=retry_delay(delivery.attempts, self.retry_base_seconds, self.retry_max_seconds)
+                        ),
+                    }
+                values[NotificationOutbox.last_error] = error
+                db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(delivery.row_ids)).update(
+                    values, synchronize_session=False
+                )
+
+            disabled = self._record_health(db, results, now)
+            db.commit()
+        finally:
+            db.close()
+
+        if disabled:
+            from app.services.routing import notify_subscriptions_changed
+            for webhook_id, project_id in disabled:
+                print(f"[Outbox] Webhook {webhook_id} disabled after {self.disable_after} consecutive failures")
+                notify_subscriptions_changed(project_id)
+
+    def _record_health(self, db: Session, results: List[Outcome], now: datetime.datetime) -> List[Tuple[int, int]]:
+        """Update per-webhook delivery stats; returns webhooks switched off."""
+        successes, failures = [], []
+        for outcome in results:
+            for webhook_id in outcome.delivery.webhook_ids:
+                params = {"webhook_id": webhook_id, "status": outcome.status_code}
+                if outcome.error is None:
+                    successes.append({**params, "latency": outcome.latency_ms})
+                else:
+                    failures.append(params)
+
+        # Core statements, executed once per batch with a row of parameters per webhook
+        webhooks = WebhookSubscription.__table__
+        webhook_id = bindparam("webhook_id")
+        if successes:
+            latency = bindparam("latency")
+            db.execute(
+                update(webhooks)
+                .where(webhooks.c.id == webhook_id)
+                .values(
+                    failure_count=0,
+                    success_count=func.coalesce(webhooks.c.success_count, 0) + 1,
+                    last_status_code=func.coalesce(bindparam("status"), webhooks.c.last_status_code),
+                    last_delivery_at=now,
+                    latency_ms=case(
+                        (webhooks.c.latency_ms.is_(None), latency),
+                        else_=webhooks.c.latency_ms * 0.8 + latency * 0.2,
+                    ),
+                ),
+                successes,
+            )
+        if not failures:
+            return []
+
+        db.execute(
+            update(webhooks)
+            .where(webhooks.c.id == webhook_id)
+            .values(
+                failure_count=func.coalesce(webhooks.c.failure_count, 0) + 1,
+                last_status_code=bindparam("status"),
+            ),
+            failures,
+        )
+
+        disabled = (
+            db.query(WebhookSubscription.id, WebhookSubscription.project_id)
+            .filter(
+                WebhookSubscription.id.in_({params["webhook_id"] for params in failures}),
+                WebhookSubscription.is_active == True,
+                WebhookSubscription.failure_count >= self.disable_after,
+            )
+            .all()
+        )
+        if disabled:
+            ids = [webhook_id for webhook_id, _ in disabled]
+            db.query(WebhookSubscription).filter(WebhookSubscription.id.in_(ids)).update({
+                WebhookSubscription.is_active: False,
+                WebhookSubscription.disabled_at: now,
+            }, synchronize_session=False)
+            # Nothing queued for them will get through either
+            db.query(NotificationOutbox).filter(
+                NotificationOutbox.webhook_subscription_id.in_(ids),
+                NotificationOutbox.status == PENDING,
+            ).update({
+                NotificationOutbox.status: DEAD,
+                NotificationOutbox.last_error: "Webhook disabled after repeated failures",
+            }, synchronize_session=False)
+        return [tuple(row) for row in disabled]
+
+    def _defer(self, ids: List[int], delay: Optional[float] = None) -> None:
+        """Hand claimed rows back without counting the attempt."""
+        db: Session = self.session_factory()
+        try:
+            db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids)).update({
+                NotificationOutbox.status: PENDING,
+                NotificationOutbox.attempts: NotificationOutbox.attempts - 1,
+                NotificationOutbox.next_attempt_at: datetime.datetime.utcnow()
+                + datetime.timedelta(seconds=self.poll_interval if delay is None else delay),
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    async def attempt(self, delivery: Delivery) -> Outcome:
+        """Attempt one delivery and time it."""
+        sender = self.senders.get(delivery.channel)
+        if sender is None:
+            DELIVERY_SECONDS.labels(delivery.channel, "no_sender").observe(0)
+            return Outcome(delivery, f"No sender for channel '{delivery.channel}'")
+        started = time.perf_counter()
+        try:
+            status_code = await sender(delivery)
+        except Exception as e:
+            DELIVERY_SECONDS.labels(delivery.channel, "error").observe(time.perf_counter() - started)
+            return Outcome(delivery, str(e) or e.__class__.__name__, getattr(e, "status_code", None))
+        elapsed = time.perf_counter() - started
+        DELIVERY_SECONDS.labels(delivery.channel, "success").observe(elapsed)
+        return Outcome(delivery, None, status_code, elapsed * 1000)
+
+    async def deliver(self, delivery: Delivery) -> Optional[str]:
+        """Attempt one delivery; returns the error, if any."""
+        return (await self.attempt(delivery)).error
+
+    async def _run(self, delivery: Delivery, key: str) -> None:
+        try:
+            outcome = await self.attempt(delivery)
+        finally:
+            self._active[key] -= 1
+            if not self._active[key]:
+                del self._active[key]
+
+        self.breakers.record(key, outcome.error is None)
+        if outcome.error is None:
+            # Known at once, even if storing the outcome fails and the lease runs out
+            self.ledger.remember(delivery.ledger_keys)
+        self._results.append(outcome)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+
+    async def _flush(self) -> None:
+        while self._results:
+            # Let outcomes pile up so each transaction stores many of them
+            await asyncio.sleep(self.record_interval)
+            batch, self._results = self._results, []
+            try:
+                await asyncio.to_thread(self._record, batch)
+            except Exception as e:
+                # The rows stay leased and are retried once the lease expires
+                print(f"[Outbox] Failed to record {len(batch)} results: {e}")
+
+    async def flush(self) -> None:
+        """Wait until all finished deliveries have been recorded."""
+        while self._flusher is not None and not self._flusher.done():
+            await self._flusher
+
+    async def run_once(self, wait: bool = True) -> int:
+        """Claim due rows and start delivering them.
+
+        Returns the number of deliveries started. With `wait`, returns only
+        once they have all finished.
+        """
+        room = min(self.workers - len(self._inflight), self.batch_size)
+        if room <= 0:
+            return 0
+
+        deliveries = await asyncio.to_thread(self._claim, room)
+        started, deferred, held = [], [], {}
+        for delivery in deliveries:
+            key = destination_key(delivery)
+            if self._active.get(key, 0) >= self.per_destination_limit:
+                deferred.extend(delivery.row_ids)
+                continue
+            hold_for = self.breakers.acquire(key)
+            if hold_for is not None:
+                # Circuit open: park the rows until the destination may be tried again
+                held.setdefault(hold_for, []).extend(delivery.row_ids)
+                continue
+            self._active[key] = self._active.get(key, 0) + 1
+            task = asyncio.create_task(self._run(delivery, key))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+            started.append(task)
+
+        if deferred:
+            await asyncio.to_thread(self._defer, deferred)
+        for hold_for, ids in held.items():
+            await asyncio.to_thread(self._defer, ids, hold_for)
+        if wait and started:
+            await asyncio.gather(*started)
+            await self.flush()
+        return len(started)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                started = await self.run_once(wait=False)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Outbox] Dispatch failed: {e}")
+                started = 0
+            if len(self._inflight) >= self.workers:
+                # All workers busy: claim again once half of them are free
+                while len(self._inflight) > self.workers // 2:
+                    await asyncio.wait(self._inflight, return_when=asyncio.FIRST_COMPLETED)
+            elif not started:
+                await asyncio.sleep(self.poll_interval)
+
+    async def start(self) -> None:
+        """Start the background poller."""
+        if not self._tasks:
+            self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self) -> None:
+        """Stop the poller; claimed rows are retried once their lease expires."""
+        tasks = self._tasks + list(self._inflight)
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+        await self.flush()
+
+    def stats(self, db: Session) -> Dict[str, int]:
+        """Row counts per status."""
+        rows = (
+            db.query(NotificationOutbox.status, func.count(NotificationOutbox.id))
+            .group_by(NotificationOutbox.status)
+            .all()
+        )
+        return {status: count for status, count in rows}
+
+    def requeue_dead(self, db: Session) -> int:
+        """Give dead-lettered rows a fresh set of attempts."""
+        count = (
+            db.query(NotificationOutbox)
+            .filter(NotificationOutbox.status == DEAD)
+            .update({
+                NotificationOutbox.status: PENDING,
+                NotificationOutbox.attempts: 0,
+                NotificationOutbox.next_attempt_at: datetime.datetime.utcnow(),
+            }, synchronize_session=False)
+        )
+        db.commit()
+        return count
+
+    def replay(
+        self,
+        db: Session,
+        since: datetime.datetime,
+        until: Optional[datetime.datetime] = None,
+    ) -> Dict[str, int]:
+        """Queue every finished row created in a time window once more.
+
+        Rows whose notification is in the delivery ledger are left alone,
+        so a window can be replayed after an incident without knowing which
+        of its deliveries actually made it.
+        """
+        query = db.query(
+            NotificationOutbox.id,
+            NotificationOutbox.release_id,
+            NotificationOutbox.channel,
+            NotificationOutbox.destination,
+            NotificationOutbox.variant,
+        ).filter(
+            NotificationOutbox.created_at >= since,
+            NotificationOutbox.status.in_([DELIVERED, DEAD]),
+        )
+        if until is not None:
+            query = query.filter(NotificationOutbox.created_at < until)
+        rows = query.all()
+
+        self.ledger.refresh(db)
+        keys = {row.id: ledger_key(row.release_id, row.channel, row.destination, row.variant) for row in rows}
+        delivered = self.ledger.delivered(db, keys.values())
+        ids = [row_id for row_id, key in keys.items() if key not in delivered]
+        now = datetime.datetime.utcnow()
+        for start in range(0, len(ids), 1000):
+            db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids[start:start + 1000])).update({
+                NotificationOutbox.status: PENDING,
+                NotificationOutbox.attempts: 0,
+                NotificationOutbox.next_attempt_at: now,
+                NotificationOutbox.delivered_at: None,
+            }, synchronize_session=False)
+        db.commit()
+        return {"requeued": len(ids), "skipped": len(rows) - len(ids)}
+
+
+def release_url(delivery: Delivery) -> str:
+    from app.core.config import get_settings
+    settings = get_settings()
+    return f"{settings.FRONTEND_URL}/projects/{delivery.project_id}/releases/{delivery.release_id}"
+
+
+def digest_releases(delivery: Delivery) -> List[dict]:
+    return [
+        {
+            "project_name": item.project_name,
+            "version": item.version,
+            "prerelease": item.prerelease,
+            "release_url": release_url(item),
+            "date": item.release_date.strftime("%Y-%m-%d") if item.release_date else None,
+        }
+        for item in delivery.items
+    ]
+
+
+async def send_mattermost(delivery: Delivery) -> Optional[int]:
+    from app.services.fanout import payload_cache, webhook_client
+    from app.services.mattermost import MattermostService
+
+    service = MattermostService(channel=delivery.variant)
+    if delivery.items:
+        key = ("mattermost-digest", tuple(item.release_id for item in delivery.items), delivery.variant)
+
+        def render() -> dict:
+            return service.create_release_digest(digest_releases(delivery)).model_dump(exclude_none=True)
+    else:
+        key = ("mattermost", delivery.release_id, delivery.variant)
+
+        def render() -> dict:
+            message = service.create_release_message(
+                project_name=delivery.project_name,
+                version=delivery.version,
+                release_url=release_url(delivery),
+                changelog=delivery.changelog,
+                prerelease=delivery.prerelease,
+                project_icon=delivery.project_icon,
+            )
+            return message.model_dump(exclude_none=True)
+
+    # Every subscription to the same channel gets byte-identical payloads
+    body = payload_cache.get_or_render(key, render)
+    try:
+        response = await webhook_client.post(delivery.destination, body)
+    except httpx.HTTPStatusError as e:
+        code = e.response.status_code
+        raise DeliveryError(f"Mattermost webhook returned HTTP {code}", status_code=code)
+    except httpx.HTTPError as e:
+        raise DeliveryError(f"Mattermost webhook unreachable: {e.__class__.__name__}")
+    return response.status_code
+
+
+def webhook_release(delivery: Delivery) -> dict:
+    return {
+        "id": delivery.release_id,
+        "project": {"id": delivery.project_id, "name": delivery.project_name},
+        "version": delivery.version,
+        "prerelease": delivery.prerelease,
+        "url": release_url(delivery),
+        "release_date": delivery.release_date.isoformat() if delivery.release_date else None,
+        "summary": delivery.summary,
+        "changelog": delivery.changelog,
+    }
+
+
+async def send_webhook(delivery: Delivery) -> int:
+    """POST one or more releases as generic JSON, signed with the webhook secret."""
+    from app.services.fanout import canonical_payload, payload_cache, signed_headers, webhook_client
+
+    items = delivery.items or [delivery]
+
+    def render() -> dict:
+        return {"event": "release.published", "releases": [webhook_release(item) for item in items]}
+
+    # The body only depends on the releases (and whether their summaries are
+    # ready yet); the signature is per subscription
+    key = ("webhook", tuple((item.release_id, item.summary is not None) for item in items))
+    body = payload_cache.get_or_render(key, render, serialize=canonical_payload)
+    try:
+        response = await webhook_client.post(delivery.destination, body, signed_headers(delivery.secret, body))
+    except httpx.HTTPStatusError as e:
+        code = e.response.status_code
+        raise DeliveryError(f"Webhook returned HTTP {code}", status_code=code)
+    except httpx.HTTPError as e:
+        raise DeliveryError(f"Webhook unreachable: {e.__class__.__name__}")
+    return response.status_code
+
+
+async def send_email(delivery: Delivery) -> None:
+    from app.core.config import get_settings
+    from app.services.email import email_service
+
+    settings = get_settings()
+    if not email_service.is_configured():
+        # Retried with backoff, so rows queued before SMTP is set up still go out
+        raise DeliveryError("Email is not configured")
+    manage_url = f"{settings.FRONTEND_URL}/settings"
+    if delivery.subscription_id:
+        manage_url += f"?subscription={delivery.subscription_id}"
+
+    # The body is rendered once per release; only the greeting and link differ
+    if delivery.items:
+        sent = await email_service.send_release_digest(
+            to_email=delivery.destination,
+            releases=digest_releases(delivery),
+            digest_url=f"{settings.FRONTEND_URL}/",
+            recipient_name=delivery.variant,
+            manage_url=manage_url,
+        )
+    else:
+        sent = await email_service.send_release_notification(
+            to_email=delivery.destination,
+            project_name=delivery.project_name,
+            version=delivery.version,
+            release_url=release_url(delivery),
+            changelog=delivery.changelog,
+            prerelease=delivery.prerelease,
+            recipient_name=delivery.variant,
+            manage_url=manage_url,
+        )
+    if not sent:
+        raise DeliveryError("Email delivery failed")
+
+
+def _create_outbox_dispatcher() -> OutboxDispatcher:
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    from app.services.ledger import delivery_ledger
+    settings = get_settings()
+
+    return OutboxDispatcher(
+        session_factory=SessionLocal,
+        senders={"mattermost": send_mattermost, "webhook": send_webhook, "email": send_email},
+        workers=settings.OUTBOX_WORKERS,
+        batch_size=settings.OUTBOX_BATCH_SIZE,
+        poll_interval=settings.OUTBOX_POLL_INTERVAL,
+        per_destination_limit=settings.OUTBOX_PER_DESTINATION_LIMIT,
+        max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+        retry_base_seconds=settings.OUTBOX_RETRY_BASE_SECONDS,
+        retry_max_seconds=settings.OUTBOX_RETRY_MAX_SECONDS,
+        breakers=CircuitBreakers(
+            failure_threshold=settings.WEBHOOK_BREAKER_THRESHOLD,
+            base_seconds=settings.WEBHOOK_BREAKER_BASE_SECONDS,
+            max_seconds=settings.WEBHOOK_BREAKER_MAX_SECONDS,
+        ),
+        disable_after=settings.WEBHOOK_DISABLE_AFTER_FAILURES,
+        max_batch_releases=settings.WEBHOOK_MAX_BATCH_RELEASES,
+        ledger=delivery_ledger,
+    )
+
+
+# Global dispatcher instance
+outbox_dispatcher = _create_outbox_dispatcher()
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import FrozenSet, Optional
+from sqlalchemy.orm import Session
+from app.models.category import Category, ProjectCategory
+from app.models.project import Project
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.schemas.project import ProjectResponse
+from app.services.changelog_store import excerpt_column
+from app.services.events import event_hub, StreamEvent, RELEASE_CREATED, PROJECT_CHANGED
+
+
+RECENT_RELEASES = 5
+EXCERPT_LENGTH = 500
+
+
+@dataclass
+class ProjectDetail:
+    """Read model behind the project detail page.
+
+    `data` holds everything that is the same for every viewer; the
+    per-viewer subscription flag is answered from `subscriber_ids`.
+    """
+    data: dict
+    subscriber_ids: FrozenSet[int]
+
+
+def load_project_detail(db: Session, project_id: int) -> Optional[ProjectDetail]:
+    """Build the project detail read model from the database."""
+    project = db.query(Project).filter(Project.id == project_id).first()
+    if not project:
+        return None
+
+    releases = (
+        db.query(
+            Release.id,
+            Release.version,
+            Release.tag_name,
+            Release.release_date,
+            Release.prerelease,
+            excerpt_column().label("changelog"),
+        )
+        .filter(Release.project_id == project_id)
+        .order_by(Release.version_key.desc(), Release.id.desc())
+        .limit(RECENT_RELEASES)
+        .all()
+    )
+
+    subscriber_ids = frozenset(
+        row[0] for row in db.query(Subscription.user_id).filter(
+            Subscription.project_id == project_id
+        )
+    )
+
+    categories = (
+        db.query(Category.id, Category.name, Category.slug, Category.color, Category.icon)
+        .join(ProjectCategory, ProjectCategory.category_id == Category.id)
+        .filter(ProjectCategory.project_id == project_id)
+        .order_by(Category.name)
+        .all()
+    )
+
+    data = ProjectResponse.model_validate(project).model_dump()
+    data.update({
+        "recent_releases": [
+            {
+                "id": r.id,
+                "version": r.version,
+                "tag_name": r.tag_name,
+                "release_date": r.release_date,
+                "prerelease": r.prerelease,
+                "changelog": r.changelog[:EXCERPT_LENGTH] if r.changelog else None,
+            }
+            for r in releases
+        ],
+        "subscriber_count": len(subscriber_ids),
+        "categories": [dict(c._mapping) for c in categories],
+    })
+
+    return ProjectDetail(data=data, subscriber_ids=subscriber_ids)
+
+
+class ProjectDetailCache:
+    """LRU cache of project detail read models.
+
+    Entries are dropped when a project gets new releases or its
+    subscriptions/categories change (signalled through the event hub, so
+    every worker sees it), and expire after `ttl_seconds` as a backstop.
+    """
+
+    def __init__(self, ttl_seconds: float = 60, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation; loads that raced with one are not stored
+        self._version = 0
+
+    def get(self, project_id: int) -> Optional[ProjectDetail]:
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is None:
+                return None
+            expires_at, detail = entry
+            if expires_at < time.monotonic():
+                del self._entries[project_id]
+                return None
+            self._entries.move_to_end(project_id)
+            return detail
+
+    def get_or_load(self, db: Session, project_id: int) -> Optional[ProjectDetail]:
+        """Return the cached read model, loading it on a miss."""
+        detail = self.get(project_id)
+        if detail is not None:
+            return detail
+
+        version = self._version
+        detail = load_project_detail(db, project_id)
+        if detail is None:
+            return None
+
+        with self._lock:
+            if version == self._version:
+                self._entries[project_id] = (time.monotonic() + self.ttl_seconds, detail)
+                self._entries.move_to_end(project_id)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return detail
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        """Drop one project's entry, or everything when no ID is given."""
+        with self._lock:
+            self._version += 1
+            if project_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(project_id, None)
+
+    def on_event(self, event: StreamEvent) -> None:
+        self.invalidate(event.project_id)
+
+
+def notify_project_changed(project_id: Optional[int] = None) -> None:
+    """Invalidate cached project details here and on every other worker.
+
+    Pass no ID to drop all entries (e.g. a category used by many projects
+    was deleted).
+    """
+    project_cache.invalidate(project_id)
+    event_hub.publish_nowait(PROJECT_CHANGED, {}, project_id=project_id)
+
+
+def _create_project_cache() -> ProjectDetailCache:
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return ProjectDetailCache(
+        ttl_seconds=settings.PROJECT_CACHE_TTL_SECONDS,
+        max_entries=settings.PROJECT_CACHE_MAX_ENTRIES,
+    )
+
+
+# Global cache instance, kept current by release and project change events
+project_cache = _create_project_cache()
+event_hub.add_listener(RELEASE_CREATED, project_cache.on_event)
+event_hub.add_listener(PROJECT_CHANGED, project_cache.on_event)
@@ -0,0 +1,195 @@
+import asyncio
+import datetime
+import time
+from typing import List, Optional, Tuple
+from sqlalchemy import bindparam, false, func, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.dates import naive_utc
+from app.models.project import Project
+from app.models.release import Release
+
+
+def _release_time(release: Release) -> Optional[datetime.datetime]:
+    return naive_utc(release.release_date or release.created_at)
+
+
+def record_new_releases(project: Project, releases: List[Release]) -> None:
+    """Fold releases just added to a project into its stored stats.
+
+    Runs in the ingest transaction, on flushed releases, so the project
+    list reads the stats straight off `projects`. The count is bumped in
+    SQL; the latest release and date compare against what this session
+    loaded, and a concurrent ingest of the same project can leave them
+    behind until `reconcile_project_stats` next runs.
+    """
+    if not releases:
+        return
+    project.release_count = func.coalesce(Project.release_count, 0) + len(releases)
+
+    newest = max((_release_time(release) for release in releases if _release_time(release)), default=None)
+    if newest and (project.last_release_at is None or newest > naive_utc(project.last_release_at)):
+        project.last_release_at = newest
+
+    stable = [release for release in releases if not release.prerelease]
+    if not stable:
+        return
+    # Same order as version_index.latest_release
+    latest = max(stable, key=lambda release: (release.version_key or "", release.id))
+    current = (project.latest_version_key or "", project.latest_release_id or 0)
+    if project.latest_release_id is None or (latest.version_key or "", latest.id) > current:
+        project.latest_release_id = latest.id
+        project.latest_version = latest.version
+        project.latest_version_key = latest.version_key
+
+
+def _latest_stable(db: Session, project_id: int) -> Tuple:
+    row = (
+        db.query(Release.id, Release.version, Release.version_key)
+        .filter(Release.project_id == project_id, Release.prerelease == false())
+        .order_by(Release.version_key.desc(), Release.id.desc())
+        .first()
+    )
+    return tuple(row) if row else (None, None, None)
+
+
+def reconcile_project_stats(session_factory: sessionmaker, batch_size: int = 500) -> Tuple[int, int]:
+    """Recompute project release stats from releases and repair drift.
+
+    Walks projects by primary key, one transaction per `batch_size`
+    projects: one grouped count per batch plus one index seek per project
+    for its latest stable release. Only projects whose stored stats differ
+    are written; returns (projects checked, projects repaired).
+    """
+    projects = Project.__table__
+    checked = repaired = 0
+    last_id = 0
+    while True:
+        db: Session = session_factory()
+        try:
+            rows = (
+                db.query(
+                    Project.id,
+                    Project.latest_release_id,
+                    Project.latest_version,
+                    Project.latest_version_key,
+                    Project.release_count,
+                    Project.last_release_at,
+                )
+                .filter(Project.id > last_id)
+                .order_by(Project.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return checked, repaired
+
+            ids = [row[0] for row in rows]
+            counts = {
+                project_id: (count, last_release_at)
+                for project_id, count, last_release_at in db.query(
+                    Release.project_id,
+                    func.count(Release.id),
+                    func.max(func.coalesce(Release.release_date, Release.created_at)),
+                )
+                .filter(Release.project_id.in_(ids))
+                .group_by(Release.project_id)
+            }
+
+            values = []
+            for project_id, *stored in rows:
+                count, last_release_at = counts.get(project_id, (0, None))
+                actual = [*_latest_stable(db, project_id), count, last_release_at]
+                if stored != actual:
+                    values.append({
+                        "project": project_id,
+                        "release_id": actual[0],
+                        "version": actual[1],
+                        "key": actual[2],
+                        "count": count,
+                        "last_release_at": last_release_at,
+                    })
+            if values:
+                db.execute(
+                    update(projects)
+                    .where(projects.c.id == bindparam("project"))
+                    .values(
+                        latest_release_id=bindparam("release_id"),
+                        latest_version=bindparam("version"),
+                        latest_version_key=bindparam("key"),
+                        release_count=bindparam("count"),
+                        last_release_at=bindparam("last_release_at"),
+                    ),
+                    values,
+                )
+            db.commit()
+            checked += len(rows)
+            repaired += len(values)
+            last_id = ids[-1]
+        finally:
+            db.close()
+
+
+class ProjectStatsReconciler:
+    """Periodically repairs drifted project stats in the background."""
+
+    def __init__(self, session_factory: sessionmaker, batch_size: int = 500, interval: float = 6 * 3600):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> int:
+        """Reconcile every project once; returns the number repaired."""
+        _, repaired = await asyncio.to_thread(reconcile_project_stats, self.session_factory, self.batch_size)
+        return repaired
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                repaired = await self.run()
+                if repaired:
+                    print(f"[ProjectStats] Repaired stats of {repaired} projects")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[ProjectStats] Reconciliation failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def start(self) -> None:
+        """Start the background job."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+
+def _create_project_stats_reconciler() -> ProjectStatsReconciler:
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    settings = get_settings()
+
+    return ProjectStatsReconciler(
+        session_factory=SessionLocal,
+        batch_size=settings.PROJECT_STATS_BATCH_SIZE,
+        interval=settings.PROJECT_STATS_RECONCILE_INTERVAL,
+    )
+
+
+# Global job, started with the app
+project_stats_reconciler = _create_project_stats_reconciler()
+
+
+if __name__ == "__main__":
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+
+    started = time.monotonic()
+    checked, repaired = reconcile_project_stats(SessionLocal, get_settings().PROJECT_STATS_BATCH_SIZE)
+    print(f"[ProjectStats] Checked {checked} projects, repaired {repaired}, in {time.monotonic() - started:.1f}s")
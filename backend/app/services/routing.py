@@ -0,0 +1,296 @@
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.webhook import WebhookSubscription
+from app.services.events import event_hub, StreamEvent, SUBSCRIPTIONS_CHANGED
+
+
+@dataclass(frozen=True)
+class WebhookRoute:
+    """An active webhook subscription and its notification flags."""
+    id: int
+    url: str
+    channel: Optional[str]
+    format: str
+    notify_releases: bool
+    notify_prereleases: bool
+    notify_security: bool
+    coalesce_seconds: int
+
+
+@dataclass(frozen=True)
+class SubscriptionWebhookRoute:
+    """A subscription posting generic JSON to its own URL."""
+    subscription_id: int
+    url: str
+    coalesce_seconds: int
+
+
+@dataclass(frozen=True)
+class EmailRoute:
+    """A subscription with email notifications turned on."""
+    subscription_id: int
+    user_id: int
+    coalesce_seconds: int
+
+
+@dataclass(frozen=True)
+class Recipient:
+    """Where an active user's email goes."""
+    email: str
+    first_name: Optional[str]
+
+
+@dataclass(frozen=True)
+class ProjectRoutes:
+    """Everyone to notify about a project's releases."""
+    emails: Tuple[EmailRoute, ...] = ()
+    webhooks: Tuple[WebhookRoute, ...] = ()
+    subscription_webhooks: Tuple[SubscriptionWebhookRoute, ...] = ()
+
+
+NO_ROUTES = ProjectRoutes()
+
+
+def _webhook_route(row) -> WebhookRoute:
+    id, url, channel, format, notify_releases, notify_prereleases, notify_security, coalesce_seconds = row
+    return WebhookRoute(
+        id=id,
+        url=url,
+        channel=channel,
+        format=format or "mattermost",
+        notify_releases=bool(notify_releases),
+        notify_prereleases=bool(notify_prereleases),
+        notify_security=bool(notify_security),
+        coalesce_seconds=coalesce_seconds or 0,
+    )
+
+
+WEBHOOK_COLUMNS = (
+    WebhookSubscription.id,
+    WebhookSubscription.webhook_url,
+    WebhookSubscription.channel,
+    WebhookSubscription.format,
+    WebhookSubscription.notify_releases,
+    WebhookSubscription.notify_prereleases,
+    WebhookSubscription.notify_security,
+    WebhookSubscription.coalesce_seconds,
+)
+
+
+class RoutingIndex:
+    """In-process index of who is subscribed to what.
+
+    Maps project_id to its email and webhook subscribers (webhook
+    subscriptions as well as subscriptions with their own URL), and user_id to
+    the projects they follow, so release fan-out and feed building don't
+    query the subscription tables. The index is built in full at startup.
+    The subscription, webhook and profile APIs publish a change event after
+    committing; every worker then marks the affected project/user stale and
+    reloads just that entry from the database on its next read.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._projects: Dict[int, ProjectRoutes] = {}
+        self._user_projects: Dict[int, FrozenSet[int]] = {}
+        self._recipients: Dict[int, Recipient] = {}
+        self._stale_projects: Set[int] = set()
+        self._stale_users: Set[int] = set()
+        # Bumped on every invalidation; reloads that raced with one are not stored
+        self._version = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def load(self, db: Session) -> None:
+        """Build the whole index from the database."""
+        with self._lock:
+            version = self._version
+
+        emails: Dict[int, list] = {}
+        hooks: Dict[int, list] = {}
+        user_projects: Dict[int, Set[int]] = {}
+        rows = db.query(
+            Subscription.id,
+            Subscription.user_id,
+            Subscription.project_id,
+            Subscription.notify_email,
+            Subscription.notify_webhook,
+            Subscription.webhook_url,
+            Subscription.coalesce_seconds,
+        )
+        for subscription_id, user_id, project_id, notify_email, notify_webhook, webhook_url, coalesce_seconds in rows:
+            user_projects.setdefault(user_id, set()).add(project_id)
+            if notify_email:
+                emails.setdefault(project_id, []).append(
+                    EmailRoute(subscription_id, user_id, coalesce_seconds or 0)
+                )
+            if notify_webhook and webhook_url:
+                hooks.setdefault(project_id, []).append(
+                    SubscriptionWebhookRoute(subscription_id, webhook_url, coalesce_seconds or 0)
+                )
+
+        webhooks: Dict[int, list] = {}
+        rows = db.query(WebhookSubscription.project_id, *WEBHOOK_COLUMNS).filter(
+            WebhookSubscription.is_active == True,
+        )
+        for project_id, *row in rows:
+            webhooks.setdefault(project_id, []).append(_webhook_route(row))
+
+        recipients = {
+            user_id: Recipient(email, first_name)
+            for user_id, email, first_name in db.query(User.id, User.email, User.first_name).filter(
+                User.is_active == True,
+            )
+        }
+
+        projects = {
+            project_id: ProjectRoutes(
+                emails=tuple(emails.get(project_id, ())),
+                webhooks=tuple(webhooks.get(project_id, ())),
+                subscription_webhooks=tuple(hooks.get(project_id, ())),
+            )
+            for project_id in emails.keys() | webhooks.keys() | hooks.keys()
+        }
+
+        with self._lock:
+            self._projects = projects
+            self._user_projects = {user_id: frozenset(ids) for user_id, ids in user_projects.items()}
+            self._recipients = recipients
+            self._loaded = True
+            if version == self._version:
+                self._stale_projects.clear()
+                self._stale_users.clear()
+
+    def routes(self, db: Session, project_id: int) -> ProjectRoutes:
+        """Email and webhook subscribers of a project."""
+        self._ensure_loaded(db)
+        if project_id in self._stale_projects:
+            self._reload_project(db, project_id)
+        return self._projects.get(project_id, NO_ROUTES)
+
+    def recipient(self, db: Session, user_id: int) -> Optional[Recipient]:
+        """Email address and name of an active user, or None."""
+        self._ensure_loaded(db)
+        if user_id in self._stale_users:
+            self._reload_user(db, user_id)
+        return self._recipients.get(user_id)
+
+    def project_ids(self, db: Session, user_id: int) -> FrozenSet[int]:
+        """IDs of the projects a user is subscribed to."""
+        self._ensure_loaded(db)
+        if user_id in self._stale_users:
+            self._reload_user(db, user_id)
+        return self._user_projects.get(user_id, frozenset())
+
+    def _ensure_loaded(self, db: Session) -> None:
+        if not self._loaded:
+            self.load(db)
+
+    def _reload_project(self, db: Session, project_id: int) -> None:
+        with self._lock:
+            version = self._version
+
+        emails, hooks = [], []
+        rows = db.query(
+            Subscription.id,
+            Subscription.user_id,
+            Subscription.notify_email,
+            Subscription.notify_webhook,
+            Subscription.webhook_url,
+            Subscription.coalesce_seconds,
+        ).filter(Subscription.project_id == project_id)
+        for subscription_id, user_id, notify_email, notify_webhook, webhook_url, coalesce_seconds in rows:
+            if notify_email:
+                emails.append(EmailRoute(subscription_id, user_id, coalesce_seconds or 0))
+            if notify_webhook and webhook_url:
+                hooks.append(SubscriptionWebhookRoute(subscription_id, webhook_url, coalesce_seconds or 0))
+        webhooks = tuple(
+            _webhook_route(row)
+            for row in db.query(*WEBHOOK_COLUMNS).filter(
+                WebhookSubscription.project_id == project_id,
+                WebhookSubscription.is_active == True,
+            )
+        )
+
+        with self._lock:
+            if emails or webhooks or hooks:
+                self._projects[project_id] = ProjectRoutes(
+                    emails=tuple(emails),
+                    webhooks=webhooks,
+                    subscription_webhooks=tuple(hooks),
+                )
+            else:
+                self._projects.pop(project_id, None)
+            if version == self._version:
+                self._stale_projects.discard(project_id)
+
+    def _reload_user(self, db: Session, user_id: int) -> None:
+        with self._lock:
+            version = self._version
+
+        user = db.query(User.email, User.first_name).filter(
+            User.id == user_id,
+            User.is_active == True,
+        ).first()
+        project_ids = frozenset(
+            row[0] for row in db.query(Subscription.project_id).filter(Subscription.user_id == user_id)
+        )
+
+        with self._lock:
+            if user:
+                self._recipients[user_id] = Recipient(user.email, user.first_name)
+            else:
+                self._recipients.pop(user_id, None)
+            if project_ids:
+                self._user_projects[user_id] = project_ids
+            else:
+                self._user_projects.pop(user_id, None)
+            if version == self._version:
+                self._stale_users.discard(user_id)
+
+    def invalidate(self, project_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+        """Mark a project's and/or a user's entries for reload on next read."""
+        with self._lock:
+            self._version += 1
+            if project_id is not None:
+                self._stale_projects.add(project_id)
+            if user_id is not None:
+                self._stale_users.add(user_id)
+
+    def reset(self) -> None:
+        """Forget everything; the next read rebuilds the whole index."""
+        with self._lock:
+            self._version += 1
+            self._loaded = False
+            self._projects = {}
+            self._user_projects = {}
+            self._recipients = {}
+            self._stale_projects.clear()
+            self._stale_users.clear()
+
+    def on_event(self, event: StreamEvent) -> None:
+        user_id = json.loads(event.data).get("data", {}).get("user_id")
+        self.invalidate(event.project_id, user_id)
+
+
+def notify_subscriptions_changed(project_id: Optional[int] = None, user_id: Optional[int] = None) -> None:
+    """Refresh routing entries here and on every other worker.
+
+    Call after committing a change to a subscription or webhook (pass its
+    project and owner) or to a user's profile (pass the user).
+    """
+    routing_index.invalidate(project_id, user_id)
+    event_hub.publish_nowait(SUBSCRIPTIONS_CHANGED, {"user_id": user_id}, project_id=project_id)
+
+
+# Global index instance, kept current by subscription change events
+routing_index = RoutingIndex()
+event_hub.add_listener(SUBSCRIPTIONS_CHANGED, routing_index.on_event)
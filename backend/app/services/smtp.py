@@ -0,0 +1,174 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from email.message import Message
+from typing import List, Optional
+
+
+class RateLimiter:
+    """Token bucket limiting how fast messages are handed to the relay.
+
+    A rate of 0 disables the limit.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class PooledConnection:
+    """An open SMTP session and how much it has been used."""
+    client: object
+    messages: int = 0
+    last_used: float = 0.0
+
+
+class SMTPPool:
+    """Bounded pool of long-lived, authenticated SMTP sessions.
+
+    `aiosmtplib.send` connects, negotiates TLS and logs in for every
+    message. The pool keeps up to `max_connections` sessions open and sends
+    many messages over each: a session is recycled after
+    `max_messages_per_connection` messages (relays cap this) or when it has
+    been idle longer than `idle_timeout`. A send that fails because the
+    session dropped is retried once on a fresh connection. The pool is
+    bound to the event loop it was first used on.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        max_connections: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        rate_limit: float = 0.0,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username or None
+        self.password = password or None
+        self.use_tls = use_tls
+        self.max_connections = max_connections
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.limiter = RateLimiter(rate_limit)
+        self._idle: List[PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.connects = 0
+
+    def _bind(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Sessions opened on another loop can't be used here
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.max_connections)
+            self.limiter = RateLimiter(self.limiter.rate, self.limiter.capacity)
+            self._loop = loop
+
+    async def _connect(self) -> PooledConnection:
+        import aiosmtplib
+
+        client = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            timeout=self.timeout,
+        )
+        await client.connect()
+        self.connects += 1
+        return PooledConnection(client=client, last_used=time.monotonic())
+
+    async def _checkout(self) -> PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.client.is_connected and time.monotonic() - conn.last_used < self.idle_timeout:
+                return conn
+            await self._discard(conn)
+        return await self._connect()
+
+    async def _checkin(self, conn: PooledConnection) -> None:
+        conn.last_used = time.monotonic()
+        if conn.messages >= self.max_messages_per_connection or not conn.client.is_connected:
+            await self._discard(conn, polite=True)
+        else:
+            self._idle.append(conn)
+
+    async def _discard(self, conn: PooledConnection, polite: bool = False) -> None:
+        try:
+            if polite and conn.client.is_connected:
+                await conn.client.quit()
+            else:
+                conn.client.close()
+        except Exception:
+            conn.client.close()
+
+    async def send(self, message: Message) -> None:
+        """Send one message over a pooled session; raises on failure."""
+        import aiosmtplib
+
+        self._bind()
+        await self.limiter.acquire()
+        async with self._slots:
+            for attempt in range(2):
+                conn = await self._checkout()
+                try:
+                    await conn.client.send_message(message)
+                except (aiosmtplib.SMTPServerDisconnected, ConnectionError, asyncio.TimeoutError):
+                    # The session went away under us: retry once on a new one
+                    await self._discard(conn)
+                    if attempt:
+                        raise
+                    continue
+                except aiosmtplib.SMTPException:
+                    # The relay refused this message; the session is still good
+                    await self._checkin(conn)
+                    raise
+                except BaseException:
+                    await self._discard(conn)
+                    raise
+                conn.messages += 1
+                await self._checkin(conn)
+                return
+
+    async def send_many(self, messages: List[Message]) -> List[Optional[Exception]]:
+        """Send messages concurrently; returns the error per message, if any."""
+        async def one(message):
+            try:
+                await self.send(message)
+            except Exception as e:
+                return e
+            return None
+
+        return await asyncio.gather(*(one(message) for message in messages))
+
+    async def close(self) -> None:
+        """Close all idle sessions."""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._discard(conn, polite=self._loop is asyncio.get_running_loop())
@@ -0,0 +1,222 @@
+import enum
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.project import Project
+from app.models.release import Release, ReleaseAsset
+from app.services.changelog_store import changelog_columns, join_changelog_blobs, with_changelog_text
+
+
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_TABLES = ("releases", "projects", "release_assets")
+
+
+class SnapshotError(Exception):
+    """Raised when a snapshot can't be produced."""
+
+
+def _schemas() -> dict:
+    """Arrow schemas per table (column order matches the SELECT)."""
+    import pyarrow as pa
+
+    ts = pa.timestamp("us")
+    return {
+        "releases": pa.schema([
+            ("id", pa.int64()),
+            ("project_id", pa.int64()),
+            ("version", pa.string()),
+            ("tag_name", pa.string()),
+            ("release_date", ts),
+            ("changelog", pa.string()),
+            ("changelog_url", pa.string()),
+            ("draft", pa.bool_()),
+            ("prerelease", pa.bool_()),
+            ("created_at", ts),
+        ]),
+        "projects": pa.schema([
+            ("id", pa.int64()),
+            ("name", pa.string()),
+            ("source", pa.string()),
+            ("external_id", pa.string()),
+            ("repo_url", pa.string()),
+            ("description", pa.string()),
+            ("avatar_url", pa.string()),
+            ("last_checked_at", ts),
+            ("created_at", ts),
+            ("updated_at", ts),
+        ]),
+        "release_assets": pa.schema([
+            ("id", pa.int64()),
+            ("release_id", pa.int64()),
+            ("name", pa.string()),
+            ("download_url", pa.string()),
+            ("size", pa.int64()),
+            ("content_type", pa.string()),
+            ("created_at", ts),
+        ]),
+    }
+
+
+class SnapshotService:
+    """Incremental columnar (Parquet) snapshots of the release catalog.
+
+    Each run exports releases above the previous high-water mark on
+    `Release.id`, the assets belonging to them, and a full copy of the
+    (small, mutable) projects table. Rows are streamed from a server-side
+    cursor and written in bounded row groups, so memory use depends on
+    the row group size rather than the table size.
+
+    Requires the optional `pyarrow` package.
+    """
+
+    def __init__(self, directory: str, row_group_size: int = 50000, compression: str = "zstd"):
+        self.directory = directory
+        self.row_group_size = row_group_size
+        self.compression = compression
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def load_manifest(self) -> dict:
+        """Read the manifest, or an empty one before the first run."""
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return {"high_water_mark": 0, "snapshots": []}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save_manifest(self, manifest: dict) -> None:
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def file_path(self, snapshot_id: int, table: str) -> Optional[str]:
+        """Path of one table file of a snapshot, if it exists."""
+        if table not in SNAPSHOT_TABLES:
+            return None
+        for snapshot in self.load_manifest()["snapshots"]:
+            if snapshot["id"] == snapshot_id:
+                path = os.path.join(self.directory, snapshot["files"][table])
+                return path if os.path.exists(path) else None
+        return None
+
+    def run(self, db: Session) -> Optional[dict]:
+        """Export everything added since the last run.
+
+        Returns the new manifest entry, or None when there are no new
+        releases. Raises SnapshotError if a run is already in progress or
+        pyarrow isn't installed.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise SnapshotError("A snapshot is already running")
+        try:
+            return self._run(db)
+        finally:
+            self._lock.release()
+
+    def _run(self, db: Session) -> Optional[dict]:
+        try:
+            schemas = _schemas()
+        except ImportError:
+            raise SnapshotError("pyarrow is required for columnar snapshots")
+
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.load_manifest()
+        low = manifest["high_water_mark"]
+        # Fix the upper bound first so rows ingested during the run go to the next one
+        high = db.query(func.max(Release.id)).scalar() or 0
+        if high <= low:
+            return None
+
+        snapshot_id = len(manifest["snapshots"]) + 1
+        files = {table: f"{table}-{snapshot_id:05d}.parquet" for table in SNAPSHOT_TABLES}
+
+        queries = {
+            "releases": join_changelog_blobs(db.query(*self._columns(Release, schemas["releases"])))
+                .filter(Release.id > low, Release.id <= high)
+                .order_by(Release.id),
+            "release_assets": db.query(*self._columns(ReleaseAsset, schemas["release_assets"]))
+                .filter(ReleaseAsset.release_id > low, ReleaseAsset.release_id <= high)
+                .order_by(ReleaseAsset.id),
+            "projects": db.query(*self._columns(Project, schemas["projects"]))
+                .order_by(Project.id),
+        }
+
+        rows = {}
+        for table, query in queries.items():
+            path = os.path.join(self.directory, files[table])
+            results = query.yield_per(self.row_group_size)
+            if table == "releases":
+                results = with_changelog_text(results, schemas[table].names.index("changelog"))
+            rows[table] = self._write_parquet(results, schemas[table], path)
+
+        entry = {
+            "id": snapshot_id,
+            "created_at": datetime.utcnow().isoformat(),
+            "release_id_from": low + 1,
+            "release_id_to": high,
+            "files": files,
+            "rows": rows,
+        }
+        # Only advance the high-water mark once every file is in place
+        manifest["snapshots"].append(entry)
+        manifest["high_water_mark"] = high
+        self._save_manifest(manifest)
+        return entry
+
+    @staticmethod
+    def _columns(model, schema) -> List:
+        columns = []
+        for name in schema.names:
+            if model is Release and name == "changelog":
+                columns.extend(changelog_columns())
+            else:
+                columns.append(getattr(model, name))
+        return columns
+
+    def _write_parquet(self, rows: Iterable, schema, path: str) -> int:
+        """Write rows to a Parquet file one row group at a time."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        names = schema.names
+        batch = {name: [] for name in names}
+        count = 0
+        tmp_path = path + ".tmp"
+
+        with pq.ParquetWriter(tmp_path, schema, compression=self.compression) as writer:
+            for row in rows:
+                for name, value in zip(names, row):
+                    batch[name].append(value.value if isinstance(value, enum.Enum) else value)
+                count += 1
+                if count % self.row_group_size == 0:
+                    writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                    batch = {name: [] for name in names}
+            if batch[names[0]]:
+                writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+
+        os.replace(tmp_path, path)
+        return count
+
+
+def _create_snapshot_service() -> SnapshotService:
+    from app.core.config import get_settings
+    settings = get_settings()
+
+    return SnapshotService(
+        directory=settings.SNAPSHOT_DIR,
+        row_group_size=settings.SNAPSHOT_ROW_GROUP_SIZE,
+        compression=settings.SNAPSHOT_COMPRESSION,
+    )
+
+
+# Global service instance
+snapshot_service = _create_snapshot_service()
@@ -1,7 +1,9 @@
+import httpx
 from abc import ABC, abstractmethod
 from typing import List, Optional
 from datetime import datetime
 from dataclasses import dataclass
+from app.core.instrumentation import record_upstream_response
 
 
 @dataclass
@@ -23,6 +25,16 @@ class Release:
 class ReleaseSource(ABC):
     """Abstract base class for release sources."""
     
+    # Label of this source's upstream metrics
+    name = "unknown"
+    
+    def http_client(self) -> httpx.AsyncClient:
+        """HTTP client for the source's API, reporting responses to /metrics."""
+        return httpx.AsyncClient(timeout=30.0, event_hooks={"response": [self._record_response]})
+    
+    async def _record_response(self, response: httpx.Response) -> None:
+        record_upstream_response(self.name, response)
+    
     @abstractmethod
     async def fetch_releases(self, external_id: str) -> List[Release]:
         """Fetch all releases for a project."""
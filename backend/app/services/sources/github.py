@@ -11,6 +11,8 @@ settings = get_settings()
 class GitHubSource(ReleaseSource):
     """Release source for GitHub repositories."""
     
+    name = "github"
+    
     BASE_URL = "https://api.github.com"
     
     def __init__(self):
@@ -33,7 +35,7 @@ class GitHubSource(ReleaseSource):
     
     async def fetch_releases(self, external_id: str) -> List[Release]:
         """Fetch all releases from GitHub."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/repos/{external_id}/releases",
                 headers=self.headers,
@@ -46,7 +48,7 @@ class GitHubSource(ReleaseSource):
     
     async def get_latest_release(self, external_id: str) -> Optional[Release]:
         """Fetch only the latest release from GitHub."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/repos/{external_id}/releases/latest",
                 headers=self.headers,
@@ -1,12 +1,15 @@
 import httpx
 from typing import List, Optional
 from datetime import datetime
+from app.core.versions import is_prerelease
 from app.services.sources.base import Release, ReleaseSource
 
 
 class npmSource(ReleaseSource):
     """Release source for npm registry."""
     
+    name = "npm"
+    
     BASE_URL = "https://registry.npmjs.org"
     
     def normalize_external_id(self, package_url: str) -> str:
@@ -23,7 +26,7 @@ class npmSource(ReleaseSource):
     
     async def fetch_releases(self, package_name: str) -> List[Release]:
         """Fetch all versions from npm registry."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/{package_name}",
                 params={"per_page": 100},
@@ -62,14 +65,14 @@ class npmSource(ReleaseSource):
                     release_date=release_date,
                     changelog=None,  # npm doesn't provide changelog in registry
                     changelog_url=changelog_url,
-                    prerelease=version.startswith(("alpha", "beta", "rc", "-")),
+                    prerelease=is_prerelease(version),
                 ))
             
             return releases
     
     async def get_latest_release(self, package_name: str) -> Optional[Release]:
         """Fetch only the latest version from npm registry."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/{package_name}/latest",
             )
@@ -81,5 +84,5 @@ class npmSource(ReleaseSource):
             return Release(
                 project_id=0,
                 version=version,
-                prerelease=version.startswith(("alpha", "beta", "rc", "-")),
+                prerelease=is_prerelease(version),
             )
@@ -1,12 +1,15 @@
 import httpx
 from typing import List, Optional
 from datetime import datetime
+from app.core.versions import is_prerelease
 from app.services.sources.base import Release, ReleaseSource
 
 
 class PyPISource(ReleaseSource):
     """Release source for PyPI packages."""
     
+    name = "pypi"
+    
     BASE_URL = "https://pypi.org/pypi"
     
     def normalize_external_id(self, package_url: str) -> str:
@@ -24,7 +27,7 @@ class PyPISource(ReleaseSource):
     
     async def fetch_releases(self, package_name: str) -> List[Release]:
         """Fetch all versions from PyPI."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/{package_name}/json",
             )
@@ -57,14 +60,14 @@ class PyPISource(ReleaseSource):
                     version=version,
                     release_date=release_date,
                     changelog=None,  # PyPI doesn't provide changelog
-                    prerelease=version.lower().startswith(("a", "b", "rc", "dev", "alpha", "beta")),
+                    prerelease=is_prerelease(version),
                 ))
             
             return releases
     
     async def get_latest_release(self, package_name: str) -> Optional[Release]:
         """Fetch only the latest version from PyPI."""
-        async with httpx.AsyncClient(timeout=30.0) as client:
+        async with self.http_client() as client:
             response = await client.get(
                 f"{self.BASE_URL}/{package_name}/json",
             )
@@ -95,5 +98,5 @@ class PyPISource(ReleaseSource):
                 project_id=0,
                 version=version,
                 release_date=release_date,
-                prerelease=version.lower().startswith(("a", "b", "rc", "dev", "alpha", "beta")),
+                prerelease=is_prerelease(version),
             )
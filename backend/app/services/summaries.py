@@ -0,0 +1,213 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, func, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.compression import changelog_hash
+from app.core.database import insert_ignore
+from app.models.project import Project
+from app.models.release import ChangelogSummary, Release
+from app.services.ai_summarizer import AISummarizer
+from app.services.changelog_store import load_changelogs
+from app.services.summary_queue import SUMMARY_FIELDS, ChangelogItem, SummaryResult
+
+
+def summary_dict(row: ChangelogSummary) -> dict:
+    return {
+        "summary": row.summary,
+        "breaking": row.breaking or [],
+        "features": row.features or [],
+        "fixes": row.fixes or [],
+        "security": row.security or [],
+        "source": row.source,
+    }
+
+
+def load_summaries(db: Session, hashes: Iterable[Optional[str]]) -> Dict[str, dict]:
+    """Precomputed summaries by changelog hash; missing ones are left out."""
+    hashes = {content_hash for content_hash in hashes if content_hash}
+    if not hashes:
+        return {}
+    rows = db.query(ChangelogSummary).filter(ChangelogSummary.content_hash.in_(hashes))
+    return {row.content_hash: summary_dict(row) for row in rows}
+
+
+def load_summary(db: Session, release: Release) -> Optional[dict]:
+    """Precomputed summary of a release's changelog, if there is one yet."""
+    return load_summaries(db, [release.changelog_sha256]).get(release.changelog_sha256)
+
+
+class SummaryStage:
+    """Background stage that summarizes changelogs after they are ingested.
+
+    The fetcher wakes it once new releases are committed; it also polls, so
+    releases fetched by other workers and ones ingested before summaries
+    existed are picked up too. Each distinct changelog text is summarized
+    once and stored under its hash, and every release with the same text
+    shares the row. API and notification code only read stored summaries.
+
+    AI summaries are used when the summarizer is available, with small
+    changelogs batched into shared provider calls; otherwise, or when a call
+    fails or is over the rate budget, the local extractor fills in.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        summarizer: AISummarizer,
+        batch_size: int = 100,
+        poll_interval: float = 300,
+    ):
+        self.session_factory = session_factory
+        self.summarizer = summarizer
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def _backfill_hashes(self) -> int:
+        """Hash changelogs of releases stored without one."""
+        db: Session = self.session_factory()
+        try:
+            rows = (
+                db.query(Release.id, Release.changelog_inline)
+                .filter(
+                    Release.changelog_inline.isnot(None),
+                    Release.changelog_inline != "",
+                    Release.changelog_sha256.is_(None),
+                )
+                .limit(1000)
+                .all()
+            )
+            if rows:
+                releases = Release.__table__
+                db.execute(
+                    update(releases)
+                    .where(releases.c.id == bindparam("release_id"))
+                    .values(changelog_sha256=bindparam("content_hash")),
+                    [{"release_id": release_id, "content_hash": changelog_hash(text)} for release_id, text in rows],
+                )
+                db.commit()
+            return len(rows)
+        finally:
+            db.close()
+
+    def _pending(self) -> List[Tuple[str, str, str, str]]:
+        """(hash, changelog, project name, version) of texts without a summary."""
+        db: Session = self.session_factory()
+        try:
+            first = (
+                db.query(func.min(Release.id))
+                .outerjoin(ChangelogSummary, ChangelogSummary.content_hash == Release.changelog_sha256)
+                .filter(Release.changelog_sha256.isnot(None), ChangelogSummary.content_hash.is_(None))
+                .group_by(Release.changelog_sha256)
+                .limit(self.batch_size)
+                .all()
+            )
+            if not first:
+                return []
+            rows = (
+                db.query(Release.changelog_sha256, Project.name, Release.version)
+                .join(Project, Release.project_id == Project.id)
+                .filter(Release.id.in_([release_id for release_id, in first]))
+                .all()
+            )
+            texts = load_changelogs(db, (content_hash for content_hash, _, _ in rows))
+            return [
+                (content_hash, texts[content_hash], project_name, version)
+                for content_hash, project_name, version in rows
+                if content_hash in texts
+            ]
+        finally:
+            db.close()
+
+    def _store(self, summaries: List[dict]) -> None:
+        db: Session = self.session_factory()
+        try:
+            # Another worker may have summarized the same text meanwhile
+            insert_ignore(db, ChangelogSummary, summaries, key=("content_hash",))
+            db.commit()
+        finally:
+            db.close()
+
+    async def run(self) -> int:
+        """Summarize every changelog that has no summary yet; returns how many."""
+        while await asyncio.to_thread(self._backfill_hashes):
+            pass
+
+        count = 0
+
+        async def store(results: List[SummaryResult]) -> None:
+            # Stored batch by batch, so an interrupted run resumes after them
+            nonlocal count
+            await asyncio.to_thread(self._store, [
+                {
+                    "content_hash": content_hash,
+                    "summary": data.get("summary"),
+                    **{name: data.get(name) or [] for name in SUMMARY_FIELDS},
+                    "source": source,
+                }
+                for content_hash, data, source in results
+            ])
+            count += len(results)
+
+        while True:
+            pending = await asyncio.to_thread(self._pending)
+            if not pending:
+                return count
+            items = [ChangelogItem(*row) for row in pending]
+            await self.summarizer.summarize_many(items, on_batch=store)
+
+    def wake(self) -> None:
+        """Run soon; called after new releases are committed."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _poll(self) -> None:
+        while True:
+            self._wake.clear()
+            try:
+                count = await self.run()
+                if count:
+                    print(f"[Summaries] Summarized {count} changelogs")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"[Summaries] Run failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        """Start the background stage."""
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._poll())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+        self._wake = None
+
+
+def _create_summary_stage() -> SummaryStage:
+    from app.core.config import get_settings
+    from app.core.database import SessionLocal
+    from app.services.ai_summarizer import ai_summarizer
+    settings = get_settings()
+
+    return SummaryStage(
+        session_factory=SessionLocal,
+        summarizer=ai_summarizer,
+        batch_size=settings.SUMMARY_BATCH_SIZE,
+        poll_interval=settings.SUMMARY_POLL_INTERVAL,
+    )
+
+
+# Global stage, started with the app
+summary_stage = _create_summary_stage()
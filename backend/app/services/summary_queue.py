@@ -0,0 +1,311 @@
+import asyncio
+import json
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+
+CHARS_PER_TOKEN = 4  # Rough estimate for English text and markdown
+PROMPT_TOKENS = 150  # Instructions around the changelogs
+OUTPUT_TOKENS_PER_ITEM = 200
+
+SYSTEM_PROMPT = (
+    "You summarize software release changelogs for developers. "
+    "Reply with a single JSON object and nothing else."
+)
+
+SUMMARY_FIELDS = ("breaking", "features", "fixes", "security")
+
+# (key, summary fields, source) where source is "ai" or "extract"
+SummaryResult = Tuple[Hashable, dict, str]
+
+
+@dataclass
+class ChangelogItem:
+    """One changelog waiting to be summarized."""
+    key: Hashable
+    changelog: str
+    project_name: str
+    version: str
+
+
+class ProviderError(Exception):
+    """Raised when the LLM provider call fails or returns something unusable."""
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class RateBudget:
+    """Requests and tokens sent to the provider in the last minute.
+
+    Mirrors the provider's per-minute rate limits, so calls are spaced out
+    before the provider has to reject them.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._sent: Deque[Tuple[float, int]] = deque()
+        self._tokens = 0
+
+    def _expire(self, now: float) -> None:
+        while self._sent and self._sent[0][0] <= now - 60:
+            _, tokens = self._sent.popleft()
+            self._tokens -= tokens
+
+    def wait_time(self, tokens: int) -> float:
+        """Seconds until a call of `tokens` fits the budget; inf if it never will."""
+        if tokens > self.tokens_per_minute:
+            return float("inf")
+        now = self.clock()
+        self._expire(now)
+        requests, used = len(self._sent), self._tokens
+        if requests < self.requests_per_minute and used + tokens <= self.tokens_per_minute:
+            return 0.0
+        # Wait for the oldest calls to leave the window until this one fits
+        for sent_at, spent in self._sent:
+            requests -= 1
+            used -= spent
+            if requests < self.requests_per_minute and used + tokens <= self.tokens_per_minute:
+                return max(0.0, sent_at + 60 - now)
+        return 0.0
+
+    def spend(self, tokens: int) -> None:
+        self._sent.append((self.clock(), tokens))
+        self._tokens += tokens
+
+
+class ChatProvider:
+    """Minimal client for OpenAI- and Anthropic-style chat APIs.
+
+    `base_url` points it at a compatible gateway or a local stand-in.
+    """
+
+    DEFAULT_URLS = {
+        "openai": "https://api.openai.com/v1",
+        "anthropic": "https://api.anthropic.com/v1",
+    }
+
+    def __init__(
+        self,
+        provider: str,
+        api_key: str,
+        model: str,
+        base_url: Optional[str] = None,
+        timeout: float = 60.0,
+        max_output_tokens: int = 2048,
+    ):
+        self.provider = provider
+        self.api_key = api_key
+        self.model = model
+        self.base_url = (base_url or self.DEFAULT_URLS.get(provider, self.DEFAULT_URLS["openai"])).rstrip("/")
+        self.timeout = timeout
+        self.max_output_tokens = max_output_tokens
+
+    def _request(self, system: str, prompt: str) -> Tuple[str, dict, dict]:
+        if self.provider == "anthropic":
+            return (
+                f"{self.base_url}/messages",
+                {"x-api-key": self.api_key, "anthropic-version": "2023-06-01"},
+                {
+                    "model": self.model,
+                    "max_tokens": self.max_output_tokens,
+                    "system": system,
+                    "messages": [{"role": "user", "content": prompt}],
+                },
+            )
+        return (
+            f"{self.base_url}/chat/completions",
+            {"Authorization": f"Bearer {self.api_key}"},
+            {
+                "model": self.model,
+                "max_tokens": self.max_output_tokens,
+                "temperature": 0,
+                "response_format": {"type": "json_object"},
+                "messages": [
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt},
+                ],
+            },
+        )
+
+    async def complete(self, system: str, prompt: str) -> str:
+        """Send one prompt; returns the reply text."""
+        # Import httpx only when needed (AI is optional)
+        import httpx
+
+        url, headers, body = self._request(system, prompt)
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.post(url, headers=headers, json=body)
+                response.raise_for_status()
+                data = response.json()
+        except httpx.HTTPStatusError as e:
+            raise ProviderError(f"{self.provider} returned HTTP {e.response.status_code}")
+        except (httpx.HTTPError, ValueError) as e:
+            raise ProviderError(f"{self.provider} request failed: {e.__class__.__name__}")
+
+        try:
+            if self.provider == "anthropic":
+                return "".join(part.get("text", "") for part in data["content"])
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise ProviderError(f"Unexpected {self.provider} response")
+
+
+def build_prompt(changelogs: List[Tuple[ChangelogItem, str]], max_length: int) -> str:
+    """One prompt asking for a summary of each (item, truncated text)."""
+    parts = [
+        "Summarize each changelog below. Reply with JSON of the form "
+        '{"results": [{"id": <changelog id>, "summary": "<at most '
+        f'{max_length} words>", "breaking": [...], "features": [...], "fixes": [...], "security": [...]}}]}}. '
+        "List entries are short phrases taken from the changelog; use [] when there are none.",
+    ]
+    for index, (item, text) in enumerate(changelogs):
+        parts.append(f"\n### Changelog {index}: {item.project_name} {item.version}\n{text}")
+    return "\n".join(parts)
+
+
+def parse_results(reply: str, count: int) -> Dict[int, dict]:
+    """Summaries by changelog id from a provider reply; malformed entries are dropped."""
+    start, end = reply.find("{"), reply.rfind("}")
+    if start < 0 or end < start:
+        raise ProviderError("Reply contains no JSON object")
+    try:
+        results = json.loads(reply[start:end + 1]).get("results")
+    except (ValueError, AttributeError):
+        raise ProviderError("Reply is not valid JSON")
+    if not isinstance(results, list):
+        raise ProviderError("Reply has no results list")
+
+    parsed = {}
+    for result in results:
+        if not isinstance(result, dict) or not isinstance(result.get("id"), int):
+            continue
+        if not 0 <= result["id"] < count or not isinstance(result.get("summary"), str):
+            continue
+        parsed[result["id"]] = {
+            "summary": result["summary"],
+            **{
+                name: [str(entry) for entry in result.get(name) or [] if entry][:10]
+                for name in SUMMARY_FIELDS
+            },
+        }
+    return parsed
+
+
+class SummaryQueue:
+    """Summarizes many changelogs with few, bounded provider calls.
+
+    Small changelogs are packed into one prompt (up to `batch_tokens`
+    tokens or `max_batch_items` changelogs), and at most `max_concurrency`
+    calls are in flight. Calls are admitted under a per-minute request and
+    token budget; a batch that would have to wait longer than
+    `max_wait_seconds` for it, or whose call fails, is summarized by the
+    local `fallback` extractor instead. Each batch's results are handed to
+    `on_batch` as soon as they are ready, so callers can store them and
+    resume from there after an interruption.
+    """
+
+    def __init__(
+        self,
+        provider: ChatProvider,
+        fallback: Callable[[str], dict],
+        budget: RateBudget,
+        max_concurrency: int = 4,
+        batch_tokens: int = 3000,
+        max_batch_items: int = 8,
+        max_input_chars: int = 12000,
+        max_wait_seconds: float = 30,
+        max_length: int = 200,
+    ):
+        self.provider = provider
+        self.fallback = fallback
+        self.budget = budget
+        self.max_concurrency = max_concurrency
+        self.batch_tokens = batch_tokens
+        self.max_batch_items = max_batch_items
+        self.max_input_chars = max_input_chars
+        self.max_wait_seconds = max_wait_seconds
+        self.max_length = max_length
+        self._admission = asyncio.Lock()
+        self.calls = 0
+        self.fallbacks = 0
+
+    def batches(self, items: List[ChangelogItem]) -> List[List[Tuple[ChangelogItem, str]]]:
+        """Pack items, with their text cut to `max_input_chars`, into prompts."""
+        batches, current, tokens = [], [], PROMPT_TOKENS
+        for item in items:
+            text = item.changelog[:self.max_input_chars]
+            cost = estimate_tokens(text) + OUTPUT_TOKENS_PER_ITEM
+            if current and (tokens + cost > self.batch_tokens or len(current) >= self.max_batch_items):
+                batches.append(current)
+                current, tokens = [], PROMPT_TOKENS
+            current.append((item, text))
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _fall_back(self, batch: List[Tuple[ChangelogItem, str]]) -> List[SummaryResult]:
+        self.fallbacks += len(batch)
+        return [(item.key, self.fallback(item.changelog), "extract") for item, _ in batch]
+
+    async def _admit(self, tokens: int) -> bool:
+        """Reserve budget for a call, waiting up to `max_wait_seconds`."""
+        async with self._admission:
+            wait = self.budget.wait_time(tokens)
+            if wait > self.max_wait_seconds:
+                return False
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.budget.spend(tokens)
+            return True
+
+    async def _summarize_batch(self, batch: List[Tuple[ChangelogItem, str]]) -> List[SummaryResult]:
+        prompt = build_prompt(batch, self.max_length)
+        tokens = estimate_tokens(SYSTEM_PROMPT + prompt) + OUTPUT_TOKENS_PER_ITEM * len(batch)
+        if not await self._admit(tokens):
+            return self._fall_back(batch)
+
+        self.calls += 1
+        try:
+            parsed = parse_results(await self.provider.complete(SYSTEM_PROMPT, prompt), len(batch))
+        except ProviderError as e:
+            print(f"[Summaries] Provider call for {len(batch)} changelogs failed: {e}")
+            return self._fall_back(batch)
+
+        results = []
+        for index, (item, text) in enumerate(batch):
+            if index in parsed:
+                results.append((item.key, parsed[index], "ai"))
+            else:
+                results.extend(self._fall_back([(item, text)]))
+        return results
+
+    async def run(
+        self,
+        items: List[ChangelogItem],
+        on_batch: Optional[Callable[[List[SummaryResult]], Awaitable[None]]] = None,
+    ) -> List[SummaryResult]:
+        """Summarize `items`; returns every result once all batches are done."""
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_batch(batch) -> List[SummaryResult]:
+            async with slots:
+                results = await self._summarize_batch(batch)
+            if on_batch is not None:
+                await on_batch(results)
+            return results
+
+        done = await asyncio.gather(*(run_batch(batch) for batch in self.batches(items)))
+        return [result for results in done for result in results]
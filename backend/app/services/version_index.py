@@ -0,0 +1,70 @@
+import time
+from typing import Optional, Tuple
+from sqlalchemy import bindparam, false, update
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.versions import parse_version
+from app.models.release import Release
+
+
+def latest_release(db: Session, project_id: int, include_prereleases: bool = False) -> Optional[Release]:
+    """Highest version of a project; stable releases only unless asked.
+
+    For stable releases this is a single seek on ix_releases_project_latest.
+    """
+    query = db.query(Release).filter(Release.project_id == project_id)
+    if not include_prereleases:
+        query = query.filter(Release.prerelease == false())
+    return query.order_by(Release.version_key.desc(), Release.id.desc()).first()
+
+
+def backfill_version_keys(session_factory: sessionmaker, batch_size: int = 1000) -> Tuple[int, int]:
+    """Set version keys on releases stored before they existed.
+
+    Also flags pre-releases the old source checks missed, such as npm's
+    "1.0.0-beta.1". Walks releases by primary key in batches of
+    `batch_size`, one transaction each; returns (releases, newly flagged).
+    """
+    releases = Release.__table__
+    count = flagged = 0
+    last_id = 0
+    while True:
+        db: Session = session_factory()
+        try:
+            rows = (
+                db.query(Release.id, Release.version, Release.prerelease)
+                .filter(Release.id > last_id, Release.version_key.is_(None))
+                .order_by(Release.id)
+                .limit(batch_size)
+                .all()
+            )
+            if not rows:
+                return count, flagged
+
+            values = []
+            for release_id, version, prerelease in rows:
+                parsed = parse_version(version)
+                flagged += parsed.prerelease and not prerelease
+                values.append({
+                    "release_id": release_id,
+                    "key": parsed.key,
+                    "prerelease": bool(prerelease) or parsed.prerelease,
+                })
+            db.execute(
+                update(releases)
+                .where(releases.c.id == bindparam("release_id"))
+                .values(version_key=bindparam("key"), prerelease=bindparam("prerelease")),
+                values,
+            )
+            db.commit()
+            count += len(rows)
+            last_id = rows[-1][0]
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    from app.core.database import SessionLocal
+
+    started = time.monotonic()
+    count, flagged = backfill_version_keys(SessionLocal)
+    print(f"[Versions] Keyed {count} releases, {flagged} newly flagged as pre-releases, in {time.monotonic() - started:.1f}s")
@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+import app.models  # noqa: F401 - register all tables on Base.metadata
+from app.services.routing import routing_index
+
+
+@pytest.fixture(autouse=True)
+def reset_routing_index():
+    """Rebuild the global routing index from each test's own database."""
+    routing_index.reset()
+    yield
+    routing_index.reset()
+
+
+@pytest.fixture
+def db_engine():
+    """In-memory SQLite engine with the full schema."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(db_engine):
+    """Database session bound to the in-memory engine."""
+    session = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -11,7 +11,6 @@ class TestAISummarizer:
         
         assert summarizer.is_available() is False
     
-    @pytest.mark.skip_ci(reason="AI summarizer test - needs investigation")
     def test_extract_summary_without_ai(self):
         """Test fallback summary extraction."""
         config = SummarizationConfig(enabled=False)
@@ -0,0 +1,105 @@
+import re
+import time
+from pathlib import Path
+import pytest
+from app.services.ai_summarizer import AISummarizer
+from app.services.changelog_classifier import classify_changelog
+
+CORPUS = Path(__file__).parent / "fixtures" / "changelogs"
+
+
+def corpus():
+    return {path.stem: path.read_text(encoding="utf-8") for path in sorted(CORPUS.glob("*.md"))}
+
+
+def legacy_extract(changelog):
+    """The substring-chain extractor this classifier replaced (without its always-true clause)."""
+    breaking, features, fixes, security = [], [], [], []
+    for line in changelog.split("\n"):
+        line_lower = line.lower()
+        if "breaking" in line_lower:
+            breaking.append(line.strip("#- "))
+        elif "feature" in line_lower or "feat" in line_lower:
+            features.append(line.strip("#- "))
+        elif "fix" in line_lower or "bug" in line_lower:
+            fixes.append(line.strip("#- "))
+        elif "security" in line_lower or "cve" in line_lower or "vulnerability" in line_lower:
+            security.append(line.strip("#- "))
+    return breaking, features, fixes, security
+
+
+class TestChangelogClassifier:
+    """Test sorting changelog entries into summary categories."""
+
+    def test_keep_a_changelog_sections(self):
+        """Test that entries follow their section, with security notes pulled out."""
+        result = classify_changelog(corpus()["keep-a-changelog"])
+
+        assert result.breaking == ["Dropped the `--compat` flag that was deprecated in 2.0"]
+        assert "Support for TOML configuration files" in result.features
+        assert "Crash when a config file contained a BOM" in result.fixes
+        assert result.security == ["Updated `minimatch` to 9.0.4 to address CVE-2022-3517 (ReDoS)"]
+        # "Changed" and "Deprecated" entries are not summarized
+        assert not any("Node.js" in line for line in result.breaking + result.features + result.fixes)
+
+    def test_conventional_commits(self):
+        """Test prefixes, the breaking marker and ignored commit types."""
+        result = classify_changelog(corpus()["github-generated"])
+
+        assert [line[:24] for line in result.breaking] == ["feat!: remove deprecated"]
+        assert [line[:9] for line in result.features] == ["feat(cli)"]
+        assert [line[:10] for line in result.fixes] == ["fix(cache)", "fix: crash"]
+        assert [line[:9] for line in result.security] == ["security:"]
+
+    def test_not_everything_is_breaking(self):
+        """Test the summary counts of a plain changelog."""
+        summary = AISummarizer()._extract_summary("## Features\n- Dark mode\n\n## Fixes\n- Fixed login\n- Fixed logout")
+
+        assert summary["breaking"] == []
+        assert summary["summary"] == "1 new features; 2 bug fixes"
+
+    def test_work_is_capped(self):
+        """Test that only the first max_chars of a huge changelog are read."""
+        changelog = "## Fixed\n" + "- Fixed a bug in the parser\n" * 200_000
+
+        result = classify_changelog(changelog, max_chars=64 * 1024)
+
+        assert result.truncated
+        assert 2000 < len(result.fixes) < 2500
+        assert not classify_changelog("- fix: one").truncated
+
+
+@pytest.mark.slow
+class TestClassifierBenchmark:
+    """Classification throughput over the changelog corpus."""
+
+    def test_throughput(self):
+        texts = list(corpus().values())
+        size = sum(len(text) for text in texts)
+        rounds = 2000
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                classify_changelog(text)
+        compiled = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for text in texts:
+                legacy_extract(text)
+        legacy = time.perf_counter() - started
+
+        megabytes = size * rounds / 1e6
+        print(
+            f"\ncorpus {size} chars x {rounds}: classifier {megabytes / compiled:.1f} MB/s, "
+            f"substring chain {megabytes / legacy:.1f} MB/s"
+        )
+        assert megabytes / compiled > 5
+
+        huge = "\n".join(f"- fix: entry {i}" for i in range(500_000))
+        started = time.perf_counter()
+        classify_changelog(huge)
+        capped = time.perf_counter() - started
+        print(f"{len(huge) / 1e6:.1f} MB changelog: {capped * 1000:.1f} ms (capped)")
+        assert capped < 0.5
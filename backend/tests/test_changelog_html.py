@@ -0,0 +1,109 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.release import ChangelogHtml
+from app.models.user import User
+from app.services.changelog_html import RENDERER_VERSION, ChangelogRenderer, render_html, sanitize_html
+from app.services.summaries import changelog_hash
+from tests.test_summaries import add_releases
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+class TestSanitizer:
+    """Test rendering changelog markdown to safe HTML."""
+
+    def test_markdown_is_rendered(self):
+        """Test that lists, links, tables and fenced code survive."""
+        markup = render_html(
+            "## Fixed\n- Crash on `start` ([#12](https://github.com/acme/demo/pull/12))\n\n"
+            "| a | b |\n|---|---|\n| 1 | 2 |\n\n```py\nif x < 1: pass\n```\n"
+        )
+
+        assert "<h2>Fixed</h2>" in markup
+        assert "<li>Crash on <code>start</code>" in markup
+        assert '<a href="https://github.com/acme/demo/pull/12" rel="nofollow noopener noreferrer">#12</a>' in markup
+        assert "<td>1</td>" in markup
+        assert '<code class="language-py">if x &lt; 1: pass' in markup
+
+    def test_unsafe_markup_is_removed(self):
+        """Test that scripts, handlers and script URLs never reach the output."""
+        markup = render_html(
+            "Hi <script>alert(1)</script><img src=x onerror=alert(2)>\n\n"
+            "[a](javascript:alert(3)) [b](JaVa&#x09;script:alert(4)) <a href='/docs' style='x'>docs</a>\n\n"
+            "<div><iframe src='https://evil.example'></iframe><b>bold</div>"
+        )
+
+        assert "alert" not in markup
+        assert "iframe" not in markup and "style" not in markup and "<div" not in markup
+        assert '<img src="x">' in markup
+        assert "<a rel=" in markup
+        assert '<a href="/docs" rel="nofollow noopener noreferrer">docs</a>' in markup
+        assert "<b>bold</b>" in markup
+
+    def test_unclosed_tags_are_closed(self):
+        """Test that the output is balanced whatever the input."""
+        assert sanitize_html("<ul><li><em>one</ul></strong>") == "<ul><li><em>one</em></li></ul>"
+
+
+class TestChangelogRenderer:
+    """Test storing and serving rendered changelogs."""
+
+    def test_release_endpoint_serves_html(self, db, session_factory):
+        """Test that format=html renders on first view and reuses the stored HTML."""
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        db.add(user)
+        release = add_releases(db, ["- feat: **dark** mode"])[0]
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            client = TestClient(app)
+            assert client.get(f"/api/releases/{release.id}").json()["changelog_html"] is None
+
+            first = client.get(f"/api/releases/{release.id}", params={"format": "html"}).json()
+            db.query(ChangelogHtml).update({"html": "<p>stored</p>"})
+            db.commit()
+            second = client.get(f"/api/releases/{release.id}", params={"format": "html"}).json()
+        finally:
+            app.dependency_overrides.clear()
+
+        assert first["changelog_html"] == "<ul>\n<li>feat: <strong>dark</strong> mode</li>\n</ul>"
+        assert first["changelog"] == "- feat: **dark** mode"
+        assert second["changelog_html"] == "<p>stored</p>"
+
+    async def test_outdated_renderings_are_redone(self, db, session_factory):
+        """Test that the stage renders new texts and ones from an older renderer."""
+        add_releases(db, ["- one", "- two", "- two", None])
+        db.add(ChangelogHtml(content_hash=changelog_hash("- one"), html="old", renderer_version=RENDERER_VERSION - 1))
+        db.commit()
+
+        renderer = ChangelogRenderer(session_factory, workers=0)
+        assert await renderer.run() == 2
+        assert await renderer.run() == 0
+
+        rows = {row.content_hash: row for row in db.query(ChangelogHtml)}
+        assert len(rows) == 2
+        assert rows[changelog_hash("- one")].html == "<ul>\n<li>one</li>\n</ul>"
+        assert {row.renderer_version for row in rows.values()} == {RENDERER_VERSION}
+
+    async def test_large_changelogs_use_the_pool(self, db, session_factory):
+        """Test that changelogs over the inline limit render in worker processes."""
+        large = "\n".join(f"- fix: bug {i}" for i in range(2000))
+        add_releases(db, [large, "- small"])
+
+        renderer = ChangelogRenderer(session_factory, workers=1, inline_chars=1000)
+        try:
+            assert await renderer.run() == 2
+            assert renderer._pool is not None
+        finally:
+            await renderer.stop()
+
+        stored = db.query(ChangelogHtml).filter(ChangelogHtml.content_hash == changelog_hash(large)).one()
+        assert stored.html == render_html(large)
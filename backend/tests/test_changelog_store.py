@@ -0,0 +1,234 @@
+import importlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import sessionmaker
+from app.core import database
+from app.core.compression import _zstd_codec, changelog_hash, compress_text, decompress_text
+from app.core.database import Base, get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import ChangelogBlob, Release, changelog_blob_row
+from app.models.user import User
+from app.services.changelog_store import load_changelogs, migrate_inline_changelogs
+from tests.test_changelog_classifier import corpus
+from tests.test_summaries import add_releases
+
+release_module = importlib.import_module("app.models.release")
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+class TestChangelogStore:
+    """Test content-addressed, compressed changelog storage."""
+
+    def test_identical_changelogs_stored_once(self, db, session_factory):
+        """Test that releases sharing a text share one compressed blob."""
+        shared = "## Fixed\n" + "- Crash on start\n" * 200
+        add_releases(db, [shared, "- other", None])
+        add_releases(db, [shared])
+
+        blob = db.query(ChangelogBlob).filter(ChangelogBlob.content_hash == changelog_hash(shared)).one()
+        assert db.query(ChangelogBlob).count() == 2
+        assert blob.size == len(shared)
+        assert len(blob.data) < len(shared) / 10
+
+        fresh = session_factory()
+        try:
+            releases = fresh.query(Release).order_by(Release.id).all()
+            assert [release.changelog for release in releases] == [shared, "- other", None, shared]
+            assert releases[0].excerpt == shared[:500]
+            assert all(release.changelog_inline is None for release in releases)
+        finally:
+            fresh.close()
+
+    def test_lists_carry_excerpts(self, db):
+        """Test that only the detail endpoint returns the full changelog."""
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        db.add(user)
+        release = add_releases(db, ["x" * 2000])[0]
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            client = TestClient(app)
+            detail = client.get(f"/api/releases/{release.id}").json()
+            listed = client.get(f"/api/releases/project/{release.project_id}").json()
+        finally:
+            app.dependency_overrides.clear()
+
+        assert detail["changelog"] == "x" * 2000
+        assert listed[0]["changelog"] == "x" * 500
+
+    def test_migration_moves_inline_changelogs(self, db, session_factory):
+        """Test that the migration converts old rows in batches and can be rerun."""
+        legacy = add_releases(db, ["- one", "- two", "- one", "", None, "- new"], inline=True)
+        add_releases(db, ["- new"])
+
+        stats = migrate_inline_changelogs(session_factory, batch_size=2)
+
+        assert stats.releases == 5
+        assert stats.blobs == 2  # "- new" was already stored at ingest
+        assert stats.inline_bytes == 5 + 5 + 5 + 5
+        assert migrate_inline_changelogs(session_factory).releases == 0
+
+        db.expire_all()
+        assert all(release.changelog_inline is None for release in legacy)
+        assert [release.changelog_sha256 for release in legacy] == [
+            changelog_hash(value) for value in ["- one", "- two", "- one", None, None, "- new"]
+        ]
+        assert load_changelogs(db, [changelog_hash("- one"), changelog_hash("- two")]) == {
+            changelog_hash("- one"): "- one",
+            changelog_hash("- two"): "- two",
+        }
+        assert db.query(ChangelogBlob).count() == 3
+
+    def test_unmigrated_changelogs_still_read(self, db):
+        """Test that releases stored inline read the same before migration."""
+        release = add_releases(db, ["a" * 600], inline=True)[0]
+        db.query(Release).update({"changelog_sha256": changelog_hash("a" * 600)})
+        db.commit()
+
+        assert release.changelog == "a" * 600
+        assert release.excerpt == "a" * 500
+        assert load_changelogs(db, [changelog_hash("a" * 600)]) == {changelog_hash("a" * 600): "a" * 600}
+
+    def test_blob_insert_on_mysql(self):
+        """Test that MySQL and MariaDB skip stored blobs in the insert itself."""
+        for name in ("mysql", "mariadb"):
+            dialect = mysql.dialect()
+            dialect.name = name
+            statement = database.insert_ignore_statement(dialect, ChangelogBlob, ("content_hash",))
+            sql = str(statement.compile(dialect=dialect))
+            assert sql.startswith("INSERT INTO changelog_blobs")
+            assert "ON DUPLICATE KEY UPDATE content_hash = " in sql
+
+    def test_blob_insert_fallback(self, db, monkeypatch):
+        """Test that the SELECT-then-INSERT fallback survives a conflicting insert."""
+        monkeypatch.setattr(database, "insert_ignore_statement", lambda dialect, model, key: None)
+        stored = changelog_blob_row("- stored", "zlib")
+        database.insert_ignore(db, ChangelogBlob, [stored], key=("content_hash",))
+        db.commit()
+        project = Project(name="demo", source=ReleaseSource.NPM)
+        db.add(project)
+        db.flush()
+
+        # The second "- racing" row conflicts after the SELECT, as a
+        # concurrent writer's would
+        rows = [stored, changelog_blob_row("- racing", "zlib"), changelog_blob_row("- racing", "zlib")]
+        database.insert_ignore(db, ChangelogBlob, rows, key=("content_hash",))
+        db.commit()
+
+        assert db.query(ChangelogBlob).count() == 2
+        assert db.query(Project).count() == 1
+
+    def test_blob_race_keeps_releases(self, db, db_engine, monkeypatch):
+        """Test that a blob another writer stores mid-flush doesn't drop the releases."""
+        monkeypatch.setattr(database, "insert_ignore_statement", lambda dialect, model, key: None)
+        shared = changelog_blob_row("- shared", "zlib")
+
+        def other_writer(connection, cursor, statement, parameters, context, executemany):
+            if statement.startswith("SELECT changelog_blobs.content_hash"):
+                connection.connection.cursor().execute(
+                    "INSERT INTO changelog_blobs (content_hash, codec, data, size) VALUES (?, ?, ?, ?)",
+                    (shared["content_hash"], shared["codec"], shared["data"], shared["size"]),
+                )
+
+        event.listen(db_engine, "after_cursor_execute", other_writer)
+        try:
+            add_releases(db, ["- shared"])
+        finally:
+            event.remove(db_engine, "after_cursor_execute", other_writer)
+
+        assert [release.changelog for release in db.query(Release)] == ["- shared"]
+        assert db.query(ChangelogBlob).count() == 1
+
+    def test_blob_conflict_keeps_releases(self, db, monkeypatch):
+        """Test that a blob another writer stored first doesn't fail the releases."""
+        shared = "- shared"
+        db.execute(insert(ChangelogBlob), [changelog_blob_row(shared, "zlib")])
+        db.commit()
+        monkeypatch.setattr(
+            release_module, "insert_ignore", lambda session, model, rows, key: session.execute(insert(model), rows),
+        )
+
+        add_releases(db, [shared])
+
+        assert [release.changelog for release in db.query(Release)] == [shared]
+        assert db.query(ChangelogBlob).count() == 1
+
+    def test_zstd_round_trip(self):
+        """Test that zstd is used when available and reads back."""
+        pytest.importorskip("zstandard")
+        codec, data = compress_text("héllo " * 100, "zstd")
+
+        assert codec == "zstd"
+        assert decompress_text(codec, data) == "héllo " * 100
+
+    def test_zstd_across_threads(self):
+        """Test that threads compressing at once each get their own zstd codecs."""
+        pytest.importorskip("zstandard")
+        texts = [f"Release {i}: " + "fixed things " * (50 + i) for i in range(200)]
+
+        def round_trip(text):
+            return decompress_text(*compress_text(text, "zstd")), id(_zstd_codec("compress"))
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(round_trip, texts))
+
+        assert [text for text, _ in results] == texts
+        assert id(_zstd_codec("compress")) not in {codec for _, codec in results}
+
+
+@pytest.mark.slow
+class TestChangelogStorageBenchmark:
+    """Storage saved by migrating a realistic changelog mix."""
+
+    def test_storage_reduction(self, tmp_path):
+        path = tmp_path / "changelogs.db"
+        engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        texts = list(corpus().values())
+        db = session_factory()
+        try:
+            projects = [Project(name=f"pkg-{i}", source=ReleaseSource.NPM) for i in range(50)]
+            db.add_all(projects)
+            db.flush()
+            releases = []
+            for i in range(20_000):
+                # Monorepo packages publish the same notes for every package in a release
+                version = f"1.{i // 50}.0"
+                body = f"# {version}\n\n" + texts[i // 50 % len(texts)]
+                releases.append({"project_id": projects[i % 50].id, "version": version, "changelog": body})
+            db.execute(Release.__table__.insert(), releases)
+            db.commit()
+        finally:
+            db.close()
+
+        def file_size():
+            with engine.connect() as connection:
+                connection.execute(text("VACUUM"))
+            return os.path.getsize(path)
+
+        before = file_size()
+        stats = migrate_inline_changelogs(session_factory, batch_size=1000)
+        after = file_size()
+        engine.dispose()
+
+        print(
+            f"\n{stats.releases} releases -> {stats.blobs} blobs in {stats.seconds:.1f}s: "
+            f"changelog bytes {stats.inline_bytes / 1e6:.1f} MB -> {stats.stored_bytes / 1e6:.1f} MB "
+            f"({stats.reduction:.0%} smaller), database file {before / 1e6:.1f} MB -> {after / 1e6:.1f} MB"
+        )
+        assert stats.releases == 20_000
+        assert stats.reduction > 0.5
+        assert after < before
@@ -0,0 +1,228 @@
+import datetime
+import time
+import pytest
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.services.digest import WeeklyDigestJob
+from app.services.email import EmailConfig, EmailService
+from tests.test_email_templates import html_of
+
+NOW = datetime.datetime(2024, 6, 3, 9, 0)
+
+
+class BatchPool:
+    """Stands in for the SMTP pool; refuses recipients containing "reject"."""
+
+    def __init__(self):
+        self.messages = []
+        self.batches = 0
+        self.options = None
+
+    async def send_many(self, messages):
+        self.batches += 1
+        self.messages.extend(message for message in messages if "reject" not in message["To"])
+        return [RuntimeError("refused") if "reject" in message["To"] else None for message in messages]
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def pool():
+    return BatchPool()
+
+
+@pytest.fixture
+def make_job(db_engine, pool):
+    def make(**kwargs):
+        service = EmailService(config=EmailConfig(host="smtp.example.com", port=587, username="", password=""))
+        def create_pool(**options):
+            pool.options = options
+            return pool
+
+        service.create_pool = create_pool
+        session_factory = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+        return WeeklyDigestJob(session_factory, service, **kwargs)
+    return make
+
+
+def seed(db):
+    """Two projects with releases this week and one from last month."""
+    api = Project(name="api", source=ReleaseSource.GITHUB)
+    cli = Project(name="cli", source=ReleaseSource.GITHUB)
+    db.add_all([api, cli])
+    db.flush()
+    db.add_all([
+        Release(project_id=api.id, version="1.0.0", created_at=NOW - datetime.timedelta(days=3)),
+        Release(project_id=api.id, version="1.1.0-rc.1", prerelease=True, created_at=NOW - datetime.timedelta(days=1)),
+        Release(project_id=api.id, version="0.9.0", created_at=NOW - datetime.timedelta(days=30)),
+        Release(project_id=cli.id, version="2.0.0", created_at=NOW - datetime.timedelta(days=2)),
+    ])
+    db.flush()
+    return api, cli
+
+
+def add_user(db, email, projects, digest_hour=None, notify_digest=True):
+    user = User(email=email, password_hash="x", first_name=email.split("@")[0].title(), last_name="Dev",
+                digest_hour=digest_hour)
+    db.add(user)
+    db.flush()
+    db.add_all([
+        Subscription(user_id=user.id, project_id=project.id, notify_digest=notify_digest)
+        for project in projects
+    ])
+    db.commit()
+    return user
+
+
+class TestWeeklyDigest:
+    """Test the single-pass weekly digest job."""
+
+    async def test_groups_releases_per_user(self, db, make_job, pool):
+        """Test that each user gets one email with the week's releases of their projects."""
+        api, cli = seed(db)
+        add_user(db, "ann@example.com", [api, cli])
+        add_user(db, "bob@example.com", [cli])
+        add_user(db, "eve@example.com", [api, cli], notify_digest=False)
+
+        stats = await make_job().run(now=NOW)
+
+        assert (stats.users, stats.sent, stats.releases, stats.complete) == (2, 2, 4, True)
+        ann, bob = pool.messages
+        assert ann["To"] == "ann@example.com"
+        assert ann["Subject"] == "Weekly Digest: 3 releases from 2 projects"
+        assert "Hi Ann," in html_of(ann)
+        assert "api v1.1.0-rc.1" in html_of(ann) and "cli v2.0.0" in html_of(ann)
+        assert "0.9.0" not in html_of(ann)
+        assert bob["Subject"] == "Weekly Digest: 1 releases from cli"
+
+    async def test_delivery_hour_buckets(self, db, make_job, pool):
+        """Test that a run only covers users whose digest hour it is."""
+        api, _ = seed(db)
+        add_user(db, "early@example.com", [api], digest_hour=6)
+        add_user(db, "late@example.com", [api], digest_hour=18)
+        spread = add_user(db, "spread@example.com", [api])
+
+        await make_job().run(hour=18, now=NOW)
+        await make_job().run(hour=spread.id % 24, now=NOW)
+
+        assert [message["To"] for message in pool.messages] == ["late@example.com", "spread@example.com"]
+
+    async def test_rerun_is_idempotent(self, db, make_job, pool):
+        """Test that users already sent this week are skipped and failures retried."""
+        api, _ = seed(db)
+        add_user(db, "ann@example.com", [api])
+        add_user(db, "reject@example.com", [api])
+
+        first = await make_job().run(now=NOW)
+        second = await make_job().run(now=NOW + datetime.timedelta(hours=1))
+
+        assert (first.sent, first.failed) == (1, 1)
+        assert (second.users, second.sent, second.failed) == (1, 0, 1)
+        assert len(pool.messages) == 1
+
+        # A week later everyone is due again
+        db.add(Release(project_id=api.id, version="1.2.0", created_at=NOW + datetime.timedelta(days=3)))
+        db.commit()
+        next_week = await make_job().run(now=NOW + datetime.timedelta(days=7))
+        assert (next_week.users, next_week.sent) == (2, 1)
+
+    async def test_time_budget(self, db, make_job, pool):
+        """Test that a run stops at its budget and the next run finishes the rest."""
+        api, _ = seed(db)
+        for i in range(5):
+            add_user(db, f"user{i}@example.com", [api])
+
+        stopped = await make_job(time_budget_seconds=0).run(now=NOW)
+        assert stopped.complete is False
+        assert stopped.users == 0
+
+        finished = await make_job(batch_size=2).run(now=NOW)
+        assert (finished.sent, finished.complete) == (5, True)
+        assert pool.batches == 3
+
+    async def test_own_smaller_pool(self, db, make_job, pool):
+        """Test that a run sends over a pool sized by the digest settings, not the shared one."""
+        api, _ = seed(db)
+        add_user(db, "ann@example.com", [api])
+
+        job = make_job(smtp_pool_size=1, smtp_rate_limit=5)
+        await job.run(now=NOW)
+
+        assert pool.options == {"max_connections": 1, "rate_limit": 5}
+        assert job.email.pool is None
+
+    async def test_sends_without_holding_a_session(self, db, make_job, pool):
+        """Test that each page of users is read and its session closed before the batch is sent."""
+        api, _ = seed(db)
+        for i in range(3):
+            add_user(db, f"user{i}@example.com", [api])
+        job = make_job(batch_size=2)
+        session_factory = job.session_factory
+        open_sessions = []
+
+        def tracked_session():
+            session = session_factory()
+            open_sessions.append(session)
+            close = session.close
+
+            def tracked_close():
+                open_sessions.remove(session)
+                close()
+
+            session.close = tracked_close
+            return session
+
+        send_many = pool.send_many
+        open_while_sending = []
+
+        async def checked_send_many(messages):
+            open_while_sending.append(len(open_sessions))
+            return await send_many(messages)
+
+        job.session_factory = tracked_session
+        pool.send_many = checked_send_many
+        stats = await job.run(now=NOW)
+
+        assert stats.sent == 3
+        assert open_while_sending == [0, 0]
+
+
+@pytest.mark.slow
+class TestWeeklyDigestBenchmark:
+    """One weekly run over 100k users within a fixed time budget."""
+
+    async def test_hundred_thousand_users(self, db, db_engine, make_job, pool):
+        users, projects, follows = 100_000, 300, 3
+        budget = 300
+        with db_engine.begin() as conn:
+            conn.execute(insert(Project), [
+                {"id": p, "name": f"project-{p:03d}", "source": ReleaseSource.GITHUB} for p in range(1, projects + 1)
+            ])
+            conn.execute(insert(Release), [
+                {"project_id": p, "version": f"1.{n}.0", "created_at": NOW - datetime.timedelta(days=n + 1)}
+                for p in range(1, projects + 1) for n in range(2)
+            ])
+            conn.execute(insert(User), [
+                {"id": u, "email": f"user{u}@example.com", "password_hash": "x", "first_name": f"User{u}",
+                 "last_name": "Dev", "is_active": True}
+                for u in range(1, users + 1)
+            ])
+            conn.execute(insert(Subscription), [
+                {"user_id": u, "project_id": (u * 7 + k * 101) % projects + 1, "notify_digest": True}
+                for u in range(1, users + 1) for k in range(follows)
+            ])
+
+        start = time.perf_counter()
+        stats = await make_job(time_budget_seconds=budget).run(now=NOW)
+        elapsed = time.perf_counter() - start
+
+        print(f"\n{stats.users} digests ({stats.releases} release rows) in {elapsed:.1f}s: "
+              f"{stats.users / elapsed:.0f} users/s")
+        assert stats.complete
+        assert stats.sent == users
+        assert elapsed < budget
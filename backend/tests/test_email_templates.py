@@ -0,0 +1,122 @@
+import time
+import pytest
+from app.services.email import EmailConfig, EmailService
+from app.services.email_templates import EmailTemplates
+
+
+class CapturingPool:
+    """Stands in for the SMTP pool and keeps the messages."""
+
+    def __init__(self):
+        self.messages = []
+
+    async def send(self, message):
+        self.messages.append(message)
+
+
+def html_of(message):
+    return message.get_payload()[0].get_payload(decode=True).decode()
+
+
+@pytest.fixture
+def service():
+    config = EmailConfig(host="smtp.example.com", port=587, username="", password="")
+    return EmailService(config=config, pool=CapturingPool())
+
+
+class TestEmailTemplates:
+    """Test precompiled templates and per-recipient splicing."""
+
+    def test_render_once_personalize_many(self):
+        """Test that recipients share one render and get escaped slots."""
+        templates = EmailTemplates()
+        context = {
+            "project_name": "demo",
+            "version": "1.0.0",
+            "release_url": "http://x/1",
+            "changelog": "<script>alert(1)</script>",
+            "prerelease": True,
+        }
+        first = templates.render("release.html", "subject", context, cache_key=("release", 1))
+        again = templates.render("release.html", "subject", context, cache_key=("release", 1))
+        assert again is first
+        assert templates.renders == 1
+
+        html = first.personalize(greeting="Hi <Ann>,", manage_url="http://x/settings?subscription=7")
+        assert "Hi &lt;Ann&gt;," in html
+        assert 'href="http://x/settings?subscription=7"' in html
+        assert "&lt;script&gt;" in html
+        assert "Pre-release" in html
+
+        # Without a name the greeting slot is simply empty
+        assert "Hi " not in first.personalize(manage_url="http://x/settings")
+
+    async def test_release_notification(self, service):
+        """Test the release email end to end with a truncated changelog."""
+        from app.services.email_templates import email_templates
+        before = email_templates.renders
+        for name in ("Ann", "Bob"):
+            assert await service.send_release_notification(
+                to_email=f"{name.lower()}@example.com",
+                project_name="demo",
+                version="2.0.0",
+                release_url="http://x/projects/1/releases/2",
+                changelog="x" * 600,
+                recipient_name=name,
+            )
+        assert email_templates.renders == before + 1
+
+        first, second = service.pool.messages
+        assert first["Subject"] == "📦 New release: demo v2.0.0"
+        assert "Hi Ann," in html_of(first) and "Hi Bob," in html_of(second)
+        assert "x" * 500 + "..." in html_of(first)
+        assert "x" * 501 not in html_of(first)
+
+    async def test_digests(self, service):
+        """Test that weekly and coalesced digests render from the shared template."""
+        releases = [
+            {"project_name": "a", "version": "1.0.0", "release_url": "http://x/1", "date": "2024-01-01"},
+            {"project_name": "b", "version": "2.0.0", "prerelease": True},
+        ]
+        assert await service.send_release_digest("dev@example.com", releases, "http://x/")
+        assert await service.send_weekly_digest("dev@example.com", "a", 3, [{"version": "1.0.0"}], "http://x/")
+
+        digest, weekly = service.pool.messages
+        assert digest["Subject"] == "📦 2 new releases from 2 projects"
+        assert '<a href="http://x/1" style="color: #1f2937;">a v1.0.0</a>' in html_of(digest)
+        assert "<strong>2</strong> new releases from <strong>2</strong> projects." in html_of(digest)
+        assert weekly["Subject"] == "Weekly Digest: 3 releases from a"
+        assert "#10b981" in html_of(weekly)
+
+
+@pytest.mark.slow
+class TestEmailTemplateBenchmark:
+    """Per-recipient cost of a 10k-recipient release email."""
+
+    def test_ten_thousand_recipients(self):
+        templates = EmailTemplates()
+        context = {
+            "project_name": "demo",
+            "version": "1.0.0",
+            "release_url": "http://x/1",
+            "changelog": "Fixes and improvements. " * 20,
+            "prerelease": False,
+        }
+        recipients = 10_000
+
+        start = time.perf_counter()
+        for i in range(1000):
+            templates.env.get_template("release.html").render(
+                **context, greeting=f"Hi user{i},", manage_url=f"http://x/settings?subscription={i}"
+            )
+        full_render = (time.perf_counter() - start) / 1000
+
+        start = time.perf_counter()
+        for i in range(recipients):
+            rendered = templates.render("release.html", "subject", context, cache_key=("release", 1))
+            rendered.personalize(greeting=f"Hi user{i},", manage_url=f"http://x/settings?subscription={i}")
+        spliced = (time.perf_counter() - start) / recipients
+
+        print(f"\nfull render: {full_render * 1e6:.1f} µs/recipient, spliced: {spliced * 1e6:.1f} µs/recipient")
+        assert templates.renders == 1
+        assert spliced < full_render
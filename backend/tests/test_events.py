@@ -0,0 +1,121 @@
+import importlib
+import json
+import pytest
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.services.events import EventHub, RELEASE_CREATED
+from app.services.sources.base import Release as SourceRelease
+
+# `app.services.fetcher` is shadowed by the global instance re-exported in app.services
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+
+class FakeSource:
+    """Release source returning a fixed list of versions."""
+
+    def __init__(self, versions):
+        self.versions = versions
+
+    def normalize_external_id(self, repo_url):
+        return repo_url
+
+    async def fetch_releases(self, external_id):
+        return [SourceRelease(project_id=0, version=v, changelog=f"Changes in {v}") for v in self.versions]
+
+
+class TestEventHub:
+    """Test in-process release event fan-out."""
+
+    async def test_routes_events_by_project(self):
+        """Test that connections only receive events for their projects."""
+        hub = EventHub()
+        first = hub.subscribe(user_id=1, project_ids=[1])
+        second = hub.subscribe(user_id=2, project_ids=[2])
+
+        await hub.publish(RELEASE_CREATED, {"version": "1.0.0"}, project_id=1)
+
+        event = await first.get(timeout=0.1)
+        assert event.type == RELEASE_CREATED
+        assert json.loads(event.data)["data"]["version"] == "1.0.0"
+        assert await second.get(timeout=0.01) is None
+
+    async def test_full_queue_drops_oldest(self):
+        """Test that a slow connection keeps the newest events."""
+        hub = EventHub(queue_size=2, max_dropped=10)
+        subscriber = hub.subscribe(user_id=1, project_ids=[1])
+
+        for i in range(3):
+            await hub.publish(RELEASE_CREATED, {"version": f"1.0.{i}"}, project_id=1)
+
+        assert subscriber.dropped == 1
+        versions = [json.loads((await subscriber.get(0.1)).data)["data"]["version"] for _ in range(2)]
+        assert versions == ["1.0.1", "1.0.2"]
+
+    async def test_slow_connection_is_closed(self):
+        """Test that a connection dropping too many events is disconnected."""
+        hub = EventHub(queue_size=1, max_dropped=2)
+        subscriber = hub.subscribe(user_id=1, project_ids=[1])
+
+        for i in range(5):
+            await hub.publish(RELEASE_CREATED, {"version": f"1.0.{i}"}, project_id=1)
+
+        assert subscriber.closed is True
+        assert hub.connection_count == 0
+        assert await subscriber.get(timeout=0.1) is None
+
+
+class TestFetcherPublishing:
+    """Test that the fetcher publishes new releases after commit."""
+
+    async def test_publishes_after_commit(self, db, monkeypatch):
+        """Test that each new release reaches stream subscribers once."""
+        hub = EventHub()
+        monkeypatch.setattr(fetcher_module, "event_hub", hub)
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["1.0.0", "1.1.0"]))
+
+        project = Project(name="demo", source=ReleaseSource.GITHUB, external_id="acme/demo")
+        db.add(project)
+        db.commit()
+        subscriber = hub.subscribe(user_id=1, project_ids=[project.id])
+
+        fetcher = fetcher_module.ReleaseFetcher()
+        assert await fetcher.fetch_all(db) == 2
+        assert db.query(Release).count() == 2
+
+        first = json.loads((await subscriber.get(0.1)).data)
+        assert first["project_id"] == project.id
+        assert first["data"]["project_name"] == "demo"
+        assert (await subscriber.get(0.1)) is not None
+
+        # Already-known versions are neither stored nor published again
+        assert await fetcher.fetch_all(db) == 0
+        assert await subscriber.get(timeout=0.01) is None
+
+    async def test_failed_project_is_rolled_back(self, db, monkeypatch):
+        """Test that a project failing mid-ingest loses only its own releases and events."""
+        hub = EventHub()
+        monkeypatch.setattr(fetcher_module, "event_hub", hub)
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["1.0.0", "1.1.0"]))
+        record_new_releases = fetcher_module.record_new_releases
+
+        def conflicting_ingest(project, releases):
+            if project.name == "broken":
+                # A concurrent fetch stored the same version first
+                db.add(Release(project_id=project.id, version=releases[0].version))
+                db.flush()
+            record_new_releases(project, releases)
+
+        monkeypatch.setattr(fetcher_module, "record_new_releases", conflicting_ingest)
+        broken = Project(name="broken", source=ReleaseSource.NPM)
+        healthy = Project(name="healthy", source=ReleaseSource.NPM)
+        db.add_all([broken, healthy])
+        db.commit()
+        subscriber = hub.subscribe(user_id=1, project_ids=[broken.id, healthy.id])
+
+        assert await fetcher_module.ReleaseFetcher().fetch_all(db) == 2
+
+        assert {project_id for project_id, in db.query(Release.project_id)} == {healthy.id}
+        assert (broken.release_count, healthy.release_count) == (0, 2)
+        published = [json.loads((await subscriber.get(0.1)).data)["project_id"] for _ in range(2)]
+        assert published == [healthy.id, healthy.id]
+        assert await subscriber.get(timeout=0.01) is None
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from app.api import releases as releases_api
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+
+
+@pytest.fixture
+def seeded(db):
+    """Two projects with a handful of releases."""
+    web = Project(name="web", source=ReleaseSource.NPM)
+    api = Project(name="api", source=ReleaseSource.PYPI)
+    db.add_all([web, api])
+    db.flush()
+    db.add_all([
+        Release(project_id=web.id, version="1.0.0", changelog="first", created_at=datetime(2024, 1, 1)),
+        Release(project_id=web.id, version="1.1.0-beta.1", prerelease=True, created_at=datetime(2024, 2, 1)),
+        Release(project_id=api.id, version="2.0.0", changelog='quote " and, comma', created_at=datetime(2024, 3, 1)),
+    ])
+    db.commit()
+    return {"web": web.id, "api": api.id}
+
+
+@pytest.fixture
+def client(db_engine, monkeypatch):
+    """API client streaming from the in-memory database."""
+    monkeypatch.setattr(releases_api, "SessionLocal", sessionmaker(bind=db_engine))
+    app.dependency_overrides[get_current_user] = lambda: None
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+class TestReleaseExport:
+    """Test the streaming release export."""
+
+    def test_filters(self, db, seeded):
+        """Test project, date range and prerelease filters."""
+        query = releases_api.build_export_query(db, project_id=seeded["web"])
+        assert [r.version for r in query] == ["1.0.0", "1.1.0-beta.1"]
+
+        query = releases_api.build_export_query(db, since=datetime(2024, 1, 15), until=datetime(2024, 3, 1))
+        assert [r.version for r in query] == ["1.1.0-beta.1"]
+
+        query = releases_api.build_export_query(db, source=ReleaseSource.NPM, prerelease=False)
+        assert [r.version for r in query] == ["1.0.0"]
+
+    def test_ndjson_stream(self, client, seeded):
+        """Test that NDJSON has one release per line in id order."""
+        response = client.get("/api/releases/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert [r["version"] for r in rows] == ["1.0.0", "1.1.0-beta.1", "2.0.0"]
+        assert rows[2]["project_source"] == "pypi"
+        assert rows[0]["created_at"] == "2024-01-01T00:00:00"
+
+    def test_csv_stream(self, client, seeded, monkeypatch):
+        """Test that CSV output survives chunking and quoting."""
+        monkeypatch.setattr(releases_api, "CSV_CHUNK_ROWS", 1)
+        response = client.get("/api/releases/export", params={"format": "csv"})
+
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert len(rows) == 3
+        assert rows[2]["changelog"] == 'quote " and, comma'
+
+    def test_rejects_unknown_format(self, client):
+        """Test that only ndjson and csv are accepted."""
+        assert client.get("/api/releases/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,266 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.core.database import Base, get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.notification import NotificationOutbox
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.webhook import WebhookSubscription
+from app.services import fanout
+from app.services.fanout import PayloadCache, WebhookClient, SIGNATURE_HEADER
+from app.services.notifications import notification_service
+from app.services.outbox import OutboxDispatcher, send_mattermost, send_webhook, DELIVERED, PENDING
+
+
+class Receiver:
+    """Local stand-in for a webhook endpoint: keep-alive HTTP/1.1, counts requests.
+
+    Paths containing "fail" answer 500. Header names and values are lowercased.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.headers = []
+        self.connections = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                path = lines[0].split(" ")[1]
+                headers = dict(line.lower().split(": ", 1) for line in lines[1:] if ": " in line)
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests.append((path, body))
+                self.headers.append(headers)
+                status = b"500 Internal Server Error" if "fail" in path else b"200 OK"
+                writer.write(b"HTTP/1.1 " + status + b"\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def receiver():
+    receiver = Receiver()
+    await receiver.start()
+    yield receiver
+    await receiver.stop()
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fanout.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def fresh_fanout(monkeypatch):
+    """Isolated payload cache and connection pool for one test."""
+    cache = PayloadCache()
+    client = WebhookClient(max_connections=20)
+    monkeypatch.setattr(fanout, "payload_cache", cache)
+    monkeypatch.setattr(fanout, "webhook_client", client)
+    yield cache, client
+
+
+def subscribe(session_factory, urls, channels=(None,)):
+    """One release and a webhook subscription per URL; returns the queued row count."""
+    db = session_factory()
+    user = User(email="ops@example.com", password_hash="x", first_name="O", last_name="P")
+    project = Project(name="demo", source=ReleaseSource.GITHUB)
+    db.add_all([user, project])
+    db.flush()
+    release = Release(project_id=project.id, version="1.0.0", changelog="Fixes")
+    db.add(release)
+    db.flush()
+    db.execute(insert(WebhookSubscription), [
+        {"project_id": project.id, "user_id": user.id, "webhook_url": url,
+         "channel": channels[i % len(channels)], "notify_releases": True, "is_active": True}
+        for i, url in enumerate(urls)
+    ])
+    count = notification_service.enqueue_releases(db, project, [release])
+    db.commit()
+    db.close()
+    return count
+
+
+class TestPayloadCache:
+    """Test rendered payload caching."""
+
+    def test_renders_once_per_key(self):
+        """Test that a key is rendered once and served as the same bytes."""
+        cache = PayloadCache(max_entries=1)
+        first = cache.get_or_render(("mattermost", 1, None), lambda: {"text": "é"})
+        assert cache.get_or_render(("mattermost", 1, None), lambda: {"text": "other"}) is first
+        assert json.loads(first) == {"text": "é"}
+        assert cache.renders == 1
+
+        cache.get_or_render(("mattermost", 2, None), lambda: {"text": "b"})
+        cache.get_or_render(("mattermost", 1, None), lambda: {"text": "a"})
+        assert cache.renders == 3
+
+
+class TestMattermostFanout:
+    """Test delivering one release to many Mattermost subscriptions."""
+
+    async def test_render_once_per_channel(self, session_factory, receiver, fresh_fanout):
+        """Test that subscribers share a payload per channel and pooled connections."""
+        cache, client = fresh_fanout
+        urls = [f"{receiver.url}/hooks/{i}" for i in range(40)] + [f"{receiver.url}/fail"]
+        assert subscribe(session_factory, urls, channels=("town-square", "releases")) == 41
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": send_mattermost}, workers=20, batch_size=100)
+        while await dispatcher.run_once():
+            pass
+        await client.close()
+
+        db = session_factory()
+        statuses = {row.destination: row.status for row in db.query(NotificationOutbox)}
+        db.close()
+        assert [url for url, status in statuses.items() if status != DELIVERED] == [f"{receiver.url}/fail"]
+        assert statuses[f"{receiver.url}/fail"] == PENDING
+
+        assert cache.renders == 2
+        channels = {json.loads(body)["channel"] for _, body in receiver.requests}
+        assert channels == {"town-square", "releases"}
+        # Connections are kept alive and reused
+        assert receiver.connections <= 20
+
+
+class TestSignedJsonWebhooks:
+    """Test generic JSON webhooks."""
+
+    async def test_signed_batch(self, session_factory, receiver, fresh_fanout):
+        """Test that due releases go out in one signed POST per subscription."""
+        cache, client = fresh_fanout
+        db = session_factory()
+        user = User(email="ops@example.com", password_hash="x", first_name="O", last_name="P")
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add_all([user, project])
+        db.flush()
+        releases = [Release(project_id=project.id, version=f"1.0.{i}", changelog="Fixes") for i in range(3)]
+        db.add_all(releases)
+        db.add_all([
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url=f"{receiver.url}/signed",
+                                webhook_secret="s3cret", format="json"),
+            Subscription(user_id=user.id, project_id=project.id, notify_email=False,
+                         notify_webhook=True, webhook_url=f"{receiver.url}/plain"),
+        ])
+        db.flush()
+        assert notification_service.enqueue_releases(db, project, releases) == 6
+        db.commit()
+        db.close()
+
+        dispatcher = OutboxDispatcher(session_factory, {"webhook": send_webhook})
+        while await dispatcher.run_once():
+            pass
+        await client.close()
+
+        requests = {path: (body, headers) for (path, body), headers in zip(receiver.requests, receiver.headers)}
+        assert sorted(requests) == ["/plain", "/signed"]
+        body, headers = requests["/signed"]
+        payload = json.loads(body)
+        assert payload["event"] == "release.published"
+        assert [release["version"] for release in payload["releases"]] == ["1.0.0", "1.0.1", "1.0.2"]
+        expected = hmac.new(b"s3cret", body, hashlib.sha256).hexdigest()
+        assert headers[SIGNATURE_HEADER.lower()] == f"sha256={expected}"
+
+        # Same releases, same bytes; subscriptions have no secret to sign with
+        body, headers = requests["/plain"]
+        assert body == requests["/signed"][0]
+        assert SIGNATURE_HEADER.lower() not in headers
+        assert cache.renders == 1
+
+        db = session_factory()
+        assert {row.status for row in db.query(NotificationOutbox)} == {DELIVERED}
+        db.close()
+
+
+class TestWebhookTestEndpoint:
+    """Test POST /webhooks/{id}/test."""
+
+    def test_sends_to_configured_channel(self, db, monkeypatch):
+        """Test that the test message goes to the subscription's URL and channel."""
+        sent = []
+
+        class FakeClient:
+            async def post(self, url, body, headers=None):
+                sent.append((url, json.loads(body)))
+
+        monkeypatch.setattr("app.services.mattermost.webhook_client", FakeClient())
+        user = User(email="ops@example.com", password_hash="x", first_name="O", last_name="P")
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add_all([user, project])
+        db.flush()
+        webhook = WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/hook", channel="ops")
+        db.add(webhook)
+        db.commit()
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            response = TestClient(app).post(f"/api/webhooks/{webhook.id}/test")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 200
+        assert sent[0][0] == "http://mm/hook"
+        assert sent[0][1]["channel"] == "ops"
+        db.refresh(webhook)
+        assert webhook.last_status_code == 200
+        assert webhook.last_delivery_at is not None
+
+
+@pytest.mark.slow
+class TestFanoutBenchmark:
+    """Delivery throughput for one release with 10k subscribers."""
+
+    async def test_ten_thousand_subscribers(self, session_factory, receiver, fresh_fanout):
+        cache, client = fresh_fanout
+        subscribers = 10_000
+        subscribe(session_factory, [f"{receiver.url}/hooks/{i}" for i in range(subscribers)])
+
+        dispatcher = OutboxDispatcher(
+            session_factory, {"mattermost": send_mattermost}, workers=200, batch_size=1000, poll_interval=0.01
+        )
+        start = time.perf_counter()
+        while len(receiver.requests) < subscribers and time.perf_counter() - start < 300:
+            await dispatcher.run_once()
+        elapsed = time.perf_counter() - start
+        await client.close()
+
+        print(
+            f"\n{subscribers} deliveries in {elapsed:.2f}s ({subscribers / elapsed:.0f}/s), "
+            f"{cache.renders} render(s), {receiver.connections} connection(s)"
+        )
+        assert len(receiver.requests) == subscribers
+        assert cache.renders == 1
+        db = session_factory()
+        assert dispatcher.stats(db) == {DELIVERED: subscribers}
+        db.close()
@@ -0,0 +1,206 @@
+import asyncio
+import functools
+import importlib
+import time
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from app.core.database import get_db
+from app.core.instrumentation import (
+    DELIVERY_SECONDS,
+    FETCH_SECONDS,
+    HTTP_REQUEST_DB_QUERIES,
+    HTTP_REQUEST_SECONDS,
+    RELEASES_INGESTED,
+    UPSTREAM_RATE_LIMIT,
+    UPSTREAM_RATE_LIMIT_REMAINING,
+    UPSTREAM_RESPONSES,
+    MetricsMiddleware,
+    instrument_engine,
+)
+from app.core.metrics import Counter, HistogramMetric, Registry
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.user import User
+from app.services.outbox import Delivery, DeliveryError, OutboxDispatcher
+from app.services.sources.github import GitHubSource
+from tests.test_events import FakeSource
+
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+
+def delivery(channel):
+    return Delivery(
+        id=1, channel=channel, destination="https://hooks.example.com", variant=None, attempts=1,
+        release_id=1, version="1.0.0", changelog=None, prerelease=False,
+        project_id=1, project_name="demo", project_icon=None,
+    )
+
+
+class TestMetrics:
+    """Test the metrics served at /metrics."""
+
+    def test_render(self):
+        """Test the Prometheus text format of counters and histograms."""
+        registry = Registry()
+        Counter("jobs_total", "Jobs run", ("queue",), registry=registry).labels('say "hi"').inc(2)
+        histogram = HistogramMetric("job_seconds", "Job time", buckets=(0.1, 1), registry=registry)
+        histogram.labels().observe(0.5)
+
+        assert registry.render() == (
+            "# HELP jobs_total Jobs run\n"
+            "# TYPE jobs_total counter\n"
+            'jobs_total{queue="say \\"hi\\""} 2\n'
+            "# HELP job_seconds Job time\n"
+            "# TYPE job_seconds histogram\n"
+            'job_seconds_bucket{le="0.1"} 0\n'
+            'job_seconds_bucket{le="1"} 1\n'
+            'job_seconds_bucket{le="+Inf"} 1\n'
+            "job_seconds_sum 0.5\n"
+            "job_seconds_count 1\n"
+        )
+
+    def test_request_latency_and_queries_per_route(self, db, db_engine):
+        """Test that requests are timed by route template, with their database queries."""
+        instrument_engine(db_engine, "test")
+        project = Project(name="demo", source=ReleaseSource.NPM)
+        db.add(project)
+        db.flush()
+        db.add(Release(project_id=project.id, version="1.0.0"))
+        db.commit()
+        route = "/api/releases/project/{project_id}"
+        latency = HTTP_REQUEST_SECONDS.labels("GET", route, 200)
+        queries = HTTP_REQUEST_DB_QUERIES.labels(route)
+        before = (latency.count, queries.count, queries.sum)
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email="dev@example.com")
+        try:
+            client = TestClient(app)
+            client.get(f"/api/releases/project/{project.id}").raise_for_status()
+            client.get(f"/api/releases/project/{project.id}").raise_for_status()
+            body = client.get("/metrics").text
+        finally:
+            app.dependency_overrides.clear()
+
+        assert (latency.count, queries.count) == (before[0] + 2, before[1] + 2)
+        assert queries.sum - before[2] >= 2
+        assert f'http_request_duration_seconds_count{{method="GET",route="{route}",status="200"}}' in body
+        assert "# TYPE db_query_duration_seconds histogram" in body
+
+    def test_fetch_and_ingest(self, db, monkeypatch):
+        """Test fetch timing by outcome and the count of stored releases."""
+        project = Project(name="demo", source=ReleaseSource.NPM)
+        db.add(project)
+        db.commit()
+        success = FETCH_SECONDS.labels("npm", "success")
+        error = FETCH_SECONDS.labels("npm", "error")
+        ingested = RELEASES_INGESTED.labels("npm")
+        before = (success.count, error.count, ingested.value)
+        fetcher = fetcher_module.ReleaseFetcher()
+
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["1.0.0", "1.1.0"]))
+        asyncio.run(fetcher.fetch_project(db, project))
+        asyncio.run(fetcher.fetch_project(db, project))
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(None))
+        with pytest.raises(TypeError):
+            asyncio.run(fetcher.fetch_project(db, project))
+
+        assert (success.count, error.count, ingested.value) == (before[0] + 2, before[1] + 1, before[2] + 2)
+
+    async def test_upstream_responses_and_rate_limit(self, monkeypatch):
+        """Test that source responses are counted and their rate-limit budget kept."""
+        def handler(request):
+            return httpx.Response(
+                200, json=[], headers={"X-RateLimit-Remaining": "4999", "X-RateLimit-Limit": "5000"},
+            )
+
+        monkeypatch.setattr(
+            httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=httpx.MockTransport(handler)),
+        )
+        responses = UPSTREAM_RESPONSES.labels("github", 200)
+        before = responses.value
+
+        assert await GitHubSource().fetch_releases("octo/demo") == []
+        assert responses.value == before + 1
+        assert UPSTREAM_RATE_LIMIT_REMAINING.labels("github").value == 4999
+        assert UPSTREAM_RATE_LIMIT.labels("github").value == 5000
+
+    async def test_delivery_outcomes(self):
+        """Test that delivery attempts are timed by channel and outcome."""
+        async def send(delivery):
+            return 200
+
+        async def fail(delivery):
+            raise DeliveryError("Bad gateway", 502)
+
+        histograms = {
+            outcome: DELIVERY_SECONDS.labels(channel, outcome)
+            for channel, outcome in (("mattermost", "success"), ("slack", "error"), ("teams", "no_sender"))
+        }
+        before = {outcome: histogram.count for outcome, histogram in histograms.items()}
+        dispatcher = OutboxDispatcher(None, {"mattermost": send, "slack": fail})
+
+        for channel in ("mattermost", "slack", "teams"):
+            await dispatcher.attempt(delivery(channel))
+
+        assert {outcome: histogram.count - before[outcome] for outcome, histogram in histograms.items()} == {
+            "success": 1, "error": 1, "no_sender": 1,
+        }
+
+
+@pytest.mark.slow
+class TestMetricsOverhead:
+    """Cost of collecting metrics on the hot paths."""
+
+    def test_overhead(self, tmp_path):
+        histogram = HistogramMetric("bench_seconds", "Benchmark", ("route",), registry=Registry())
+        n = 200_000
+        started = time.perf_counter()
+        for _ in range(n):
+            histogram.labels("/api/releases/feed").observe(0.004)
+        observe_us = (time.perf_counter() - started) / n * 1e6
+
+        def request_us(instrumented):
+            bench = FastAPI()
+
+            @bench.get("/items/{item_id}")
+            def item(item_id: int):
+                return {"id": item_id}
+
+            if instrumented:
+                bench.add_middleware(MetricsMiddleware)
+            client = TestClient(bench)
+            for i in range(200):
+                client.get(f"/items/{i}")
+            started = time.perf_counter()
+            for i in range(2000):
+                client.get(f"/items/{i}")
+            return (time.perf_counter() - started) / 2000 * 1e6
+
+        def query_us(instrumented):
+            engine = create_engine(f"sqlite:///{tmp_path / f'bench-{instrumented}.db'}")
+            if instrumented:
+                instrument_engine(engine, "bench")
+            with engine.connect() as connection:
+                started = time.perf_counter()
+                for _ in range(5000):
+                    connection.execute(text("SELECT 1"))
+                elapsed = (time.perf_counter() - started) / 5000 * 1e6
+            engine.dispose()
+            return elapsed
+
+        plain_request, metered_request = request_us(False), request_us(True)
+        plain_query, metered_query = query_us(False), query_us(True)
+        print(
+            f"\nlabels().observe(): {observe_us:.2f}us; "
+            f"request {plain_request:.0f}us -> {metered_request:.0f}us; "
+            f"SQLite query {plain_query:.1f}us -> {metered_query:.1f}us"
+        )
+        assert observe_us < 20
+        assert metered_request - plain_request < 200
+        assert metered_query - plain_query < 50
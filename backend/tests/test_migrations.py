@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import StaticPool
+from app.core.database import Base
+from app.core.migrations import MIGRATIONS, MigrationError, migrate, pending_migrations
+
+# Tables as created before columns and indexes were added to the models
+LEGACY_SCHEMA = [
+    "CREATE TABLE projects (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, source VARCHAR(7) NOT NULL, "
+    "created_at DATETIME)",
+    "CREATE TABLE releases (id INTEGER PRIMARY KEY, project_id INTEGER NOT NULL, version VARCHAR(100) NOT NULL, "
+    "changelog TEXT, prerelease BOOLEAN, created_at DATETIME)",
+    "CREATE TABLE subscriptions (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, project_id INTEGER NOT NULL, "
+    "created_at DATETIME)",
+]
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def legacy_engine(engine):
+    with engine.begin() as connection:
+        for statement in LEGACY_SCHEMA:
+            connection.execute(text(statement))
+        connection.execute(text("INSERT INTO projects (id, name, source) VALUES (1, 'demo', 'NPM')"))
+        connection.execute(text("INSERT INTO releases (project_id, version) VALUES (1, '1.0.0'), (1, '1.1.0')"))
+        connection.execute(text("INSERT INTO subscriptions (id, user_id, project_id) VALUES (1, 5, 1), (2, 5, 1), (3, 6, 1)"))
+    return engine
+
+
+def index_names(engine, table):
+    return {index["name"] for index in inspect(engine).get_indexes(table)}
+
+
+class TestMigrations:
+    """Test the schema migration path."""
+
+    def test_new_database(self, engine):
+        """Test that a new database gets the full schema once."""
+        assert migrate(engine) == [version for version, _ in MIGRATIONS]
+        assert migrate(engine) == []
+        assert pending_migrations(engine) == []
+
+        assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+        assert {"uq_releases_project_version", "ix_releases_project_created"} <= index_names(engine, "releases")
+
+    def test_legacy_database(self, legacy_engine):
+        """Test that existing tables get new columns, indexes and unique keys."""
+        with legacy_engine.begin() as connection:
+            connection.execute(text("CREATE TABLE notification_outbox (id INTEGER PRIMARY KEY, subscription_id INTEGER)"))
+            connection.execute(text("INSERT INTO notification_outbox (subscription_id) VALUES (2)"))
+
+        migrate(legacy_engine)
+
+        columns = {column["name"] for column in inspect(legacy_engine).get_columns("projects")}
+        assert {"release_count", "latest_version", "updated_at"} <= columns
+        assert {"uq_subscriptions_user_project", "ix_subscriptions_project"} <= index_names(legacy_engine, "subscriptions")
+        assert "ix_releases_project_latest" in index_names(legacy_engine, "releases")
+        with legacy_engine.connect() as connection:
+            assert connection.execute(text("SELECT id FROM subscriptions ORDER BY id")).scalars().all() == [1, 3]
+            assert connection.execute(text("SELECT subscription_id FROM notification_outbox")).scalar() == 1
+            assert connection.execute(text("SELECT release_count FROM projects")).scalar() == 0
+
+    def test_duplicate_releases_stop_the_migration(self, legacy_engine):
+        """Test that duplicate versions are reported, and the migration resumes once removed."""
+        with legacy_engine.begin() as connection:
+            connection.execute(text("INSERT INTO releases (project_id, version) VALUES (1, '1.0.0')"))
+
+        with pytest.raises(MigrationError, match="project 1 1.0.0"):
+            migrate(legacy_engine)
+        assert pending_migrations(legacy_engine) == ["0003_hot_query_indexes", "0004_replica_heartbeat"]
+
+        with legacy_engine.begin() as connection:
+            connection.execute(text("DELETE FROM releases WHERE id = 3"))
+        assert migrate(legacy_engine) == ["0003_hot_query_indexes", "0004_replica_heartbeat"]
+        with pytest.raises(IntegrityError):
+            with legacy_engine.begin() as connection:
+                connection.execute(text("INSERT INTO releases (project_id, version) VALUES (1, '1.0.0')"))
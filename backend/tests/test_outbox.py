@@ -0,0 +1,583 @@
+import asyncio
+import datetime
+import importlib
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.core import database
+from app.core.database import Base
+from app.models.notification import DeliveryRecord, NotificationOutbox
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.webhook import WebhookSubscription
+from app.services.breaker import CircuitBreakers, CLOSED, HALF_OPEN, OPEN
+from app.services.email import email_service
+from app.services.events import EventHub
+from app.services.ledger import BloomFilter, DeliveryLedger
+from app.services.notifications import notification_service
+from app.services.outbox import OutboxDispatcher, Delivery, DeliveryError, DELIVERED, DEAD, PENDING, send_email
+from app.services.routing import routing_index
+from tests.test_events import FakeSource
+
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """File-backed SQLite, so worker threads get their own connections."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'outbox.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+def queue_rows(session_factory, destinations):
+    """Create one release and an outbox row per destination."""
+    db = session_factory()
+    project = Project(name="demo", source=ReleaseSource.GITHUB)
+    db.add(project)
+    db.flush()
+    release = Release(project_id=project.id, version="1.0.0")
+    db.add(release)
+    db.flush()
+    db.add_all([
+        NotificationOutbox(release_id=release.id, channel="mattermost", destination=destination)
+        for destination in destinations
+    ])
+    db.commit()
+    db.close()
+
+
+def statuses(session_factory):
+    db = session_factory()
+    try:
+        return [row.status for row in db.query(NotificationOutbox).order_by(NotificationOutbox.id)]
+    finally:
+        db.close()
+
+
+class TestEnqueue:
+    """Test that ingestion writes notifications to the outbox."""
+
+    async def test_fetch_enqueues_in_ingest_transaction(self, db, monkeypatch):
+        """Test that new releases queue one row per matching webhook."""
+        monkeypatch.setattr(fetcher_module, "event_hub", EventHub())
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["1.0.0", "1.1.0"]))
+
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        project = Project(name="demo", source=ReleaseSource.GITHUB, external_id="acme/demo")
+        db.add_all([user, project])
+        db.flush()
+        db.add_all([
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/a"),
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/b"),
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/c", is_active=False),
+        ])
+        db.commit()
+
+        await fetcher_module.ReleaseFetcher().fetch_all(db)
+
+        rows = db.query(NotificationOutbox).all()
+        assert sorted(row.destination for row in rows) == ["http://mm/a", "http://mm/a", "http://mm/b", "http://mm/b"]
+        assert all(row.status == PENDING for row in rows)
+
+    def test_prereleases_need_opt_in(self, db):
+        """Test that prereleases only go to hooks that asked for them."""
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add_all([user, project])
+        db.flush()
+        release = Release(project_id=project.id, version="2.0.0-rc.1", prerelease=True)
+        db.add_all([
+            release,
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/a"),
+            WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/b", notify_prereleases=True),
+        ])
+        db.flush()
+
+        assert notification_service.enqueue_releases(db, project, [release]) == 1
+        db.flush()
+        assert db.query(NotificationOutbox).one().destination == "http://mm/b"
+
+    async def test_email_queued_without_smtp(self, db, monkeypatch):
+        """Test that email rows are queued while SMTP is unconfigured and fail at delivery instead."""
+        monkeypatch.setattr(email_service, "config", None)
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add_all([user, project])
+        db.flush()
+        release = Release(project_id=project.id, version="1.0.0")
+        db.add_all([release, Subscription(user_id=user.id, project_id=project.id)])
+        db.flush()
+
+        assert notification_service.enqueue_releases(db, project, [release]) == 1
+        db.flush()
+        row = db.query(NotificationOutbox).one()
+        assert (row.channel, row.destination) == ("email", "dev@example.com")
+
+        dispatcher = OutboxDispatcher(None, {"email": send_email})
+        delivery = Delivery(
+            id=row.id, channel=row.channel, destination=row.destination, variant=row.variant, attempts=1,
+            release_id=release.id, version=release.version, changelog=None, prerelease=False,
+            project_id=project.id, project_name=project.name, project_icon=None,
+        )
+        outcome = await dispatcher.attempt(delivery)
+        assert outcome.error == "Email is not configured"
+
+
+class TestOutboxDispatcher:
+    """Test outbox delivery, retries and per-destination limits."""
+
+    async def test_success_and_retry(self, session_factory):
+        """Test that failures are rescheduled and successes recorded."""
+        queue_rows(session_factory, ["http://ok/hook", "http://down/hook"])
+
+        async def sender(delivery):
+            if "down" in delivery.destination:
+                raise DeliveryError("503")
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": sender})
+        assert await dispatcher.run_once() == 2
+        assert statuses(session_factory) == [DELIVERED, PENDING]
+
+        db = session_factory()
+        failed = db.query(NotificationOutbox).filter(NotificationOutbox.status == PENDING).one()
+        assert failed.last_error == "503"
+        assert failed.next_attempt_at > datetime.datetime.utcnow()
+        db.close()
+
+        # Not due yet
+        assert await dispatcher.run_once() == 0
+
+    async def test_dead_letter_and_requeue(self, session_factory):
+        """Test that rows exhausting their attempts are dead-lettered."""
+        queue_rows(session_factory, ["http://down/hook"])
+
+        async def sender(delivery):
+            raise DeliveryError("boom")
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": sender}, max_attempts=2, retry_base_seconds=0)
+        await dispatcher.run_once()
+        await dispatcher.run_once()
+        assert statuses(session_factory) == [DEAD]
+
+        db = session_factory()
+        assert dispatcher.stats(db) == {DEAD: 1}
+        assert dispatcher.requeue_dead(db) == 1
+        db.close()
+        assert statuses(session_factory) == [PENDING]
+
+    async def test_slow_destination_does_not_block_others(self, session_factory):
+        """Test per-destination limits with one hanging endpoint."""
+        queue_rows(session_factory, ["http://slow/hook"] * 6 + ["http://fast/a", "http://fast/b"])
+        active = {}
+        peak = {}
+        release_slow = asyncio.Event()
+        fast_done = []
+
+        async def sender(delivery):
+            key = delivery.destination
+            active[key] = active.get(key, 0) + 1
+            peak[key] = max(peak.get(key, 0), active[key])
+            try:
+                if "slow" in key:
+                    await release_slow.wait()
+                else:
+                    fast_done.append(key)
+            finally:
+                active[key] -= 1
+
+        dispatcher = OutboxDispatcher(
+            session_factory, {"mattermost": sender}, workers=4, poll_interval=0.01, per_destination_limit=2
+        )
+        await dispatcher.start()
+        try:
+            for _ in range(200):
+                if len(fast_done) == 2:
+                    break
+                await asyncio.sleep(0.01)
+
+            # Both fast hooks went out while the slow one held only its share
+            assert sorted(fast_done) == ["http://fast/a", "http://fast/b"]
+            assert peak["http://slow/hook"] == 2
+
+            release_slow.set()
+            for _ in range(200):
+                if statuses(session_factory).count(DELIVERED) == 8:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await dispatcher.stop()
+
+        assert statuses(session_factory) == [DELIVERED] * 8
+        assert peak["http://slow/hook"] == 2
+        db = session_factory()
+        # Rows handed back while the slow hook was saturated kept their attempts
+        assert max(row.attempts for row in db.query(NotificationOutbox)) == 1
+        db.close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def subscribe_webhook(session_factory, url):
+    """A webhook subscription with one queued release."""
+    db = session_factory()
+    user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+    project = Project(name="demo", source=ReleaseSource.GITHUB)
+    db.add_all([user, project])
+    db.flush()
+    webhook = WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url=url)
+    release = Release(project_id=project.id, version="1.0.0")
+    db.add_all([webhook, release])
+    db.flush()
+    notification_service.enqueue_releases(db, project, [release])
+    db.commit()
+    ids = webhook.id, project.id
+    db.close()
+    return ids
+
+
+def make_due(session_factory):
+    db = session_factory()
+    db.query(NotificationOutbox).update({NotificationOutbox.next_attempt_at: datetime.datetime.utcnow()})
+    db.commit()
+    db.close()
+
+
+class TestCircuitBreaking:
+    """Test per-destination circuit breakers and webhook health."""
+
+    def test_breaker_states(self):
+        """Test tripping, backing off, probing and closing."""
+        clock = FakeClock()
+        breakers = CircuitBreakers(failure_threshold=2, base_seconds=60, clock=clock)
+
+        assert breakers.acquire("hook") is None
+        breakers.record("hook", False)
+        assert breakers.state("hook") == CLOSED
+        breakers.record("hook", False)
+        assert breakers.state("hook") == OPEN
+        assert 30 <= breakers.acquire("hook") <= 60
+
+        # Half-open: one probe goes, everything else keeps waiting
+        clock.now += 61
+        assert breakers.acquire("hook") is None
+        assert breakers.state("hook") == HALF_OPEN
+        assert breakers.acquire("hook") == breakers.probe_interval
+
+        # A failed probe backs off twice as long
+        breakers.record("hook", False)
+        assert 60 <= breakers.acquire("hook") <= 120
+        clock.now += 121
+        assert breakers.acquire("hook") is None
+        breakers.record("hook", True)
+        assert breakers.state("hook") == CLOSED
+        assert breakers.snapshot() == {}
+
+    async def test_open_circuit_holds_rows_back(self, session_factory):
+        """Test that a failing endpoint stops using workers until its probe succeeds."""
+        webhook_id, _ = subscribe_webhook(session_factory, "http://down/hook")
+        clock = FakeClock()
+        calls = []
+        up = False
+
+        async def sender(delivery):
+            calls.append(delivery.destination)
+            if not up:
+                raise DeliveryError("Mattermost webhook returned HTTP 502", status_code=502)
+            return 204
+
+        dispatcher = OutboxDispatcher(
+            session_factory, {"mattermost": sender}, retry_base_seconds=0,
+            breakers=CircuitBreakers(failure_threshold=2, base_seconds=60, clock=clock),
+        )
+        for _ in range(3):
+            await dispatcher.run_once()
+            make_due(session_factory)
+        # Tripped after two failures; the third claim was parked, not sent
+        assert len(calls) == 2
+        assert dispatcher.breakers.snapshot()["mattermost:http://down/hook"]["state"] == OPEN
+
+        db = session_factory()
+        row = db.query(NotificationOutbox).one()
+        assert (row.status, row.attempts) == (PENDING, 2)
+        webhook = db.get(WebhookSubscription, webhook_id)
+        assert (webhook.failure_count, webhook.last_status_code) == (2, 502)
+        db.close()
+
+        up = True
+        clock.now += 61
+        assert await dispatcher.run_once() == 1
+        assert statuses(session_factory) == [DELIVERED]
+
+        db = session_factory()
+        webhook = db.get(WebhookSubscription, webhook_id)
+        assert (webhook.failure_count, webhook.success_count, webhook.last_status_code) == (0, 1, 204)
+        assert webhook.latency_ms is not None and webhook.last_delivery_at is not None
+        db.close()
+
+    async def test_disabled_after_repeated_failures(self, session_factory):
+        """Test that a webhook failing too often is switched off and unrouted."""
+        webhook_id, project_id = subscribe_webhook(session_factory, "http://gone/hook")
+
+        async def sender(delivery):
+            raise DeliveryError("Mattermost webhook returned HTTP 410", status_code=410)
+
+        dispatcher = OutboxDispatcher(
+            session_factory, {"mattermost": sender}, retry_base_seconds=0, disable_after=3,
+            breakers=CircuitBreakers(failure_threshold=100),
+        )
+        for _ in range(3):
+            await dispatcher.run_once()
+            make_due(session_factory)
+
+        assert statuses(session_factory) == [DEAD]
+        db = session_factory()
+        webhook = db.get(WebhookSubscription, webhook_id)
+        assert webhook.is_active is False
+        assert webhook.disabled_at is not None
+        assert routing_index.routes(db, project_id).webhooks == ()
+        db.close()
+
+
+class TestDeliveryLedger:
+    """Test that delivered notifications are never sent twice."""
+
+    def test_bloom_front(self, session_factory):
+        """Test that unseen keys are answered without the database."""
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"key-{i}")
+        assert all(f"key-{i}" in bloom for i in range(1000))
+        assert sum(f"other-{i}" in bloom for i in range(10000)) < 300
+
+        queue_rows(session_factory, [])
+        db = session_factory()
+        DeliveryLedger().record(db, [(1, "mattermost", "http://a/hook")])
+        db.commit()
+
+        # A fresh process learns recorded keys from the table
+        ledger = DeliveryLedger(capacity=1000)
+        ledger.refresh(db)
+        assert ledger.delivered(db, [(1, "mattermost", "http://b/hook")]) == set()
+        assert ledger.lookups == 0
+        assert ledger.delivered(db, [(1, "mattermost", "http://a/hook")]) == {(1, "mattermost", "http://a/hook")}
+        assert ledger.lookups == 1
+        # Confirmed keys are kept in the LRU
+        ledger.delivered(db, [(1, "mattermost", "http://a/hook")])
+        assert ledger.lookups == 1
+        db.close()
+
+    def test_refresh_catches_rows_committed_out_of_order(self, session_factory):
+        """Test that a row committed after a higher id still reaches the filter."""
+        queue_rows(session_factory, [])
+        db = session_factory()
+        now = datetime.datetime.utcnow()
+        db.add(DeliveryRecord(id=3, release_id=1, channel="mattermost", destination="http://a/hook", delivered_at=now))
+        db.commit()
+        ledger = DeliveryLedger(capacity=1000, refresh_overlap=10)
+        ledger.refresh(db)
+
+        # Another worker's transaction got id 2 first but committed last
+        db.add(DeliveryRecord(id=2, release_id=1, channel="mattermost", destination="http://b/hook", delivered_at=now))
+        db.commit()
+        ledger.refresh(db)
+
+        keys = [(1, "mattermost", "http://a/hook"), (1, "mattermost", "http://b/hook"), (1, "email", "dev@example.com")]
+        assert ledger.delivered(db, keys) == set(keys[:2])
+        db.close()
+
+    def test_refresh_reads_forward(self, session_factory):
+        """Test that refreshes read only new rows and the ids they skipped, until those expire."""
+        queue_rows(session_factory, [])
+        db = session_factory()
+        now = datetime.datetime.utcnow()
+        db.add_all([
+            DeliveryRecord(id=row_id, release_id=1, channel="mattermost", destination=f"http://{row_id}/hook", delivered_at=now)
+            for row_id in (1, 2, 3, 5, 6)
+        ])
+        db.commit()
+        clock = FakeClock()
+        ledger = DeliveryLedger(capacity=1000, refresh_overlap=10, gap_seconds=60, clock=clock)
+        ledger.refresh(db)
+        assert ledger.refreshed == 5
+
+        # Only the skipped id 4 is looked for again
+        ledger.refresh(db)
+        assert ledger.refreshed == 5
+        db.add_all([
+            DeliveryRecord(id=row_id, release_id=1, channel="mattermost", destination=f"http://{row_id}/hook", delivered_at=now)
+            for row_id in (4, 7)
+        ])
+        db.commit()
+        ledger.refresh(db)
+        assert ledger.refreshed == 7
+        keys = [(1, "mattermost", "http://4/hook"), (1, "mattermost", "http://7/hook")]
+        assert ledger.delivered(db, keys) == set(keys)
+
+        # A skipped id that never shows up counts as rolled back
+        db.add(DeliveryRecord(id=9, release_id=1, channel="mattermost", destination="http://9/hook", delivered_at=now))
+        db.commit()
+        ledger.refresh(db)
+        assert list(ledger._gaps) == [8]
+        clock.now += 61
+        ledger.refresh(db)
+        assert ledger._gaps == {}
+        db.close()
+
+    def test_record_races_another_worker(self, session_factory, monkeypatch):
+        """Test that a key another worker stores mid-record doesn't abort the outcome transaction."""
+        monkeypatch.setattr(database, "insert_ignore_statement", lambda dialect, model, key: None)
+        queue_rows(session_factory, ["http://a/hook", "http://b/hook"])
+        db = session_factory()
+        engine = db.get_bind()
+        keys = [(1, "mattermost", "http://a/hook"), (1, "mattermost", "http://b/hook")]
+        raced = []
+
+        def other_worker(connection, cursor, statement, parameters, context, executemany):
+            # Stores the first key just after this worker looked for it
+            if statement.startswith("SELECT delivery_ledger.release_id") and not raced:
+                raced.append(statement)
+                other = session_factory()
+                DeliveryLedger().record(other, keys[:1])
+                other.commit()
+                other.close()
+
+        event.listen(engine, "after_cursor_execute", other_worker)
+        try:
+            DeliveryLedger().record(db, keys)
+            db.query(NotificationOutbox).update({NotificationOutbox.status: DELIVERED})
+            db.commit()
+        finally:
+            event.remove(engine, "after_cursor_execute", other_worker)
+            db.close()
+
+        assert raced
+        assert statuses(session_factory) == [DELIVERED, DELIVERED]
+        db = session_factory()
+        assert sorted(
+            (row.release_id, row.channel, row.destination) for row in db.query(DeliveryRecord)
+        ) == keys
+        db.close()
+
+    async def test_lost_outcome_is_not_resent(self, session_factory):
+        """Test that a row delivered but handed out again is skipped."""
+        queue_rows(session_factory, ["http://mm/hook"])
+        sent = []
+
+        async def sender(delivery):
+            sent.append(delivery.id)
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": sender})
+        assert await dispatcher.run_once() == 1
+
+        # Same process, then a fresh one that only has the ledger table
+        for worker in (dispatcher, OutboxDispatcher(session_factory, {"mattermost": sender})):
+            # As if the worker died before its outcome was stored
+            db = session_factory()
+            db.query(NotificationOutbox).update({
+                NotificationOutbox.status: PENDING,
+                NotificationOutbox.next_attempt_at: datetime.datetime.utcnow(),
+            })
+            db.commit()
+            db.close()
+
+            assert await worker.run_once() == 0
+            assert statuses(session_factory) == [DELIVERED]
+            assert worker.duplicates == 1
+        assert sent == [1]
+
+    async def test_replay_window(self, session_factory):
+        """Test that replaying a window only re-sends what didn't get through."""
+        queue_rows(session_factory, ["http://ok/hook", "http://down/hook"])
+        sent = []
+
+        async def sender(delivery):
+            sent.append(delivery.destination)
+            if "down" in delivery.destination:
+                raise DeliveryError("503")
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": sender}, max_attempts=1)
+        await dispatcher.run_once()
+        assert statuses(session_factory) == [DELIVERED, DEAD]
+
+        db = session_factory()
+        since = datetime.datetime.utcnow() - datetime.timedelta(hours=1)
+        assert dispatcher.replay(db, since) == {"requeued": 1, "skipped": 1}
+        db.close()
+        assert statuses(session_factory) == [DELIVERED, PENDING]
+
+        sent.clear()
+        assert await dispatcher.run_once() == 1
+        assert sent == ["http://down/hook"]
+
+
+class TestCoalescing:
+    """Test that releases within a subscriber's window go out as one digest."""
+
+    async def test_window_merges_into_digest(self, session_factory):
+        """Test that held rows across projects are delivered together."""
+        db = session_factory()
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        projects = [Project(name=f"pkg-{i}", source=ReleaseSource.NPM) for i in range(2)]
+        db.add_all([user] + projects)
+        db.flush()
+        for project in projects:
+            db.add_all([
+                WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/hook", coalesce_seconds=60),
+                WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="http://mm/direct"),
+            ])
+        db.flush()
+        for project in projects:
+            releases = [Release(project_id=project.id, version=f"1.{i}.0") for i in range(2)]
+            db.add_all(releases)
+            db.flush()
+            notification_service.enqueue_releases(db, project, releases)
+        db.commit()
+
+        sent = []
+
+        async def sender(delivery):
+            sent.append(delivery)
+
+        dispatcher = OutboxDispatcher(session_factory, {"mattermost": sender}, per_destination_limit=10)
+        # Only the subscription without a window is sent right away
+        assert await dispatcher.run_once() == 4
+        assert {delivery.destination for delivery in sent} == {"http://mm/direct"}
+
+        # Close the window of the oldest held row; the rest come along
+        oldest = db.query(NotificationOutbox).filter(NotificationOutbox.coalesce == True).order_by(NotificationOutbox.id).first()
+        oldest.next_attempt_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        db.commit()
+        db.close()
+
+        sent.clear()
+        assert await dispatcher.run_once() == 1
+        digest = sent[0]
+        assert [(item.project_name, item.version) for item in digest.items] == [
+            ("pkg-0", "1.0.0"), ("pkg-0", "1.1.0"), ("pkg-1", "1.0.0"), ("pkg-1", "1.1.0"),
+        ]
+        assert statuses(session_factory) == [DELIVERED] * 8
+
+    def test_digest_message(self):
+        """Test the Mattermost digest layout."""
+        from app.services import mattermost
+        releases = [
+            {"project_name": "pkg", "version": f"1.{i}.0", "prerelease": i == 0, "release_url": f"http://x/{i}"}
+            for i in range(mattermost.DIGEST_MAX_RELEASES + 2)
+        ]
+        message = mattermost.MattermostService(channel="ops").create_release_digest(releases)
+
+        assert message.channel == "ops"
+        assert "**pkg**" in message.text
+        lines = message.attachments[0]["text"].split("\n")
+        assert lines[0] == "• [pkg v1.0.0](http://x/0) 🚧"
+        assert lines[-1] == "…and 2 more"
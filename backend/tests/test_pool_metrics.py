@@ -0,0 +1,90 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.core.database import statement_timeout_sql
+from app.core.metrics import Histogram
+from app.core.pool_metrics import InstrumentedQueuePool, PoolMetrics
+from app.core.security import get_current_user
+from app.main import app
+from app.models.user import User
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+    )
+    PoolMetrics.attach(engine)
+    yield engine
+    engine.dispose()
+
+
+class TestPoolMetrics:
+    """Test connection pool instrumentation."""
+
+    def test_histogram_buckets(self):
+        """Test cumulative bucket counts."""
+        histogram = Histogram((0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value)
+
+        assert histogram.cumulative() == {"0.1": 2, "1": 3, "+Inf": 4}
+        assert histogram.sum == pytest.approx(3.65)
+
+    def test_checkouts_overflow_and_timeouts(self, engine):
+        """Test checked-out count, overflow connections and checkout timeouts."""
+        metrics = engine.pool.metrics
+        first, second = engine.connect(), engine.connect()
+
+        assert (metrics.checked_out, metrics.connects, metrics.overflow_connects) == (2, 2, 1)
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        assert metrics.timeouts == 1
+        assert metrics.wait_seconds.count == 3
+        assert metrics.wait_seconds.sum >= 0.05
+
+        first.close()
+        second.close()
+        assert (metrics.checked_out, metrics.peak_checked_out, metrics.held_seconds.count) == (0, 2, 2)
+        # The overflow connection is closed on checkin
+        assert metrics.lifetime_seconds.count == 1
+
+    def test_metrics_survive_dispose(self, engine):
+        """Test that a recreated pool keeps reporting into the same metrics."""
+        metrics = engine.pool.metrics
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        engine.dispose()
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+        assert engine.pool.metrics is metrics
+        assert (metrics.checkouts, metrics.connects, metrics.wait_seconds.count) == (2, 2, 2)
+        assert metrics.lifetime_seconds.count == 1
+
+    def test_statement_timeouts(self):
+        """Test the per-session timeout statement of each server."""
+        mariadb = create_engine("mariadb+pymysql://user@localhost/db").dialect
+
+        assert statement_timeout_sql(mariadb, 2.5) == "SET SESSION max_statement_time = 2.5"
+        assert statement_timeout_sql(mysql.dialect(), 2.5) == "SET SESSION max_execution_time = 2500"
+        assert statement_timeout_sql(postgresql.dialect(), 2.5) == "SET statement_timeout = 2500"
+        assert statement_timeout_sql(sqlite.dialect(), 2.5) is None
+        assert statement_timeout_sql(mariadb, 0) is None
+
+    def test_admin_endpoint(self):
+        """Test that the pool metrics are served to admins."""
+        app.dependency_overrides[get_current_user] = lambda: User(id=1, email="dev@example.com")
+        try:
+            pools = TestClient(app).get("/api/admin/database/pool").json()
+        finally:
+            app.dependency_overrides.clear()
+
+        assert pools["primary"]["pool_size"] >= 1
+        assert "+Inf" in pools["primary"]["wait_seconds"]["buckets"]
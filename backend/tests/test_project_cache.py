@@ -0,0 +1,119 @@
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.category import Category, ProjectCategory
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.services.events import EventHub, StreamEvent, RELEASE_CREATED
+from app.services.project_cache import ProjectDetailCache, project_cache
+
+
+@pytest.fixture
+def project(db):
+    """A project with releases, subscribers and a category."""
+    users = [User(email=f"user{i}@example.com", password_hash="x", first_name="U", last_name=str(i)) for i in range(3)]
+    project = Project(name="demo", source=ReleaseSource.GITHUB)
+    category = Category(name="Web", slug="web")
+    db.add_all(users + [project, category])
+    db.flush()
+    db.add_all([Release(project_id=project.id, version=f"1.{i}.0", changelog="x" * 1000) for i in range(7)])
+    db.add_all([Subscription(user_id=u.id, project_id=project.id) for u in users[:2]])
+    db.add(ProjectCategory(project_id=project.id, category_id=category.id))
+    db.commit()
+    return project
+
+
+def count_queries(engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+class TestProjectDetailCache:
+    """Test the cached project detail read model."""
+
+    def test_load_and_hit(self, db, db_engine, project):
+        """Test that a cache hit issues no queries."""
+        cache = ProjectDetailCache()
+        detail = cache.get_or_load(db, project.id)
+
+        assert len(detail.data["recent_releases"]) == 5
+        assert len(detail.data["recent_releases"][0]["changelog"]) == 500
+        assert detail.data["subscriber_count"] == 2
+        assert detail.data["categories"][0]["slug"] == "web"
+        assert "_sa_instance_state" not in detail.data
+
+        statements = count_queries(db_engine)
+        start = time.perf_counter()
+        for _ in range(1000):
+            assert cache.get_or_load(db, project.id) is detail
+        assert statements == []
+        # Hits are dictionary lookups: far below a millisecond each
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+    def test_release_event_invalidates(self, db, project):
+        """Test that a new release drops the cached entry."""
+        hub = EventHub()
+        cache = ProjectDetailCache()
+        hub.add_listener(RELEASE_CREATED, cache.on_event)
+        cache.get_or_load(db, project.id)
+
+        hub._dispatch(StreamEvent(type=RELEASE_CREATED, project_id=project.id, data="{}"))
+
+        assert cache.get(project.id) is None
+
+    def test_racing_load_not_stored(self, db, project, monkeypatch):
+        """Test that a load overlapping an invalidation isn't cached."""
+        cache = ProjectDetailCache()
+        from app.services import project_cache as module
+        real_load = module.load_project_detail
+
+        def load_then_invalidate(session, project_id):
+            detail = real_load(session, project_id)
+            cache.invalidate(project_id)
+            return detail
+
+        monkeypatch.setattr(module, "load_project_detail", load_then_invalidate)
+        assert cache.get_or_load(db, project.id) is not None
+        assert cache.get(project.id) is None
+
+    def test_expiry_and_lru(self, db, project):
+        """Test TTL expiry and the entry limit."""
+        cache = ProjectDetailCache(ttl_seconds=-1)
+        cache.get_or_load(db, project.id)
+        assert cache.get(project.id) is None
+
+        cache = ProjectDetailCache(max_entries=0)
+        cache.get_or_load(db, project.id)
+        assert cache.get(project.id) is None
+
+
+class TestProjectDetailEndpoint:
+    """Test GET /projects/{id} on top of the read model."""
+
+    def test_subscription_flag_per_viewer(self, db, project):
+        """Test that cached data is shared but the flag is per user."""
+        project_cache.invalidate()
+        app.dependency_overrides[get_db] = lambda: db
+        client = TestClient(app)
+        try:
+            for user_id, subscribed in ((1, True), (3, False)):
+                app.dependency_overrides[get_current_user] = lambda user_id=user_id: db.get(User, user_id)
+                response = client.get(f"/api/projects/{project.id}")
+                assert response.status_code == 200
+                body = response.json()
+                assert body["is_subscribed"] is subscribed
+                assert body["subscriber_count"] == 2
+                assert len(body["recent_releases"]) == 5
+
+            assert client.get("/api/projects/999").status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+            project_cache.invalidate()
+
@@ -0,0 +1,138 @@
+import datetime
+import importlib
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.user import User
+from app.services.events import EventHub
+from app.services.project_stats import reconcile_project_stats
+from app.services.sources import Release as SourceRelease
+from tests.test_events import FakeSource
+
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+class DatedSource(FakeSource):
+    """Release source giving versions offset-aware dates, as the real sources parse them."""
+
+    def __init__(self, dates):
+        super().__init__(list(dates))
+        self.dates = dates
+
+    async def fetch_releases(self, external_id):
+        return [SourceRelease(project_id=0, version=v, release_date=d) for v, d in self.dates.items()]
+
+
+def ingest(monkeypatch, db, versions, source=None):
+    monkeypatch.setattr(fetcher_module, "event_hub", EventHub())
+    monkeypatch.setattr(fetcher_module, "get_source", lambda name: source or FakeSource(versions))
+    return fetcher_module.ReleaseFetcher().fetch_all(db)
+
+
+class TestProjectStats:
+    """Test release stats kept on projects."""
+
+    async def test_ingest_updates_stats(self, db, monkeypatch):
+        """Test that ingest keeps the latest stable version and count current."""
+        project = Project(name="demo", source=ReleaseSource.NPM)
+        db.add(project)
+        db.commit()
+
+        await ingest(monkeypatch, db, ["1.9.0", "1.10.0", "2.0.0-rc.1"])
+        assert (project.latest_version, project.release_count) == ("1.10.0", 3)
+        assert project.latest_release_id == db.query(Release.id).filter(Release.version == "1.10.0").scalar()
+        assert project.last_release_at is not None
+
+        # An older patch release does not replace the latest version
+        await ingest(monkeypatch, db, ["1.9.1", "2.0.0"])
+        assert (project.latest_version, project.release_count) == ("2.0.0", 5)
+        await ingest(monkeypatch, db, ["1.9.2"])
+        assert (project.latest_version, project.release_count) == ("2.0.0", 6)
+
+    async def test_offset_aware_release_dates(self, db, monkeypatch):
+        """Test that dates with an offset are stored as naive UTC and compare on later ingests."""
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add(project)
+        db.commit()
+        berlin = datetime.timezone(datetime.timedelta(hours=2))
+
+        await ingest(monkeypatch, db, None, DatedSource({
+            "1.0.0": datetime.datetime(2024, 5, 1, 12, tzinfo=datetime.timezone.utc),
+            "1.1.0": None,
+        }))
+        first_checked = project.last_checked_at
+        await ingest(monkeypatch, db, None, DatedSource({
+            "1.2.0": datetime.datetime(2024, 6, 1, 12, tzinfo=berlin),
+        }))
+
+        assert project.release_count == 3
+        assert project.last_checked_at > first_checked
+        assert project.last_release_at >= datetime.datetime(2024, 6, 1, 10)
+        stored = db.query(Release.release_date).filter(Release.version == "1.2.0").scalar()
+        assert stored == datetime.datetime(2024, 6, 1, 10)
+
+    def test_reconciliation_repairs_drift(self, db, session_factory):
+        """Test that reconciliation recomputes drifted stats and leaves correct ones."""
+        released = datetime.datetime(2024, 5, 1)
+        drifted = Project(name="drifted", source=ReleaseSource.NPM, release_count=7, latest_version="9.9.9")
+        correct = Project(name="correct", source=ReleaseSource.NPM)
+        empty = Project(name="empty", source=ReleaseSource.NPM, release_count=2, last_release_at=released)
+        db.add_all([drifted, correct, empty])
+        db.flush()
+        db.add_all([
+            Release(project_id=drifted.id, version="1.2.0", release_date=released),
+            Release(project_id=drifted.id, version="1.3.0-beta.1", prerelease=True),
+            Release(project_id=correct.id, version="0.1.0", release_date=released),
+        ])
+        db.commit()
+
+        assert reconcile_project_stats(session_factory, batch_size=2) == (3, 3)
+        assert reconcile_project_stats(session_factory) == (3, 0)
+
+        db.expire_all()
+        assert (drifted.latest_version, drifted.latest_version_key is not None, drifted.release_count) == ("1.2.0", True, 2)
+        assert drifted.last_release_at >= released
+        assert (correct.latest_version, correct.release_count, correct.last_release_at) == ("0.1.0", 1, released)
+        assert (empty.latest_version, empty.release_count, empty.last_release_at) == (None, 0, None)
+
+    def test_list_is_a_single_query(self, db, db_engine, session_factory):
+        """Test that listing 100 projects with latest versions reads only projects."""
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        db.add(user)
+        projects = [Project(name=f"pkg-{i}", source=ReleaseSource.PYPI) for i in range(100)]
+        db.add_all(projects)
+        db.flush()
+        db.add_all(Release(project_id=project.id, version=f"1.{i}.0") for i, project in enumerate(projects))
+        db.commit()
+        reconcile_project_stats(session_factory)
+        db.expire_all()
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        event.listen(db_engine, "before_cursor_execute", record)
+        try:
+            listed = TestClient(app).get("/api/projects/", params={"limit": 100}).json()
+        finally:
+            event.remove(db_engine, "before_cursor_execute", record)
+            app.dependency_overrides.clear()
+
+        assert len(listed) == 100
+        assert {project["latest_version"] for project in listed} == {f"1.{i}.0" for i in range(100)}
+        assert all(project["release_count"] == 1 for project in listed)
+        assert len(statements) == 1 and "releases" not in statements[0]
@@ -0,0 +1,131 @@
+import asyncio
+import datetime
+import importlib
+import re
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.webhook import WebhookSubscription
+from app.services.project_cache import project_cache
+from app.services.routing import routing_index
+from tests.test_events import FakeSource
+
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+HOT_TABLES = ("releases", "subscriptions", "webhook_subscriptions")
+# A scan of a whole hot table; "SCAN releases USING INDEX" walks an index in order instead
+FULL_SCAN = re.compile(r"\bSCAN (?:TABLE )?(?:%s)\b(?! USING)" % "|".join(HOT_TABLES))
+
+
+def query_plans(engine, action):
+    """SQLite query plans of the SELECTs `action` runs, one string each."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        action()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    with engine.connect() as connection:
+        return [
+            " | ".join(row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+            for statement, parameters in statements
+        ]
+
+
+class TestQueryPlans:
+    """Test that hot endpoints read through indexes, not table scans."""
+
+    @pytest.fixture
+    def user(self, db):
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        projects = [Project(name=f"pkg-{i}", source=ReleaseSource.NPM) for i in range(3)]
+        db.add(user)
+        db.add_all(projects)
+        db.flush()
+        now = datetime.datetime.utcnow()
+        for project in projects:
+            db.add_all(
+                Release(project_id=project.id, version=f"1.{i}.0", created_at=now - datetime.timedelta(days=i))
+                for i in range(5)
+            )
+            db.add(WebhookSubscription(project_id=project.id, user_id=user.id, webhook_url="https://hooks.example.com"))
+        db.add_all(Subscription(user_id=user.id, project_id=project.id) for project in projects[:2])
+        db.commit()
+        return user
+
+    @pytest.fixture
+    def client(self, db, user):
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        yield TestClient(app)
+        app.dependency_overrides.clear()
+        project_cache.invalidate()
+
+    def plans(self, db_engine, action):
+        # Warm the routing index first: its full load is a scan by design
+        action()
+        plans = query_plans(db_engine, action)
+        assert plans
+        assert not [plan for plan in plans if FULL_SCAN.search(plan)], plans
+        return " || ".join(plans)
+
+    @pytest.mark.parametrize("path, index", [
+        ("/api/releases/feed", "ix_releases_project_created"),
+        ("/api/feeds/rss", "ix_releases_project_created"),
+        ("/api/releases/?project_id=1", "ix_releases_project_created"),
+        ("/api/releases/", "ix_releases_created"),
+        ("/api/subscriptions/", "uq_subscriptions_user_project"),
+        ("/api/webhooks/", "ix_webhook_subscriptions_user"),
+    ])
+    def test_read_endpoints(self, db_engine, client, path, index):
+        """Test the feeds and per-user lists."""
+        assert index in self.plans(db_engine, lambda: client.get(path).raise_for_status())
+
+    def test_subscribe_check(self, db_engine, client):
+        """Test the already-subscribed check when subscribing."""
+        plans = self.plans(db_engine, lambda: client.post("/api/subscriptions/", json={"project_id": 1}))
+        assert "uq_subscriptions_user_project" in plans
+
+    def test_project_detail_subscribers(self, db_engine, client):
+        """Test the subscriber lookup behind the project page."""
+        def load():
+            project_cache.invalidate()
+            client.get("/api/projects/1").raise_for_status()
+
+        assert "ix_subscriptions_project" in self.plans(db_engine, load)
+
+    def test_routing_reload(self, db, db_engine, user):
+        """Test the subscriber and webhook lookups when a project's routes change."""
+        def reload():
+            routing_index.invalidate(project_id=1)
+            routing_index.routes(db, 1)
+
+        plans = self.plans(db_engine, reload)
+        assert "ix_subscriptions_project" in plans
+        assert "ix_webhook_subscriptions_project_active" in plans
+
+    def test_ingest_dedupe(self, db, db_engine, user, monkeypatch):
+        """Test the existing-version check during ingest."""
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["1.0.0", "1.1.0"]))
+        project = db.get(Project, 1)
+        fetched = []
+
+        def fetch():
+            # Already stored, so nothing is inserted
+            fetched.append(asyncio.run(fetcher_module.ReleaseFetcher().fetch_project(db, project)))
+
+        assert "uq_releases_project_version" in self.plans(db_engine, fetch)
+        assert fetched == [0, 0]
@@ -0,0 +1,158 @@
+import asyncio
+import time
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.core import replicas
+from app.core.database import Base, get_db
+from app.core.replicas import STICKY_COOKIE, ReplicaRouter, write_heartbeat
+from app.core.security import get_current_user
+from app.main import app
+from app.models.heartbeat import ReplicaHeartbeat
+from app.models.project import Project, ReleaseSource
+from app.models.user import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """Primary and replica as two SQLite files; "replication" is writing to both."""
+    factories = []
+    for name in ("primary", "replica"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db", connect_args={"check_same_thread": False})
+        Base.metadata.create_all(bind=engine)
+        factories.append(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+        db = factories[-1]()
+        db.add(User(id=1, email="dev@example.com", password_hash="x", first_name="D", last_name="V"))
+        db.add(Project(name=f"{name}-only", source=ReleaseSource.NPM))
+        db.commit()
+        db.close()
+    yield factories
+    for factory in factories:
+        factory.kw["bind"].dispose()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def router(databases, clock, monkeypatch):
+    primary, replica = databases
+    router = ReplicaRouter(primary, replica, max_lag_seconds=5, sticky_seconds=10, heartbeat_interval=1, clock=clock)
+    monkeypatch.setattr(replicas, "replica_router", router)
+    return router
+
+
+def replicate_heartbeat(databases, now):
+    for factory in databases:
+        db = factory()
+        try:
+            write_heartbeat(db, now)
+        finally:
+            db.close()
+
+
+@pytest.fixture
+def client(databases, router):
+    primary, _ = databases
+
+    def primary_db():
+        db = primary()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = primary_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, email="dev@example.com")
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def listed_names(client, **kwargs):
+    return {project["name"] for project in client.get("/api/projects/", **kwargs).json()}
+
+
+class TestReplicaRouting:
+    """Test sending read-only endpoints to a replica."""
+
+    def test_reads_go_to_the_replica(self, databases, clock, client, router):
+        """Test that listings read from an up-to-date replica."""
+        replicate_heartbeat(databases, clock.now)
+
+        assert listed_names(client) == {"replica-only"}
+        assert (router.replica_reads, router.primary_reads) == (1, 0)
+
+    def test_read_your_writes(self, databases, clock, client, router):
+        """Test that a client's reads stay on the primary for a while after its write."""
+        replicate_heartbeat(databases, clock.now)
+
+        response = client.post("/api/subscriptions/", json={"project_id": 1})
+        assert response.status_code == 201
+        assert STICKY_COOKIE in response.cookies
+        assert listed_names(client) == {"primary-only"}
+
+        # Other clients still read from the replica
+        assert listed_names(TestClient(app)) == {"replica-only"}
+
+        clock.now += 11
+        replicate_heartbeat(databases, clock.now)
+        assert listed_names(client) == {"replica-only"}
+
+    def test_sticky_by_token_without_cookies(self, databases, clock, client):
+        """Test that clients dropping the cookie are recognised by their token."""
+        replicate_heartbeat(databases, clock.now)
+        headers = {"Authorization": "Bearer abc"}
+
+        client.post("/api/subscriptions/", json={"project_id": 1}, headers=headers)
+        client.cookies.clear()
+
+        assert listed_names(client, headers=headers) == {"primary-only"}
+        assert listed_names(client, headers={"Authorization": "Bearer other"}) == {"replica-only"}
+
+    def test_lagging_replica_falls_back_to_primary(self, databases, clock, client, router):
+        """Test lag-aware fallback, and that lag is checked at most once per interval."""
+        primary, replica = databases
+        replicate_heartbeat(databases, clock.now)
+        # The primary kept beating; the replica stopped applying it
+        clock.now += 31
+        replicate_heartbeat([primary], clock.now)
+
+        assert router.replica_lag() == pytest.approx(31)
+        assert listed_names(client) == {"primary-only"}
+
+        replicate_heartbeat([replica], clock.now)
+        assert listed_names(client) == {"primary-only"}  # Not rechecked yet
+        clock.now += 1
+        assert listed_names(client) == {"replica-only"}
+
+    def test_missing_heartbeat_reads_primary(self, client, router):
+        """Test that a replica without a heartbeat is treated as behind."""
+        assert listed_names(client) == {"primary-only"}
+        assert router.replica_lag() == float("inf")
+
+    async def test_heartbeat_written_on_primary(self, databases):
+        """Test that the started router keeps the heartbeat current."""
+        primary, replica = databases
+        router = ReplicaRouter(primary, replica, heartbeat_interval=0.01)
+
+        await router.start()
+        await asyncio.sleep(0.1)
+        await router.stop()
+
+        db = primary()
+        try:
+            assert db.query(ReplicaHeartbeat).count() == 1
+            assert time.time() - replicas._timestamp(db.query(ReplicaHeartbeat.beat_at).scalar()) < 1
+        finally:
+            db.close()
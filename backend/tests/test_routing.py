@@ -0,0 +1,176 @@
+import asyncio
+import importlib
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.notification import NotificationOutbox
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.models.subscription import Subscription
+from app.models.user import User
+from app.models.webhook import WebhookSubscription
+from app.services.email import EmailConfig, email_service
+from app.services.events import EventHub, StreamEvent, RELEASE_CREATED, SUBSCRIPTIONS_CHANGED, event_hub
+from app.services.notifications import notification_service
+from app.services.routing import RoutingIndex, routing_index
+from tests.test_project_cache import count_queries
+
+stream_module = importlib.import_module("app.api.stream")
+
+
+@pytest.fixture
+def setup(db):
+    """Two users following a project, plus its webhooks."""
+    ann = User(email="ann@example.com", password_hash="x", first_name="Ann", last_name="A")
+    bob = User(email="bob@example.com", password_hash="x", first_name="Bob", last_name="B")
+    project = Project(name="demo", source=ReleaseSource.GITHUB)
+    other = Project(name="other", source=ReleaseSource.GITHUB)
+    db.add_all([ann, bob, project, other])
+    db.flush()
+    db.add_all([
+        Subscription(user_id=ann.id, project_id=project.id, coalesce_seconds=60),
+        Subscription(user_id=bob.id, project_id=project.id, notify_email=False),
+        Subscription(user_id=bob.id, project_id=other.id),
+        WebhookSubscription(project_id=project.id, user_id=ann.id, webhook_url="http://mm/a", notify_prereleases=True),
+        WebhookSubscription(project_id=project.id, user_id=ann.id, webhook_url="http://mm/off", is_active=False),
+    ])
+    db.commit()
+    return ann, bob, project, other
+
+
+@pytest.fixture
+def client(db, setup):
+    ann = setup[0]
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[get_current_user] = lambda: ann
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+class TestRoutingIndex:
+    """Test the in-memory subscription routing index."""
+
+    def test_built_from_database(self, db, setup):
+        """Test that routes carry email subscribers and active webhooks with their flags."""
+        ann, bob, project, other = setup
+        index = RoutingIndex()
+        index.load(db)
+
+        routes = index.routes(db, project.id)
+        assert [(r.user_id, r.coalesce_seconds) for r in routes.emails] == [(ann.id, 60)]
+        assert [(w.url, w.notify_releases, w.notify_prereleases, w.notify_security) for w in routes.webhooks] == [
+            ("http://mm/a", True, True, True)
+        ]
+        assert index.routes(db, 999).emails == ()
+        assert index.project_ids(db, bob.id) == {project.id, other.id}
+        assert index.recipient(db, ann.id).first_name == "Ann"
+
+    def test_api_changes_refresh_routes(self, db, setup, client):
+        """Test that subscription, webhook and profile changes show up in the index."""
+        ann, bob, project, other = setup
+        assert routing_index.project_ids(db, ann.id) == {project.id}
+
+        response = client.post("/api/subscriptions/", json={"project_id": other.id})
+        assert response.status_code == 201
+        assert routing_index.project_ids(db, ann.id) == {project.id, other.id}
+        assert [r.user_id for r in routing_index.routes(db, other.id).emails] == [bob.id, ann.id]
+
+        client.put(f"/api/subscriptions/{response.json()['id']}", json={"notify_email": False})
+        assert [r.user_id for r in routing_index.routes(db, other.id).emails] == [bob.id]
+
+        webhook = client.post("/api/webhooks/", json={"project_id": other.id, "webhook_url": "http://mm/new"}).json()
+        assert [w.url for w in routing_index.routes(db, other.id).webhooks] == ["http://mm/new"]
+        client.put(f"/api/webhooks/{webhook['id']}", json={"notify_prereleases": True})
+        assert routing_index.routes(db, other.id).webhooks[0].notify_prereleases is True
+        client.delete(f"/api/webhooks/{webhook['id']}")
+        assert routing_index.routes(db, other.id).webhooks == ()
+
+        client.patch("/api/auth/me", json={"first_name": "Annie"})
+        assert routing_index.recipient(db, ann.id).first_name == "Annie"
+
+    def test_profile_names_cannot_be_cleared(self, db, setup, client):
+        """Test that null or empty names are rejected instead of reaching the NOT NULL columns."""
+        ann = setup[0]
+
+        assert client.patch("/api/auth/me", json={"first_name": None}).status_code == 422
+        assert client.patch("/api/auth/me", json={"last_name": ""}).status_code == 422
+        response = client.patch("/api/auth/me", json={"digest_hour": 7})
+        assert response.status_code == 200
+        assert (ann.first_name, ann.last_name, ann.digest_hour) == ("Ann", "A", 7)
+
+    def test_open_streams_follow_subscriptions(self, db, db_engine, setup, client, monkeypatch):
+        """Test that subscribing or unsubscribing takes effect on a stream that is already open."""
+        ann, bob, project, other = setup
+        monkeypatch.setattr(stream_module, "SessionLocal", sessionmaker(bind=db_engine))
+        subscriber = event_hub.subscribe(ann.id, routing_index.project_ids(db, ann.id))
+        try:
+            response = client.post("/api/subscriptions/", json={"project_id": other.id})
+            assert subscriber.project_ids == {project.id, other.id}
+            asyncio.run(event_hub.publish(RELEASE_CREATED, {"version": "1.0.0"}, project_id=other.id))
+            assert subscriber.queue.get_nowait().project_id == other.id
+
+            client.delete(f"/api/subscriptions/{response.json()['id']}")
+            assert subscriber.project_ids == {project.id}
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    async def test_stream_resync_runs_off_the_event_loop(self, db, db_engine, setup, monkeypatch):
+        """Test that a change event arriving on the event loop resyncs the user's streams."""
+        ann, bob, project, other = setup
+        monkeypatch.setattr(stream_module, "SessionLocal", sessionmaker(bind=db_engine))
+        subscriber = event_hub.subscribe(ann.id, [project.id])
+        try:
+            db.add(Subscription(user_id=ann.id, project_id=other.id))
+            db.commit()
+            await event_hub.publish(SUBSCRIPTIONS_CHANGED, {"user_id": ann.id}, project_id=other.id)
+            await asyncio.gather(*stream_module._resyncs)
+            assert subscriber.project_ids == {project.id, other.id}
+        finally:
+            event_hub.unsubscribe(subscriber)
+
+    def test_change_events_from_other_workers(self, db, setup):
+        """Test that a change event makes the index reload just that entry."""
+        ann, bob, project, other = setup
+        index = RoutingIndex()
+        hub = EventHub()
+        hub.add_listener(SUBSCRIPTIONS_CHANGED, index.on_event)
+        index.load(db)
+
+        # Written by another worker; nothing changes until its event arrives
+        db.add(Subscription(user_id=ann.id, project_id=other.id))
+        db.commit()
+        assert index.project_ids(db, ann.id) == {project.id}
+
+        hub._dispatch(StreamEvent(
+            type=SUBSCRIPTIONS_CHANGED,
+            project_id=other.id,
+            data='{"type": "subscriptions.changed", "project_id": %d, "data": {"user_id": %d}}' % (other.id, ann.id),
+        ))
+        assert index.project_ids(db, ann.id) == {project.id, other.id}
+        assert {r.user_id for r in index.routes(db, other.id).emails} == {ann.id, bob.id}
+
+    def test_fanout_without_queries(self, db, db_engine, setup, monkeypatch):
+        """Test that queueing a release reads subscribers from the index only."""
+        ann, bob, project, other = setup
+        monkeypatch.setattr(email_service, "config", EmailConfig(host="smtp.example.com", port=587, username="", password=""))
+        routing_index.load(db)
+        release = Release(project_id=project.id, version="2.0.0-rc.1", prerelease=True)
+        db.add(release)
+        db.flush()
+
+        statements = count_queries(db_engine)
+        queued = notification_service.enqueue_releases(db, project, [release])
+        db.flush()
+
+        assert not [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert queued == 2
+        rows = db.query(NotificationOutbox).order_by(NotificationOutbox.channel).all()
+        assert [(r.channel, r.destination, r.variant, r.coalesce) for r in rows] == [
+            ("email", "ann@example.com", "Ann", True),
+            ("mattermost", "http://mm/a", None, False),
+        ]
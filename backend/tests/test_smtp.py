@@ -0,0 +1,220 @@
+import asyncio
+import time
+from email.message import EmailMessage
+import pytest
+from app.core.config import get_settings
+from app.services import email
+from app.services.email import EmailConfig, EmailService
+from app.services.smtp import RateLimiter, SMTPPool
+
+
+class SMTPStandIn:
+    """Local stand-in for an SMTP relay.
+
+    Speaks just enough SMTP for aiosmtplib (no TLS/AUTH). Recipients
+    containing "reject" are refused, and with `drop_after` the server hangs
+    up after that many messages on a session. `handshake_delay` stands in
+    for the TLS and AUTH round trips of a real relay.
+    """
+
+    def __init__(self, drop_after: int = 0, handshake_delay: float = 0):
+        self.drop_after = drop_after
+        self.handshake_delay = handshake_delay
+        self.messages = []
+        self.sessions = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.sessions += 1
+        sent = 0
+        recipients = []
+
+        def reply(line):
+            writer.write(line.encode() + b"\r\n")
+
+        await asyncio.sleep(self.handshake_delay)
+        reply("220 stand-in ESMTP")
+        try:
+            while True:
+                await writer.drain()
+                line = (await reader.readline()).decode().strip()
+                if not line:
+                    break
+                verb = line.split(" ", 1)[0].upper()
+                if verb in ("EHLO", "HELO"):
+                    reply("250-stand-in\r\n250 8BITMIME")
+                elif verb == "MAIL":
+                    recipients = []
+                    reply("250 OK")
+                elif verb == "RCPT":
+                    if "reject" in line:
+                        reply("550 No such user")
+                    else:
+                        recipients.append(line)
+                        reply("250 OK")
+                elif verb == "DATA":
+                    reply("354 End data with <CR><LF>.<CR><LF>")
+                    await writer.drain()
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    self.messages.append((recipients, data))
+                    sent += 1
+                    reply("250 Queued")
+                    if self.drop_after and sent >= self.drop_after:
+                        await writer.drain()
+                        break
+                elif verb == "QUIT":
+                    reply("221 Bye")
+                    await writer.drain()
+                    break
+                else:
+                    reply("250 OK")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def relay():
+    relay = SMTPStandIn()
+    await relay.start()
+    yield relay
+    await relay.stop()
+
+
+def make_message(to="dev@example.com"):
+    message = EmailMessage()
+    message["From"] = "releases@example.com"
+    message["To"] = to
+    message["Subject"] = "New release"
+    message.set_content("demo 1.0.0 is out")
+    return message
+
+
+class TestSMTPPool:
+    """Test pooled SMTP sessions."""
+
+    async def test_reuses_sessions(self, relay):
+        """Test that many messages share a bounded number of sessions."""
+        pool = SMTPPool("127.0.0.1", relay.port, max_connections=2)
+        errors = await pool.send_many([make_message() for _ in range(50)])
+        await pool.close()
+
+        assert errors == [None] * 50
+        assert len(relay.messages) == 50
+        assert pool.connects <= 2
+
+    async def test_recycles_after_message_limit(self, relay):
+        """Test that sessions are closed after max_messages_per_connection."""
+        pool = SMTPPool("127.0.0.1", relay.port, max_connections=1, max_messages_per_connection=10)
+        for _ in range(30):
+            await pool.send(make_message())
+        await pool.close()
+
+        assert pool.connects == 3
+
+    async def test_reconnects_when_relay_hangs_up(self):
+        """Test that a dropped session is replaced and the message resent."""
+        relay = SMTPStandIn(drop_after=5)
+        await relay.start()
+        pool = SMTPPool("127.0.0.1", relay.port, max_connections=1)
+        try:
+            for _ in range(12):
+                await pool.send(make_message())
+        finally:
+            await pool.close()
+            await relay.stop()
+
+        assert len(relay.messages) == 12
+        assert pool.connects == 3
+
+    async def test_refused_recipient_keeps_session(self, relay):
+        """Test that a refused message fails alone and the session is reused."""
+        pool = SMTPPool("127.0.0.1", relay.port, max_connections=1)
+        errors = await pool.send_many([make_message(), make_message("reject@example.com"), make_message()])
+        await pool.close()
+
+        assert errors[0] is None and errors[2] is None
+        assert errors[1] is not None
+        assert len(relay.messages) == 2
+        assert pool.connects == 1
+
+    async def test_rate_limit(self):
+        """Test that sends beyond the burst wait for tokens."""
+        limiter = RateLimiter(rate=50)
+        start = time.perf_counter()
+        for _ in range(60):
+            await limiter.acquire()
+        assert time.perf_counter() - start >= 0.15
+
+
+class TestEmailServicePool:
+    """Test that EmailService sends through the pool."""
+
+    async def test_send_email(self, relay):
+        config = EmailConfig(host="127.0.0.1", port=relay.port, username="", password="", use_tls=False)
+        service = EmailService(config=config, pool=SMTPPool("127.0.0.1", relay.port))
+        for _ in range(3):
+            assert await service.send_email("dev@example.com", "Hello", "<p>Hi</p>", "Hi")
+        await service.close()
+
+        assert len(relay.messages) == 3
+        assert relay.sessions == 1
+
+    def test_reinit_keeps_pool(self, monkeypatch):
+        """Test that initialising the service again keeps its live pool."""
+        settings = get_settings()
+        monkeypatch.setattr(settings, "SMTP_HOST", "smtp.example.com")
+        monkeypatch.setattr(settings, "SMTP_USER", "releases")
+        monkeypatch.setattr(email, "email_service", EmailService())
+
+        assert email.init_email_service()
+        pool = email.email_service.get_pool()
+        assert email.init_email_service()
+        assert email.email_service.pool is pool
+
+
+    def test_smaller_pool(self):
+        """Test that a separate pool can open fewer sessions and send slower than the shared one."""
+        service = EmailService(config=EmailConfig(host="smtp.example.com", port=587, username="", password=""))
+        shared, own = service.get_pool(), service.create_pool(max_connections=1, rate_limit=2)
+
+        assert (shared.max_connections, shared.limiter.rate) == (get_settings().SMTP_POOL_SIZE, get_settings().SMTP_RATE_LIMIT)
+        assert (own.max_connections, own.limiter.rate) == (1, 2)
+        assert service.pool is shared
+
+@pytest.mark.slow
+class TestSMTPBenchmark:
+    """Throughput of pooled sessions against a connection per message."""
+
+    async def test_pooled_vs_per_message(self):
+        import aiosmtplib
+
+        relay = SMTPStandIn(handshake_delay=0.005)
+        await relay.start()
+
+        count = 200
+        start = time.perf_counter()
+        for _ in range(count):
+            await aiosmtplib.send(make_message(), hostname="127.0.0.1", port=relay.port, use_tls=False, start_tls=False)
+        per_message = count / (time.perf_counter() - start)
+
+        pool = SMTPPool("127.0.0.1", relay.port, max_connections=4)
+        pooled_count = 2000
+        start = time.perf_counter()
+        errors = await pool.send_many([make_message() for _ in range(pooled_count)])
+        pooled = pooled_count / (time.perf_counter() - start)
+        await pool.close()
+        await relay.stop()
+
+        print(f"\nper-message sessions: {per_message:.0f} msg/s, pooled: {pooled:.0f} msg/s ({pool.connects} sessions)")
+        assert errors == [None] * pooled_count
+        assert pooled > per_message
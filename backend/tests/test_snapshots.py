@@ -0,0 +1,64 @@
+import pytest
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release, ReleaseAsset
+from app.services.snapshots import SnapshotService, SnapshotError
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+
+def add_releases(db, project, versions):
+    for version in versions:
+        release = Release(project_id=project.id, version=version, changelog=f"notes {version}")
+        db.add(release)
+        db.flush()
+        db.add(ReleaseAsset(release_id=release.id, name=f"demo-{version}.tar.gz", size=1024))
+    db.commit()
+
+
+class TestSnapshotService:
+    """Test incremental columnar snapshots."""
+
+    def test_incremental_snapshots(self, db, tmp_path):
+        """Test that each run only exports releases past the high-water mark."""
+        project = Project(name="demo", source=ReleaseSource.GITHUB)
+        db.add(project)
+        db.commit()
+        add_releases(db, project, ["1.0.0", "1.1.0", "1.2.0", "1.3.0", "2.0.0"])
+
+        service = SnapshotService(str(tmp_path), row_group_size=2)
+        first = service.run(db)
+
+        assert first["rows"] == {"releases": 5, "projects": 1, "release_assets": 5}
+        releases = pq.ParquetFile(service.file_path(1, "releases"))
+        # Bounded row groups: 5 rows at 2 per group
+        assert releases.metadata.num_row_groups == 3
+        table = releases.read()
+        assert table.column("version").to_pylist() == ["1.0.0", "1.1.0", "1.2.0", "1.3.0", "2.0.0"]
+        projects = pq.read_table(service.file_path(1, "projects"))
+        assert projects.column("source").to_pylist() == ["github"]
+
+        # Nothing new: no snapshot written
+        assert service.run(db) is None
+
+        add_releases(db, project, ["2.1.0"])
+        second = service.run(db)
+        assert second["release_id_from"] == first["release_id_to"] + 1
+        assert second["rows"]["releases"] == 1
+        assert pq.read_table(service.file_path(2, "releases")).column("version").to_pylist() == ["2.1.0"]
+        assert service.load_manifest()["high_water_mark"] == second["release_id_to"]
+
+    def test_unknown_files(self, tmp_path):
+        """Test that unknown snapshots and tables resolve to nothing."""
+        service = SnapshotService(str(tmp_path))
+        assert service.file_path(1, "releases") is None
+        assert service.file_path(1, "users") is None
+
+    def test_concurrent_runs_rejected(self, db, tmp_path):
+        """Test that only one snapshot runs at a time."""
+        service = SnapshotService(str(tmp_path))
+        service._lock.acquire()
+        try:
+            with pytest.raises(SnapshotError):
+                service.run(db)
+        finally:
+            service._lock.release()
@@ -0,0 +1,127 @@
+import importlib
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from app.core.database import get_db
+from app.core.security import get_current_user
+from app.main import app
+from app.models.project import Project, ReleaseSource
+from app.models.release import ChangelogSummary, Release
+from app.models.user import User
+from app.services.ai_summarizer import AISummarizer, SummarizationConfig
+from app.services.events import EventHub
+from app.services.summaries import SummaryStage, changelog_hash
+from app.services.summary_queue import ProviderError
+from tests.test_events import FakeSource
+
+fetcher_module = importlib.import_module("app.services.fetcher")
+
+
+@pytest.fixture
+def session_factory(db_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+
+
+def add_releases(db, changelogs, inline=False):
+    """Releases of a new project; `inline` stores them the way releases were before changelog blobs."""
+    project = Project(name=f"pkg-{db.query(Project).count()}", source=ReleaseSource.NPM)
+    db.add(project)
+    db.flush()
+    releases = [
+        Release(project_id=project.id, version=f"1.{i}.0", changelog_inline=changelog)
+        if inline else Release(project_id=project.id, version=f"1.{i}.0", changelog=changelog)
+        for i, changelog in enumerate(changelogs)
+    ]
+    db.add_all(releases)
+    db.commit()
+    return releases
+
+
+class FailingProvider:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, system, prompt):
+        self.calls += 1
+        raise ProviderError("provider down")
+
+
+class FailingSummarizer(AISummarizer):
+    def __init__(self):
+        super().__init__(SummarizationConfig(enabled=True, api_key="key"))
+        self.provider = FailingProvider()
+        self.queue().provider = self.provider
+
+    @property
+    def calls(self):
+        return self.provider.calls
+
+
+class TestSummaryStage:
+    """Test precomputing changelog summaries by content hash."""
+
+    async def test_identical_changelogs_summarized_once(self, db, session_factory):
+        """Test that releases sharing a text share one summary, old ones included."""
+        shared = "### Features\n- feat: plugins\n- fix: crash on start"
+        add_releases(db, [shared, "- fix: typo", None])
+        add_releases(db, [shared])
+        legacy = add_releases(db, ["- feat: legacy"], inline=True)[0]
+
+        stage = SummaryStage(session_factory, AISummarizer())
+        assert await stage.run() == 3
+        assert await stage.run() == 0
+
+        db.expire_all()
+        assert legacy.changelog_sha256 == changelog_hash("- feat: legacy")
+        row = db.query(ChangelogSummary).filter(ChangelogSummary.content_hash == changelog_hash(shared)).one()
+        assert row.source == "extract"
+        assert row.summary
+        assert db.query(ChangelogSummary).count() == 3
+
+    async def test_ai_failure_falls_back_to_extractor(self, db, session_factory):
+        """Test that a failing provider still yields a stored summary."""
+        add_releases(db, ["- fix: crash"])
+        summarizer = FailingSummarizer()
+
+        assert await SummaryStage(session_factory, summarizer).run() == 1
+        assert summarizer.calls == 1
+        assert db.query(ChangelogSummary).one().source == "extract"
+
+    async def test_fetch_hashes_changelogs(self, db, monkeypatch):
+        """Test that ingest stores the changelog hash."""
+        monkeypatch.setattr(fetcher_module, "event_hub", EventHub())
+        monkeypatch.setattr(fetcher_module, "get_source", lambda name: FakeSource(["2.0.0"]))
+        db.add(Project(name="demo", source=ReleaseSource.GITHUB, external_id="acme/demo"))
+        db.commit()
+
+        await fetcher_module.ReleaseFetcher().fetch_all(db)
+
+        release = db.query(Release).one()
+        assert release.changelog_sha256 == changelog_hash("Changes in 2.0.0")
+
+    async def test_release_endpoint_reads_summary(self, db, session_factory):
+        """Test that GET /releases/{id} serves the stored summary."""
+        user = User(email="dev@example.com", password_hash="x", first_name="D", last_name="V")
+        db.add(user)
+        release = add_releases(db, ["- feat: dark mode"])[0]
+
+        app.dependency_overrides[get_db] = lambda: db
+        app.dependency_overrides[get_current_user] = lambda: user
+        try:
+            client = TestClient(app)
+            assert client.get(f"/api/releases/{release.id}").json()["summary"] is None
+
+            await SummaryStage(session_factory, AISummarizer()).run()
+            summary = client.get(f"/api/releases/{release.id}").json()["summary"]
+        finally:
+            app.dependency_overrides.clear()
+
+        row = db.query(ChangelogSummary).one()
+        assert summary == {
+            "summary": row.summary,
+            "breaking": row.breaking,
+            "features": row.features,
+            "fixes": row.fixes,
+            "security": row.security,
+            "source": "extract",
+        }
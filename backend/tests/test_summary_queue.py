@@ -0,0 +1,181 @@
+import asyncio
+import json
+import re
+import pytest
+from sqlalchemy.orm import sessionmaker
+from app.models.release import ChangelogSummary
+from app.services.ai_summarizer import AISummarizer, SummarizationConfig
+from app.services.summaries import SummaryStage
+from app.services.summary_queue import ChangelogItem, RateBudget, parse_results
+from tests.test_summaries import add_releases
+
+CHANGELOG_HEADING = re.compile(r"^### Changelog (\d+): (\S+) (\S+)$", re.MULTILINE)
+
+
+class FakeProvider:
+    """Local stand-in for an OpenAI-style chat completions endpoint.
+
+    Summarizes every changelog in the prompt; records the versions in each
+    request and the peak number of requests in flight. Requests beyond
+    `hang_after` never get an answer.
+    """
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.hang_after = None
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        port = self.server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/v1"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                headers = dict(line.lower().split(": ", 1) for line in lines[1:] if ": " in line)
+                body = json.loads(await reader.readexactly(int(headers.get("content-length", 0))))
+                prompt = body["messages"][-1]["content"]
+                changelogs = CHANGELOG_HEADING.findall(prompt)
+                self.requests.append([version for _, _, version in changelogs])
+                if self.hang_after is not None and len(self.requests) > self.hang_after:
+                    await asyncio.Event().wait()
+
+                self.in_flight += 1
+                self.peak = max(self.peak, self.in_flight)
+                await asyncio.sleep(self.delay)
+                self.in_flight -= 1
+
+                results = [
+                    {"id": int(index), "summary": f"AI summary of {name} {version}", "features": ["plugins"]}
+                    for index, name, version in changelogs
+                ]
+                reply = json.dumps({"choices": [{"message": {"content": json.dumps({"results": results})}}]})
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                    + f"Content-Length: {len(reply)}\r\n\r\n".encode() + reply.encode()
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def provider():
+    provider = FakeProvider()
+    await provider.start()
+    yield provider
+    await provider.stop()
+
+
+def make_summarizer(provider, **overrides):
+    config = dict(enabled=True, api_key="key", base_url=provider.url, max_batch_items=8)
+    config.update(overrides)
+    return AISummarizer(SummarizationConfig(**config))
+
+
+def make_items(count):
+    return [ChangelogItem(i, f"- fix: bug {i}", "pkg", f"1.{i}.0") for i in range(count)]
+
+
+class TestSummaryQueue:
+    """Test batched, rate-limited changelog summarization."""
+
+    async def test_small_changelogs_share_requests(self, provider):
+        """Test that 20 small changelogs take 3 provider calls."""
+        summarizer = make_summarizer(provider)
+
+        results = await summarizer.summarize_many(make_items(20))
+
+        assert [len(versions) for versions in provider.requests] == [8, 8, 4]
+        assert sorted(key for key, _, _ in results) == list(range(20))
+        assert all(source == "ai" for _, _, source in results)
+        assert dict((key, data) for key, data, _ in results)[3]["summary"] == "AI summary of pkg 1.3.0"
+
+    async def test_concurrency_is_bounded(self, provider):
+        """Test that no more than max_concurrency calls are in flight."""
+        provider.delay = 0.05
+        summarizer = make_summarizer(provider, max_batch_items=1, max_concurrency=3)
+
+        await summarizer.summarize_many(make_items(10))
+
+        assert len(provider.requests) == 10
+        assert provider.peak == 3
+
+    async def test_over_budget_falls_back_to_extractor(self, provider):
+        """Test that batches the budget cannot admit soon are extracted locally."""
+        summarizer = make_summarizer(provider, requests_per_minute=1, max_wait_seconds=0)
+
+        results = await summarizer.summarize_many(make_items(20))
+
+        assert len(provider.requests) == 1
+        assert sorted(source for _, _, source in results) == ["ai"] * 8 + ["extract"] * 12
+        assert summarizer.queue().fallbacks == 12
+
+    async def test_stage_resumes_after_interruption(self, db, db_engine, provider):
+        """Test that stored batches are not summarized again after a restart."""
+        add_releases(db, [f"- fix: bug {i}" for i in range(20)])
+        stage = SummaryStage(
+            sessionmaker(autocommit=False, autoflush=False, bind=db_engine),
+            make_summarizer(provider, max_concurrency=1),
+        )
+
+        provider.hang_after = 1
+        run = asyncio.create_task(stage.run())
+        for _ in range(200):
+            if db.query(ChangelogSummary).count():
+                break
+            await asyncio.sleep(0.01)
+        run.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await run
+        assert db.query(ChangelogSummary).count() == 8
+
+        provider.hang_after = None
+        done = provider.requests[:1]
+        provider.requests.clear()
+        assert await stage.run() == 12
+
+        assert not set(done[0]) & {version for versions in provider.requests for version in versions}
+        assert db.query(ChangelogSummary).count() == 20
+        assert {row.source for row in db.query(ChangelogSummary)} == {"ai"}
+
+
+class TestRateBudget:
+    """Test the per-minute request and token budget."""
+
+    def test_waits_for_oldest_calls_to_expire(self):
+        """Test that a full budget frees up as calls leave the window."""
+        now = [0.0]
+        budget = RateBudget(requests_per_minute=2, tokens_per_minute=1000, clock=lambda: now[0])
+
+        budget.spend(600)
+        now[0] = 10
+        assert budget.wait_time(300) == 0
+        budget.spend(300)
+        assert budget.wait_time(100) == 50  # Request limit: the first call expires at 60
+        assert budget.wait_time(2000) == float("inf")
+
+        now[0] = 60
+        assert budget.wait_time(700) == 0
+        budget.spend(700)
+        assert budget.wait_time(100) == 10  # Token limit: the 300-token call expires at 70
+
+    def test_malformed_results_are_dropped(self):
+        """Test that only well-formed results for known ids are parsed."""
+        reply = 'Sure! {"results": [{"id": 0, "summary": "ok", "fixes": ["a", ""]}, {"id": 7, "summary": "x"}, {"id": 1}]}'
+
+        assert parse_results(reply, 2) == {
+            0: {"summary": "ok", "breaking": [], "features": [], "fixes": ["a"], "security": []},
+        }
@@ -0,0 +1,136 @@
+import datetime
+import random
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+from app.core.versions import parse_version
+from app.models.project import Project, ReleaseSource
+from app.models.release import Release
+from app.services.version_index import backfill_version_keys, latest_release
+
+
+def sorted_versions(versions):
+    return sorted(versions, key=lambda version: parse_version(version).key)
+
+
+class TestVersionParsing:
+    """Test sortable keys and pre-release detection."""
+
+    def test_semver_order(self):
+        """Test semver pre-releases, numeric parts and tag prefixes."""
+        ordered = [
+            "1.0.0-1", "1.0.0-alpha", "1.0.0-alpha.1", "1.0.0-beta.2", "1.0.0-beta.11", "1.0.0-rc.1",
+            "v1.0.0", "1.0.1", "1.2.0", "1.10.0", "release-2.0.0", "pkg@10.0.0",
+        ]
+        assert sorted_versions(list(reversed(ordered))) == ordered
+        assert parse_version("1.0").key == parse_version("v1.0.0+build.7").key
+
+    def test_pep440_order(self):
+        """Test dev, pre and post releases in PEP 440 order."""
+        ordered = ["1.0.dev1", "1.0a1.dev1", "1.0a1", "1.0a1.post1", "1.0b1", "1.0rc1", "1.0", "1.0.post1", "1.0.1"]
+        assert sorted_versions(list(reversed(ordered))) == ordered
+
+    def test_calendar_versions(self):
+        """Test that calendar versions compare by number, not text."""
+        assert sorted_versions(["2024.10.1", "2024.9.30", "2023.12"]) == ["2023.12", "2024.9.30", "2024.10.1"]
+
+    def test_prerelease_flag(self):
+        """Test pre-release detection, including npm versions prefix checks missed."""
+        prereleases = ["1.0.0-beta.1", "2.0.0-rc.1", "3.0.0-next.4", "1.0a1", "2.0.0.dev3", "1.0-SNAPSHOT", "nightly"]
+        stable = ["1.0.0", "v2.1.0", "1.0.post1", "5.0.0.Final", "2024.01.15", "latest", ""]
+
+        assert all(parse_version(version).prerelease for version in prereleases)
+        assert not any(parse_version(version).prerelease for version in stable)
+        assert parse_version("latest").key == ""
+
+
+class TestLatestRelease:
+    """Test resolving a project's latest release by version."""
+
+    @pytest.fixture
+    def project(self, db):
+        project = Project(name="demo", source=ReleaseSource.NPM)
+        db.add(project)
+        db.flush()
+        # Inserted newest-first, as a backfill does
+        for i, version in enumerate(["2.0.0-rc.1", "1.10.0", "1.9.0", "1.2.0", "0.9.0"]):
+            db.add(Release(
+                project_id=project.id,
+                version=version,
+                prerelease=parse_version(version).prerelease,
+                created_at=datetime.datetime(2024, 1, 1) + datetime.timedelta(days=i),
+            ))
+        db.commit()
+        return project
+
+    def test_latest_by_version_not_insert_time(self, db, project):
+        """Test that the latest stable release ignores insert order."""
+        assert latest_release(db, project.id).version == "1.10.0"
+        assert latest_release(db, project.id, include_prereleases=True).version == "2.0.0-rc.1"
+
+    def test_latest_stable_uses_the_index(self, db, project):
+        """Test that the stable lookup is an index seek, not a sort."""
+        query = (
+            db.query(Release.id)
+            .filter(Release.project_id == project.id, Release.prerelease.is_(False))
+            .order_by(Release.version_key.desc(), Release.id.desc())
+            .limit(1)
+        )
+        statement = str(query.statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True}))
+        plan = " ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {statement}")))
+
+        assert "ix_releases_project_latest" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_backfill_keys_and_flags(self, db, db_engine, project):
+        """Test that releases stored before keys existed get keys and pre-release flags."""
+        db.execute(Release.__table__.insert(), [
+            {"project_id": project.id, "version": "3.0.0-beta.1", "prerelease": False},
+            {"project_id": project.id, "version": "2.5.0", "prerelease": False},
+        ])
+        db.commit()
+
+        count, flagged = backfill_version_keys(sessionmaker(bind=db_engine), batch_size=1)
+
+        assert (count, flagged) == (2, 1)
+        assert latest_release(db, project.id).version == "2.5.0"
+        assert latest_release(db, project.id, include_prereleases=True).version == "3.0.0-beta.1"
+        assert backfill_version_keys(sessionmaker(bind=db_engine)) == (0, 0)
+
+
+def version_corpus(count, seed=7):
+    """Version strings in the mix registries and tags produce."""
+    rng = random.Random(seed)
+    labels = ["alpha", "beta", "rc", "next", "canary"]
+    versions = []
+    for _ in range(count):
+        major, minor, patch = rng.randint(0, 30), rng.randint(0, 60), rng.randint(0, 200)
+        kind = rng.random()
+        if kind < 0.55:
+            versions.append(f"{major}.{minor}.{patch}")
+        elif kind < 0.7:
+            versions.append(f"v{major}.{minor}.{patch}")
+        elif kind < 0.82:
+            versions.append(f"{major}.{minor}.{patch}-{rng.choice(labels)}.{rng.randint(0, 20)}")
+        elif kind < 0.92:
+            versions.append(f"{major}.{minor}{rng.choice(['a', 'b', 'rc', '.post', '.dev'])}{rng.randint(0, 9)}")
+        else:
+            versions.append(f"20{rng.randint(18, 25)}.{rng.randint(1, 12)}.{rng.randint(1, 28)}")
+    return versions
+
+
+@pytest.mark.slow
+class TestVersionParsingBenchmark:
+    """Parse throughput over a registry-like mix of version strings."""
+
+    def test_throughput(self):
+        versions = version_corpus(2_000_000)
+
+        started = time.perf_counter()
+        for version in versions:
+            parse_version(version)
+        seconds = time.perf_counter() - started
+
+        print(f"\n{len(versions)} versions ({len(set(versions))} distinct): {len(versions) / seconds / 1e6:.2f}M/s")
+        assert len(versions) / seconds > 150_000
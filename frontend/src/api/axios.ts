@@ -39,6 +39,8 @@ export const authApi = {
   register: (data: { email: string; password: string; first_name: string; last_name: string }) =>
     api.post('/auth/register', data),
   me: () => api.get('/auth/me'),
+  updateMe: (data: { first_name?: string; last_name?: string; digest_hour?: number | null }) =>
+    api.patch('/auth/me', data),
 }
 
 export const projectsApi = {
@@ -57,12 +59,15 @@ export const releasesApi = {
   feed: (params?: { limit?: number; days?: number }) => api.get('/releases/feed', { params }),
   getProjectReleases: (projectId: number, params?: { skip?: number; limit?: number }) =>
     api.get(`/releases/project/${projectId}`, { params }),
+  // EventSource can't send headers, so the token goes in the query string
+  stream: () =>
+    new EventSource(`/api/stream/releases?token=${encodeURIComponent(localStorage.getItem('token') || '')}`),
 }
 
 export const subscriptionsApi = {
   list: () => api.get('/subscriptions'),
   create: (data: { project_id: number; notify_email?: boolean }) => api.post('/subscriptions', data),
-  update: (id: number, data: { notify_email?: boolean; notify_webhook?: boolean; webhook_url?: string }) =>
+  update: (id: number, data: { notify_email?: boolean; notify_webhook?: boolean; notify_digest?: boolean; webhook_url?: string; coalesce_seconds?: number }) =>
     api.put(`/subscriptions/${id}`, data),
   delete: (id: number) => api.delete(`/subscriptions/${id}`),
 }
@@ -24,6 +24,16 @@ export default function DashboardPage() {
     fetchDashboard()
   }, [])
 
+  // New releases are pushed by the server instead of polling the feed
+  useEffect(() => {
+    const source = releasesApi.stream()
+    source.addEventListener('release.created', (event) => {
+      const message = JSON.parse((event as MessageEvent).data)
+      setReleases((current) => [message.data as Release, ...current].slice(0, 10))
+    })
+    return () => source.close()
+  }, [])
+
   const fetchDashboard = async () => {
     try {
       const [feedRes, subsRes] = await Promise.all([